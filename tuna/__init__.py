@@ -14,7 +14,7 @@ Subpackages
 console
     Modules related to background processes of Tuna.
 io
-    Wrappers for file formats typical in astrophysics (FITS, ADHOC) and the Tuna .can file format, which is a Python pickle containing a numpy array with image data and a Python dictionary with the metadata.
+    Wrappers for file formats typical in astrophysics (FITS, ADHOC) and the Tuna .can file format, a binary container with a JSON metadata block and a raw array section that can be memory-mapped.
 log
     Contains modules for creating and handling log destinations. Uses Python's logging module.
 models
@@ -36,10 +36,23 @@ Numpy indexing order
 --------------------
 
 From Tuna v0.11.0 onwards, we are adopting the convention mentioned in: http://docs.scipy.org/doc/numpy/reference/internals.html, so that rows will be the last item indexed. Therefore, cubes in tuna should be indexed as [ planes, columns, rows ].
+
+Importing Tuna
+--------------
+
+"import tuna" only sets up logging: each subpackage is imported when it is first accessed (for example, "tuna.io.read" imports tuna.io), so that scripts and worker processes do not pay for the subpackages they do not use.
+
+The background processes (the ZeroMQ proxy and the database thread) are not started on import. Sessions that want datasets and results recorded in the database start them explicitly::
+
+    >>> import tuna
+    >>> tuna.start_daemons ( )
+
+Until then, tuna.db is None, and the database is not updated.
 """
 
-__version__ = "0.10.7"
+__version__ = "0.11.0"
 changelog = {
+    "0.11.0" : "Tuna 0.16.4 : subpackages are imported on first access, and the daemons are started by start_daemons ( ) instead of on import.",
     "0.10.7" : "Tuna 0.15.0 : added pipelines, plugins namespaces.",
     "0.10.6" : "Tuna 0.14.0 : improved documentation.",
     "0.10.5" : "Docstring.",
@@ -50,19 +63,34 @@ changelog = {
     }
 
 
+import importlib
 import logging
 import sys
 
-import tuna.console
-import tuna.io
-from tuna.io.convenience import ( read,
-                                  write )
-import tuna.log
-import tuna.models
-import tuna.pipelines
-import tuna.tools
-import tuna.plugins
-import tuna.zeromq
+_subpackages = ( "console",
+                 "io",
+                 "log",
+                 "models",
+                 "pipelines",
+                 "plugins",
+                 "repo",
+                 "tools",
+                 "zeromq" )
+
+_convenience = ( "read",
+                 "write" )
+
+def __getattr__ ( name ):
+    if name in _subpackages:
+        return importlib.import_module ( "." + name, __name__ )
+    if name in _convenience:
+        value = getattr ( importlib.import_module ( ".io.convenience", __name__ ), name )
+        globals ( ) [ name ] = value
+        return value
+    raise AttributeError ( "module '{}' has no attribute '{}'".format ( __name__, name ) )
+
+def __dir__ ( ):
+    return sorted ( set ( globals ( ).keys ( ) ) | set ( _subpackages ) | set ( _convenience ) )
 
 class daemons ( object ):
     """
@@ -70,7 +98,7 @@ class daemons ( object ):
     """
     def __init__ ( self ):
         super ( daemons, self ).__init__ ( )
-        self.tuna_daemons = console.backend ( )
+        self.tuna_daemons = importlib.import_module ( ".console", __name__ ).backend ( )
         self.tuna_daemons.start ( )
 
 _log = logging.getLogger ( __name__ )
@@ -85,5 +113,24 @@ formatter = logging.Formatter ( fmt = "%(message)s",
 handler.setFormatter ( formatter )
 _log.addHandler ( handler )
 
-__daemons = daemons ( )
-db = __daemons.tuna_daemons.db
+_daemons = None
+
+db = None
+"""
+The database thread started by start_daemons ( ); None until then.
+"""
+
+def start_daemons ( ):
+    """
+    This function's goal is to start Tuna's background processes: the ZeroMQ proxy and the database thread. Subsequent calls return the already running daemons.
+
+    Returns:
+
+    * unnamed variable : daemons
+        The object wrapping the backend; its database is also available as tuna.db.
+    """
+    global _daemons, db
+    if _daemons is None:
+        _daemons = daemons ( )
+        db = _daemons.tuna_daemons.db
+    return _daemons
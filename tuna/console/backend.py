@@ -6,7 +6,7 @@ import logging
 import sys
 import threading
 import tuna
-from tuna.zeromq.zmq_proxy import zmq_proxy
+from tuna.zeromq.zmq_broker import zmq_broker
 
 class backend ( object ):
     """
@@ -14,8 +14,9 @@ class backend ( object ):
     """
     def __init__ ( self ):
         super ( backend, self ).__init__ ( )
-        self.__version__ = "0.2.0"
+        self.__version__ = "0.3.0"
         self.changelog = {
+            "0.3.0" : "Tuna 0.16.4 : the ZeroMQ daemon runs the job broker.",
             "0.2.0" : "Tuna 0.14.0 : improved docstrings.",
             "0.1.0" : "Initial changelog version."
             }
@@ -26,7 +27,7 @@ class backend ( object ):
 
     def start ( self ):
         """
-        This method will launch the ZeroMQ proxy instance and the database on the first time it is called. Subsequent calls are ignored.        
+        This method will launch the ZeroMQ job broker and the database on the first time it is called. Subsequent calls are ignored.        
 
         Example::
 
@@ -39,15 +40,15 @@ class backend ( object ):
         if self.lock == False:
             self.lock = True
 
-            self.zmq_proxy_instance = zmq_daemon ( )
-            self.zmq_proxy_instance.start ( )
+            self.zmq_broker_instance = zmq_daemon ( )
+            self.zmq_broker_instance.start ( )
 
             self.db = tuna.io.database ( )
             self.db.start ( )
 
 class zmq_daemon ( threading.Thread ):
     """
-    This class encapsulates a ZeroMQ proxy running as an independent thread.
+    This class encapsulates the ZeroMQ job broker (see tuna.zeromq.zmq_broker) running as an independent thread. The broker starts its own pool of worker processes.
 
     It inherits from the :ref:`threading_label`.Thread class, and it auto-starts its thread execution. Clients are expected to use its .join ( ) method before using its results.
 
@@ -61,19 +62,20 @@ class zmq_daemon ( threading.Thread ):
     """
     def __init__ ( self ):
         super ( zmq_daemon, self ).__init__ ( )
-        self.__version__ = "0.1.0"
+        self.__version__ = "0.2.0"
         self.changelog = {
+            "0.2.0" : "Tuna 0.16.4 : runs a zmq_broker instead of a zmq_proxy.",
             "0.1.0" : "Initial changelog version."
             }
         self.log = logging.getLogger ( __name__ )
-        self.zmq_proxy_instance = zmq_proxy ( )
+        self.zmq_broker_instance = zmq_broker ( )
 
         self.daemon = True
 
     def run ( self ):
         """
         This method is called when the thread object's start ( ) method is called. 
-        It will call this object's ZeroMQ proxy instance's run ( ) method.
+        It will call this object's ZeroMQ broker instance's run ( ) method.
 
         Example::
 
@@ -81,4 +83,4 @@ class zmq_daemon ( threading.Thread ):
             tz = tuna.console.backend.zmq_daemon ( )
             tz.start ( )
         """
-        self.zmq_proxy_instance.run ( )
+        self.zmq_broker_instance.run ( )
@@ -5,12 +5,21 @@ This namespace contains: io operations, file formats, data storage and metadata.
 from .adhoc           import adhoc
 from .adhoc_ada       import ada
 from .can             import can
+from .can_file        import can_file
+from .chunked_file    import chunked_file
 from .convenience     import ( read,
                                write )
-from .database        import database
+from .database        import ( database,
+                               mysql_backend,
+                               sqlite_backend )
 from .file_reader     import file_reader
-from .fits            import fits
+from .fits            import ( fits,
+                               fits_plane_writer )
 from .lock            import lock
 from .metadata_parser import ( metadata_parser, 
-                               get_metadata )
+                               get_metadata,
+                               parse_adt )
+from .mosaic          import ( assemble_mosaic,
+                               read_fits_panel )
+from .photon_index    import photon_index
 from tuna.io.system   import status
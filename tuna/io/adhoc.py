@@ -23,6 +23,78 @@ import tuna
 #faire un programme readad qui voit l'extension pour savoir comment ouvir (soit ad2, ad3, ad1...)
 #gestion des NaN a inclure (input/output)!!!
 
+adhoc_2d_trailer_type = numpy.dtype ( [ ( 'nbdim', numpy.int32 ), 
+                                        ( 'id', numpy.int8, 8 ), 
+                                        ( 'lx', numpy.int32 ), 
+                                        ( 'ly', numpy.int32 ), 
+                                        ( 'lz', numpy.int32 ), 
+                                        ( 'scale', numpy.float32 ), 
+                                        ( 'ix0', numpy.int32 ), 
+                                        ( 'iy0', numpy.int32 ), 
+                                        ( 'zoom', numpy.float32 ), 
+                                        ( 'modevis', numpy.int32 ), 
+                                        ( 'thrshld', numpy.float32 ), 
+                                        ( 'step', numpy.float32 ), 
+                                        ( 'nbiso', numpy.int32 ), 
+                                        ( 'pal', numpy.int32 ), 
+                                        ( 'cdelt1', numpy.float64 ), 
+                                        ( 'cdelt2', numpy.float64 ), 
+                                        ( 'crval1', numpy.float64 ), 
+                                        ( 'crval2', numpy.float64 ), 
+                                        ( 'crpix1', numpy.float32 ), 
+                                        ( 'crpix2', numpy.float32 ), 
+                                        ( 'crota2', numpy.float32 ), 
+                                        ( 'equinox', numpy.float32 ), 
+                                        ( 'x_mirror', numpy.int8 ), 
+                                        ( 'y_mirror', numpy.int8 ), 
+                                        ( 'was_compressed', numpy.int8 ), 
+                                        ( 'none2', numpy.int8, 1 ), 
+                                        ( 'none', numpy.int32, 4 ),
+                                        ( 'comment', numpy.int8, 128 ) ] )
+"""
+The layout of the 256 bytes trailer of an ADHOC .AD2 file.
+"""
+
+adhoc_3d_trailer_type = numpy.dtype ( [ ( 'nbdim', numpy.int32 ), 
+                                        ( 'id', numpy.int8, 8 ), 
+                                        ( 'lx', numpy.int32 ), 
+                                        ( 'ly', numpy.int32 ), 
+                                        ( 'lz', numpy.int32 ), 
+                                        ( 'scale', numpy.float32 ), 
+                                        ( 'ix0', numpy.int32 ), 
+                                        ( 'iy0', numpy.int32 ), 
+                                        ( 'zoom', numpy.float32 ), 
+                                        ( 'xl1', numpy.float32 ), 
+                                        ( 'xi1', numpy.float32 ), 
+                                        ( 'vr0', numpy.float32 ), 
+                                        ( 'corrv', numpy.float32 ), 
+                                        ( 'p0', numpy.float32 ), 
+                                        ( 'xlp', numpy.float32 ), 
+                                        ( 'xl0', numpy.float32 ), 
+                                        ( 'vr1', numpy.float32 ), 
+                                        ( 'xik', numpy.float32 ), 
+                                        ( 'cdelt1', numpy.float64 ), 
+                                        ( 'cdelt2', numpy.float64 ), 
+                                        ( 'crval1', numpy.float64 ), 
+                                        ( 'crval2', numpy.float64 ), 
+                                        ( 'crpix1', numpy.float32 ), 
+                                        ( 'crpix2', numpy.float32 ), 
+                                        ( 'crota2', numpy.float32 ), 
+                                        ( 'equinox', numpy.float32 ), 
+                                        ( 'x_mirror', numpy.int8 ), 
+                                        ( 'y_mirror', numpy.int8 ), 
+                                        ( 'was_compressed', numpy.int8 ), 
+                                        ( 'none2', numpy.int8, 1 ), 
+                                        ( 'comment', numpy.int8, 128 ) ] )
+"""
+The layout of the 256 bytes trailer of an ADHOC .AD3 file.
+"""
+
+adhoc_sentinel = numpy.float32 ( -3.1E38 )
+"""
+The value used by ADHOC to mark voxels without data.
+"""
+
 class adhoc ( file_reader ):
     """
     This class' responsibilities include: reading files in one of the ADHOC file formats (AD2 or AD3).
@@ -48,6 +120,9 @@ class adhoc ( file_reader ):
     * array : numpy.ndarray : defaults to None.
         Will be read from the file, and its size is the file size minus 256 bytes, and each field has 32 bytes and is encoded as a float.
 
+    * memmap : bool : defaults to False.
+        If True, the file's data section is mapped as a numpy.memmap instead of being read into memory. The array is then a (copy-on-write) view of the file, and the ADHOC "no data" values are only replaced by numpy.nan on demand, through apply_sentinel ( ) or get_plane ( ).
+
     Example usage::
 
         import tuna
@@ -55,18 +130,24 @@ class adhoc ( file_reader ):
         raw.read ( )
         raw.get_array ( )
         raw.get_trailer ( )
+
+        mapped = tuna.io.adhoc ( file_name = "tuna/tuna/test/unit/unit_io/adhoc.ad3", memmap = True )
+        mapped.read ( )
+        mapped.get_plane ( 0 )
     """
 
     def __init__ ( self, 
                    adhoc_type = None, 
                    adhoc_trailer = None, 
                    file_name = None, 
-                   array = None ):
+                   array = None,
+                   memmap = False ):
         super ( adhoc, self ).__init__ ( )
         self.log = logging.getLogger ( __name__ )
         self.log.setLevel ( logging.INFO )
-        self.__version__ = "0.2.0"
+        self.__version__ = "0.3.0"
         self.changelog = {
+            '0.3.0' : "Tuna 0.16.4 : added memory-mapped read mode.",
             '0.2.0' : "Tuna 0.14.0 : improved docstrings.",
             '0.1.2' : "Documentation: module, class and function docstrings.", 
             '0.1.1' : "Improved docstrings.",
@@ -78,6 +159,7 @@ class adhoc ( file_reader ):
         self.__file_name = file_name
         self.__array = array
         self.__file_object = None
+        self.__memmap = memmap
 
     def _discover_adhoc_type ( self ):
         """
@@ -99,7 +181,7 @@ class adhoc ( file_reader ):
                 self.log.error ( "File does not contain valid numpy array." )
                 self.__adhoc_type = None
                 return
-            self.__array_size = ( self.__file_object.tell ( ) - 256 ) / 4  
+            self.__array_size = ( self.__file_object.tell ( ) - 256 ) // 4
             self.__file_object.close ( )
 
             try: 
@@ -140,6 +222,10 @@ class adhoc ( file_reader ):
             self.log.error ( "No file name selected, aborting read operation." )
             return
 
+        if self.__memmap:
+            self._read_adhoc_memmap ( )
+            return
+
         if self.__adhoc_type == None:
             self._discover_adhoc_type ( )
             if self.__adhoc_type == None:
@@ -154,7 +240,7 @@ class adhoc ( file_reader ):
         self.__file_object = open ( self.__file_name, "rb" )
 
         if self.__array_size == None:
-            self.__array_size = ( self.__file_object.tell ( ) - 256 ) / 4  
+            self.__array_size = ( self.__file_object.tell ( ) - 256 ) // 4
 
         if self.__adhoc_type == 2:
             self._read_adhoc_2d ( )
@@ -169,53 +255,25 @@ class adhoc ( file_reader ):
         self.log.debug ( tuna.log.function_header ( ) )
 
         adhoc_2d_file_type = numpy.dtype ( [ ( 'data', np.float32, self.__array_size ), 
-                                             ( 'trailer', 
-                                               [ ( 'nbdim', np.int32 ), 
-                                                 ( 'id', np.int8, 8 ), 
-                                                 ( 'lx', np.int32 ), 
-                                                 ( 'ly', np.int32 ), 
-                                                 ( 'lz', np.int32 ), 
-                                                 ( 'scale', np.float32 ), 
-                                                 ( 'ix0', np.int32 ), 
-                                                 ( 'iy0', np.int32 ), 
-                                                 ( 'zoom', np.float32 ), 
-                                                 ( 'modevis', np.int32 ), 
-                                                 ( 'thrshld', np.float32 ), 
-                                                 ( 'step', np.float32 ), 
-                                                 ( 'nbiso', np.int32 ), 
-                                                 ( 'pal', np.int32 ), 
-                                                 ( 'cdelt1', np.float64 ), 
-                                                 ( 'cdelt2', np.float64 ), 
-                                                 ( 'crval1', np.float64 ), 
-                                                 ( 'crval2', np.float64 ), 
-                                                 ( 'crpix1', np.float32 ), 
-                                                 ( 'crpix2', np.float32 ), 
-                                                 ( 'crota2', np.float32 ), 
-                                                 ( 'equinox', np.float32 ), 
-                                                 ( 'x_mirror', np.int8 ), 
-                                                 ( 'y_mirror', np.int8 ), 
-                                                 ( 'was_compressed', np.int8 ), 
-                                                 ( 'none2', np.int8, 1 ), 
-                                                 ( 'none', np.int32, 4 ),
-                                                 ( 'comment', np.int8, 128 ) ] ) ] )
+                                             ( 'trailer', adhoc_2d_trailer_type ) ] )
         
         numpy_data = numpy.fromfile ( self.__file_name, dtype = adhoc_2d_file_type )
         
         if ( numpy_data['trailer']['lx'] >= 32768 ) |  ( numpy_data['trailer']['ly'] >= 32768 ):
             self.log.debug ( 'critical: lx or ly seems to be invalid: (' 
-                    + numpy.str ( numpy_data['trailer']['lx'][0] ) + ', ' 
-                    + numpy.str ( numpy_data['trailer']['ly'][0] ) + ')' )
+                    + str ( numpy_data['trailer']['lx'][0] ) + ', ' 
+                    + str ( numpy_data['trailer']['ly'][0] ) + ')' )
             self.log.debug ( 'critical: If you want to allow arrays as large as this, modify the code!' )
             return
 
         try:
-            self.__array = numpy_data['data'][0].reshape ( numpy_data['trailer']['ly'], 
-                                                           numpy_data['trailer']['lx'] )
+            self.__array = numpy_data['data'][0].reshape ( numpy_data['trailer']['ly'][0], 
+                                                           numpy_data['trailer']['lx'][0] )
         except ValueError as e:
             self.log.debug ( "%s" % str ( e ) )
             raise
     
-        self.__array [ numpy.where ( numpy_data == -3.1E38 ) ] = numpy.nan
+        self.__array [ self.__array == adhoc_sentinel ] = numpy.nan
         self.__adhoc_trailer = numpy_data['trailer']
 
         self.log.info ( "Successfully read adhoc 2d object from file %s." % str ( self.__file_name ) )
@@ -234,71 +292,150 @@ class adhoc ( file_reader ):
 
         data = self.__file_object
         data.seek ( 0, 2 )
-        sz = ( data.tell ( ) - 256 ) / 4
+        sz = ( data.tell ( ) - 256 ) // 4
             
         dt = np.dtype ( [ ( 'data', np.float32, sz ),
-                          ( 'trailer', 
-                            [ ( 'nbdim', np.int32 ), 
-                              ( 'id', np.int8, 8 ), 
-                              ( 'lx', np.int32 ), 
-                              ( 'ly', np.int32 ), 
-                              ( 'lz', np.int32 ), 
-                              ( 'scale', np.float32 ), 
-                              ( 'ix0', np.int32 ), 
-                              ( 'iy0', np.int32 ), 
-                              ( 'zoom', np.float32 ), 
-                              ( 'xl1', np.float32 ), 
-                              ( 'xi1', np.float32 ), 
-                              ( 'vr0', np.float32), 
-                              ( 'corrv', np.float32 ), 
-                              ( 'p0', np.float32 ), 
-                              ( 'xlp', np.float32 ), 
-                              ( 'xl0', np.float32 ), 
-                              ( 'vr1', np.float32 ), 
-                              ( 'xik', np.float32 ), 
-                              ( 'cdelt1', np.float64 ), 
-                              ( 'cdelt2', np.float64 ), 
-                              ( 'crval1', np.float64 ), 
-                              ( 'crval2', np.float64 ), 
-                              ( 'crpix1', np.float32 ), 
-                              ( 'crpix2', np.float32 ), 
-                              ( 'crota2', np.float32 ), 
-                              ( 'equinox', np.float32 ), 
-                              ( 'x_mirror', np.int8 ), 
-                              ( 'y_mirror', np.int8 ), 
-                              ( 'was_compressed', np.int8 ), 
-                              ( 'none2', np.int8, 1 ), 
-                              ( 'comment', np.int8, 128 ) ] ) ] )
+                          ( 'trailer', adhoc_3d_trailer_type ) ] )
 
         ad3 = np.fromfile ( self.__file_name, dtype = dt )
+        trailer = ad3['trailer'][0]
+        lx = int ( trailer['lx'] )
+        ly = int ( trailer['ly'] )
+        lz = int ( trailer['lz'] )
+        nbdim = int ( trailer['nbdim'] )
 
-        if ( ad3['trailer']['lx'][0] * ad3['trailer']['ly'][0] * ad3['trailer']['lz'][0] >= 250 * 1024 * 1024 ):
+        if ( lx * ly * lz >= 250 * 1024 * 1024 ):
             self.log.debug ( 'critical: lx or ly or lz seems to be invalid: (' + 
-                  np.str(ad3['trailer']['lx'][0]) + ', ' + 
-                  np.str(ad3['trailer']['ly'][0]) + ', ' + 
-                  np.str(ad3['trailer']['lz'][0]) + ')')
+                  str ( lx ) + ', ' + 
+                  str ( ly ) + ', ' + 
+                  str ( lz ) + ')')
             self.log.debug ( 'critical: If you want to allow arrays as large as this, modify the code!')
             return
 
-        if ad3['trailer']['nbdim'] == -3:  # nbdim ?
-            data = ad3['data'][0].reshape(ad3['trailer']['lz'], ad3['trailer']['ly'], ad3['trailer']['lx'])  #
+        if nbdim == -3:  # nbdim ?
+            data = ad3['data'][0].reshape(lz, ly, lx)  #
         else:
-            data = ad3['data'][0].reshape(ad3['trailer']['ly'], ad3['trailer']['lx'], ad3['trailer']['lz'])
+            data = ad3['data'][0].reshape(ly, lx, lz)
 
-        if xyz & (ad3['trailer']['nbdim'] == 3):
+        if xyz and (nbdim == 3):
             #return the data ordered in z, y, x
             data = data.transpose(2, 0, 1)
 
-        if (not xyz) & (ad3['trailer']['nbdim'] == -3):
+        if (not xyz) and (nbdim == -3):
             #return data ordered in y, x, z
             data = data.transpose(1, 2, 0)
 
-        data[np.where(data == -3.1E38)] = np.nan
+        data[data == adhoc_sentinel] = np.nan
         #ad3 = dtu(data, ad3['trailer'][0], filename)
         self.__array = data
         self.__trailer = ad3['trailer'][0]
         self.log.info ( "Successfully read adhoc 3d object from file %s." % str ( self.__file_name ) )
 
+    def _read_adhoc_memmap ( self, xyz = True ):
+        """
+        This method's goal is to map the contents of self.__file_name into a numpy.memmap, without reading the data section into memory.
+
+        The 256 bytes trailer is parsed on its own, and the float32 data section is mapped in copy-on-write mode. Reshaping and reordering the axes are done through views of the map, so no copy of the data is made; the ADHOC "no data" values are left untouched until apply_sentinel ( ) or get_plane ( ) are called.
+
+        Parameters:
+
+        * xyz : boolean : defaults to True.
+            False to return data in standard zxy adhoc format,
+            True  to return data in xyz format (default).
+        """
+        self.log.debug ( tuna.log.function_header ( ) )
+
+        file_size = os.path.getsize ( self.__file_name )
+        if file_size < 256:
+            self.log.error ( "File does not contain valid numpy array." )
+            self._is_readable = False
+            return
+        array_size = ( file_size - 256 ) // 4
+
+        with open ( self.__file_name, "rb" ) as file_object:
+            file_object.seek ( - 256, os.SEEK_END )
+            trailer_bytes = file_object.read ( 256 )
+
+        nbdim = numpy.frombuffer ( trailer_bytes [ : 4 ], dtype = numpy.int32 ) [ 0 ]
+        if nbdim == 2:
+            trailer = numpy.frombuffer ( trailer_bytes, dtype = adhoc_2d_trailer_type ) [ 0 ]
+            shape = ( int ( trailer [ 'ly' ] ), int ( trailer [ 'lx' ] ) )
+        elif nbdim == -3:
+            trailer = numpy.frombuffer ( trailer_bytes, dtype = adhoc_3d_trailer_type ) [ 0 ]
+            shape = ( int ( trailer [ 'lz' ] ), int ( trailer [ 'ly' ] ), int ( trailer [ 'lx' ] ) )
+        elif nbdim == 3:
+            trailer = numpy.frombuffer ( trailer_bytes, dtype = adhoc_3d_trailer_type ) [ 0 ]
+            shape = ( int ( trailer [ 'ly' ] ), int ( trailer [ 'lx' ] ), int ( trailer [ 'lz' ] ) )
+        else:
+            self.log.warning ( "Unrecognized number of dimensions in file %s." % str ( self.__file_name ) )
+            self._is_readable = False
+            return
+        self.__adhoc_type = nbdim
+
+        if numpy.prod ( shape, dtype = numpy.int64 ) != array_size:
+            raise ValueError ( "Cannot map array of size {} into shape {}.".format ( array_size, shape ) )
+
+        data = numpy.memmap ( self.__file_name, 
+                              dtype = numpy.float32, 
+                              mode = 'c', 
+                              shape = shape )
+
+        if xyz & ( nbdim == 3 ):
+            #return the data ordered in z, y, x
+            data = data.transpose ( 2, 0, 1 )
+
+        if ( not xyz ) & ( nbdim == -3 ):
+            #return data ordered in y, x, z
+            data = data.transpose ( 1, 2, 0 )
+
+        self.__array = data
+        self.__adhoc_trailer = trailer
+        self.__trailer = trailer
+        self._is_readable = True
+        self.log.info ( "Successfully mapped adhoc {}d object from file {}.".format ( abs ( nbdim ), 
+                                                                                      self.__file_name ) )
+
+    def apply_sentinel ( self ):
+        """
+        This method's goal is to replace, in place, the ADHOC "no data" values of the current array by numpy.nan.
+
+        The replacement is done one plane at a time, so that no temporary of the size of the whole array is created. When the array is a copy-on-write memmap, only the memory pages that actually contain "no data" values are copied.
+        """
+        self.log.debug ( tuna.log.function_header ( ) )
+
+        if not isinstance ( self.__array, numpy.ndarray ):
+            return
+
+        if self.__array.ndim == 2:
+            planes = [ self.__array ]
+        else:
+            planes = self.__array
+        for plane in planes:
+            plane [ plane == adhoc_sentinel ] = numpy.nan
+
+    def get_plane ( self, plane ):
+        """
+        This method's goal is to return a copy of a single plane of the current array, where the ADHOC "no data" values have been replaced by numpy.nan.
+
+        When the array is memory-mapped, only the requested plane is read from the file.
+
+        Parameters:
+
+        * plane : int
+            The index of the plane to be returned; it is ignored for bidimensional arrays.
+
+        Returns:
+
+        * result : numpy.ndarray
+            Containing the data of the requested plane.
+        """
+        if self.__array.ndim == 2:
+            result = numpy.array ( self.__array )
+        else:
+            result = numpy.array ( self.__array [ plane ] )
+        result [ result == adhoc_sentinel ] = numpy.nan
+        return result
+
     def get_trailer ( self ):
         """
         This method's goal is to return the current trailer.
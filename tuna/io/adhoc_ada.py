@@ -4,14 +4,114 @@ This module's scope covers operations related to ADHOC ADA files.
 """
 
 from .file_reader import file_reader
+from .metadata_parser import parse_adt
 
 import logging
+import multiprocessing
 import numpy
 from os import listdir
-from os.path import dirname, isfile, join
-import re
+from os.path import dirname, getsize, isfile, join
+import time
 import tuna
 
+def accumulate_photons ( photon_hits, shape ):
+    """
+    This function's goal is to count, in a single vectorized pass, how many photons hit each pixel of a plane.
+
+    Photons outside the plane are ignored.
+
+    Parameters:
+
+    * photon_hits : numpy.ndarray
+        Has shape ( photons, 2 ), and each row contains the coordinates of a photon hit, in the order they are stored in ADA files.
+
+    * shape : tuple of 2 integers
+        The shape of the plane where the photons are accumulated.
+
+    Returns:
+
+    * unnamed variable : numpy.ndarray
+        An integer array with the specified shape, containing the number of photons counted at each pixel.
+    """
+    x = photon_hits [ :, 0 ].astype ( numpy.intp )
+    y = photon_hits [ :, 1 ].astype ( numpy.intp )
+    valid = ( x >= 0 ) & ( x < shape [ 0 ] ) & ( y >= 0 ) & ( y < shape [ 1 ] )
+    if not valid.all ( ):
+        x = x [ valid ]
+        y = y [ valid ]
+    counts = numpy.bincount ( x * shape [ 1 ] + y, minlength = shape [ 0 ] * shape [ 1 ] )
+    return counts.reshape ( shape )
+
+def list_photon_files ( file_path ):
+    """
+    This function's goal is to list the ADA files in a directory, in the order they are accumulated.
+
+    Parameters:
+
+    * file_path : string
+        The directory containing the ADA files.
+
+    Returns:
+
+    * photon_files : list of strings
+        The sorted names of the files with .ADA or .ada suffix.
+    """
+    photon_files = []
+    file_list = listdir ( file_path )
+    for file_name in file_list:
+        if isfile ( join ( file_path, file_name ) ):
+            if ( file_name.startswith ( ".ADA", -4 ) or
+                 file_name.startswith ( ".ada", -4 ) ):
+                photon_files.append ( file_name )
+
+    photon_files.sort ( )
+    return photon_files
+
+def read_photon_hits ( file_path ):
+    """
+    This function's goal is to read the photon hits stored in an ADHOC .ADA file.
+
+    Parameters:
+
+    * file_path : string
+        The path to a valid ADA file.
+
+    Returns:
+
+    * unnamed variable : numpy.ndarray
+        Has shape ( photons, 2 ), and each row contains the coordinates of a photon hit.
+    """
+    photon_positions = numpy.fromfile ( file_path, dtype = numpy.int16 )
+    # We know the file is organized with y,x,y,x,y,x... 
+    # So the file will have size / 2 photons.
+    return photon_positions.reshape ( photon_positions.size // 2, 2 )
+
+def _accumulate_photon_files ( file_path, jobs, shape ):
+    """
+    This function's goal is to accumulate the photons of several ADA files into a partial cube. It is meant to be run by the worker processes of a parallel ingest.
+
+    Parameters:
+
+    * file_path : string
+        The directory containing the ADA files.
+
+    * jobs : list of tuples
+        Each tuple contains an ADA file name and the channel its photons belong to.
+
+    * shape : tuple of 3 integers
+        The shape of the partial cube.
+
+    Returns:
+
+    * partial : numpy.ndarray
+        A numpy.uint32 array with the specified shape, containing the photon counts of the input files.
+    """
+    partial = numpy.zeros ( shape = shape, dtype = numpy.uint32 )
+    for file_name, channel in jobs:
+        counts = accumulate_photons ( read_photon_hits ( join ( file_path, file_name ) ), shape [ 1 : ] )
+        numpy.add ( partial [ channel ], counts, out = partial [ channel ], casting = 'unsafe' )
+    return partial
+
 class ada ( file_reader ):
     """
     This class's responsibility is to read files in ADHOC format ADA.
@@ -28,6 +128,12 @@ class ada ( file_reader ):
     * file_name : string : defaults to None
         To obtain data from a file, it must contain the path to a valid ADT file, which will contain the metadata and the names for the individual ADA files.
 
+    * processes : integer : defaults to 1
+        The number of worker processes used to read the ADA files. If larger than 1, the files are spread over a process pool, where each worker accumulates its files into its own integer partial cube; the partial cubes are summed at the end.
+
+    * precision : string : defaults to None
+        Overrides the precision policy (see tuna.tools.precision) for this reader. Under "double", photon counts are accumulated in a numpy.float64 cube; under "single", they are accumulated in a numpy.uint32 cube, which read ( ) narrows to numpy.uint16 when the counts fit.
+
     Example usage::
 
         import tuna
@@ -35,13 +141,25 @@ class ada ( file_reader ):
         raw.read ( )
         raw.get_array ( )
         raw.get_metadata ( )
+
+        live = tuna.io.ada ( file_name = "/data/acquisition/G094.ADT" )
+        for snapshot in live.follow ( interval = 5, idle_timeout = 600 ):
+            tuna.tools.plot ( snapshot [ 0 ] )
     """
 
     def __init__ ( self, 
                    array = None, 
-                   file_name = None ):
-        self.__version__ = "0.2.0"
+                   file_name = None,
+                   processes = 1,
+                   precision = None ):
+        self.__version__ = "0.7.1"
         self.__changelog = {
+            "0.7.1" : "Tuna 0.16.4 : follow ( ) assigns files to channels as read ( ) does.",
+            "0.7.0" : "Tuna 0.16.4 : the type of the photon counts cube follows the precision policy.",
+            "0.6.0" : "Tuna 0.16.4 : incremental ingest of an ongoing acquisition, through follow ( ).",
+            "0.5.0" : "Tuna 0.16.4 : ADT metadata parsed in a single pass by tuna.io.metadata_parser.parse_adt.",
+            "0.4.0" : "Tuna 0.16.4 : parallel ingest of ADA files.",
+            "0.3.0" : "Tuna 0.16.4 : vectorized photon accumulation, columnar photon table.",
             "0.2.0" : "Tuna 0.14.0 : improved docstrings.",
             "0.1.1" : "Updated docstrings to new style documentation.",
             '0.1.0' : "Initial changelogged version."
@@ -53,7 +171,10 @@ class ada ( file_reader ):
 
         self.__file_name = file_name
         self.__array = array
+        self.__processes = processes
+        self.__precision = precision
         self.__metadata = { }
+        self.__adt_header = { }
         self.__photons = { }
 
     def get_array ( self ):
@@ -85,7 +206,7 @@ class ada ( file_reader ):
         Returns:
 
         * self.__photons : dictionary
-            A dictionary containing a row for each photon count.
+            A columnar table: the keys 'channel', 'x', 'y' and 'photons' are associated with numpy.ndarrays of the same length, and each index corresponds to a voxel where photons were counted.
         """
         return self.__photons
 
@@ -112,41 +233,30 @@ class ada ( file_reader ):
         
         self._read_adt_metadata ( )
 
-        adt = open ( self.__file_name, "r" )
-
         number_of_channels = len ( set ( self.__metadata [ 'channel' ] [ 0 ] ) )
         self.log.debug ( "number_of_channels = %s." % ( number_of_channels ) )
 
-        for line in adt:
-            if line.startswith ( "X and Y dimensions : 00512 00512" ):
-                dimensions_string = line.split ( " : " )[1]
-                dimensions = [ int ( dimensions_string.split ( " " )[0] ),
-                               int ( dimensions_string.split ( " " )[1] ) ]
-                break
+        dimensions = [ int ( value ) for value in self.__adt_header [ "X and Y dimensions" ] [ 0 ].split ( ) ]
         self.log.debug ( "dimensions = %s." % ( dimensions ) )
        
-        data_files = 0
-        adt.seek ( 0 )
-        for line in adt:
-            if line.startswith ( "==>" ):
-                data_files += 1
+        data_files = len ( self.__metadata [ 'channel' ] [ 0 ] )
         self.log.debug ( "data_files = %d." % ( data_files ) )
 
-        photon_files = []
-        file_list = listdir ( self.__file_path )
-        for file_name in file_list:
-            if isfile ( join ( self.__file_path, file_name ) ):
-                if ( file_name.startswith ( ".ADA", -4 ) or
-                     file_name.startswith ( ".ada", -4 ) ):
-                    photon_files.append ( file_name )
-
-        photon_files.sort ( )
+        photon_files = list_photon_files ( self.__file_path )
         self.log.debug ( "len ( photon_files ) = %d." % ( len ( photon_files ) ) )
 
         
         self.__array = numpy.zeros ( shape = ( number_of_channels,
                                                        dimensions[0], 
-                                                       dimensions[1] ) )
+                                                       dimensions[1] ),
+                                     dtype = tuna.tools.count_type ( self.__precision ) )
+
+        if self.__processes > 1:
+            self._read_ada_parallel ( photon_files, number_of_channels )
+            self.__array = tuna.tools.narrow_counts ( self.__array, self.__precision )
+            self._build_photon_table ( )
+            return
+
         files_processed = 0
         last_printed = 0
         for element in range ( len ( photon_files ) ):
@@ -159,7 +269,144 @@ class ada ( file_reader ):
 
             file_result = self._read_ada ( file_name = file_name_entry, channel = channel )
             files_processed += 1
+
+        self.__array = tuna.tools.narrow_counts ( self.__array, self.__precision )
+        self._build_photon_table ( )
                 
+    def follow ( self, interval = 1, idle_timeout = None, callback = None ):
+        """
+        This method's goal is to ingest an acquisition while it is still being written, by watching the directory of the ADT file and accumulating each new ADA file into a growing cube.
+
+        A file is accumulated once its size is the same on two consecutive polls of the directory. After each poll where new files were accumulated, the metadata is refreshed from the ADT file and the cube is yielded (and passed to callback, if given). When no file has changed for idle_timeout seconds, the remaining files are accumulated, the photon table is built, and the generator stops.
+
+        Files are assigned to channels as read ( ) does: the cube depth is the number of distinct channels in the ADT records, and the channel of each file is its position in the sorted list of ADA files, modulo that number. While the first cycle is being written, the ADT records may not list every channel yet; when the number of channels grows, the cube is rebuilt from the files already accumulated. Until the ADT file has any records, the "Number of channels" of its header is used.
+
+        Parameters:
+
+        * interval : float : defaults to 1
+            The number of seconds between polls of the directory.
+
+        * idle_timeout : float : defaults to None
+            The number of seconds without changes after which the acquisition is considered finished. If None, the directory is watched until the generator is closed.
+
+        * callback : callable : defaults to None
+            If not None, called with the cube as its single argument, each time the cube is updated.
+
+        Yields:
+
+        * self.__array : numpy.ndarray
+            The cube being accumulated. The same array is updated in place between yields; copy it to keep a snapshot.
+        """
+        self.log.debug ( tuna.log.function_header ( ) )
+
+        self.__file_path = dirname ( self.__file_name )
+        self._read_adt_metadata ( )
+
+        number_of_channels = self._count_channels ( )
+        dimensions = [ int ( value ) for value in self.__adt_header [ "X and Y dimensions" ] [ 0 ].split ( ) ]
+        self.__array = numpy.zeros ( shape = ( number_of_channels,
+                                               dimensions [ 0 ],
+                                               dimensions [ 1 ] ),
+                                     dtype = tuna.tools.count_type ( self.__precision ) )
+
+        ingested = set ( )
+        sizes = { }
+        last_change = time.time ( )
+        finished = False
+        while not finished:
+            photon_files = list_photon_files ( self.__file_path )
+            ready = [ ]
+            for element in range ( len ( photon_files ) ):
+                file_name = photon_files [ element ]
+                if file_name in ingested:
+                    continue
+                size = getsize ( join ( self.__file_path, file_name ) )
+                if sizes.get ( file_name ) == size:
+                    ready.append ( ( element, file_name ) )
+                else:
+                    sizes [ file_name ] = size
+                    last_change = time.time ( )
+
+            if ( idle_timeout is not None and
+                 time.time ( ) - last_change > idle_timeout ):
+                finished = True
+                ready = [ ( element, photon_files [ element ] ) for element in range ( len ( photon_files ) )
+                          if photon_files [ element ] not in ingested ]
+
+            if ready:
+                self._read_adt_metadata ( )
+                channels = self._count_channels ( )
+                if channels != number_of_channels:
+                    self.log.info ( "Number of channels changed from {} to {}, rebuilding the cube.".format ( number_of_channels,
+                                                                                                               channels ) )
+                    number_of_channels = channels
+                    self.__array = numpy.zeros ( shape = ( number_of_channels,
+                                                           dimensions [ 0 ],
+                                                           dimensions [ 1 ] ),
+                                                 dtype = tuna.tools.count_type ( self.__precision ) )
+                    ready = [ ( element, photon_files [ element ] ) for element in range ( len ( photon_files ) )
+                              if photon_files [ element ] in ingested ] + ready
+
+            for element, file_name in ready:
+                self._read_ada ( file_name = file_name, channel = element % number_of_channels )
+                ingested.add ( file_name )
+
+            if ready:
+                self.log.info ( "{} photon files accumulated so far.".format ( len ( ingested ) ) )
+                if callback is not None:
+                    callback ( self.__array )
+                yield self.__array
+
+            if not finished:
+                time.sleep ( interval )
+
+        self._build_photon_table ( )
+
+    def _count_channels ( self ):
+        """
+        This method's goal is to count the channels of the acquisition, as the number of distinct channels in the ADT records.
+
+        Returns:
+
+        * unnamed variable : integer
+            The "Number of channels" of the ADT header, if the ADT file has no records yet.
+        """
+        channels = len ( set ( self.__metadata [ 'channel' ] [ 0 ] ) )
+        if channels == 0:
+            channels = int ( self.__adt_header [ "Number of channels" ] [ 0 ] )
+        return channels
+
+    def _read_ada_parallel ( self, photon_files, number_of_channels ):
+        """
+        This method's goal is to read the ADA files using a pool of self.__processes worker processes.
+
+        The files are split in contiguous chunks, one per worker. Each worker accumulates its chunk into a numpy.uint32 partial cube, and the partial cubes are then summed into self.__array.
+
+        Parameters:
+
+        * photon_files : list of strings
+            The sorted names of the ADA files.
+
+        * number_of_channels : integer
+            The number of channels of the acquisition; the channel of each file is its position in photon_files modulo this number.
+        """
+        self.log.debug ( tuna.log.function_header ( ) )
+
+        jobs = [ ( photon_files [ element ], element % number_of_channels ) 
+                 for element in range ( len ( photon_files ) ) ]
+        if len ( jobs ) == 0:
+            return
+        processes = min ( self.__processes, len ( jobs ) )
+        chunk_size = - ( - len ( jobs ) // processes )
+        arguments = [ ( self.__file_path, jobs [ start : start + chunk_size ], self.__array.shape )
+                      for start in range ( 0, len ( jobs ), chunk_size ) ]
+        self.log.info ( "Adding photon counts from {} files using {} processes.".format ( len ( jobs ),
+                                                                                         processes ) )
+
+        with multiprocessing.Pool ( processes ) as pool:
+            for partial in pool.starmap ( _accumulate_photon_files, arguments ):
+                self.__array += partial
+
     def _read_ada ( self, channel = -1, file_name = None ):
         """
         This method's goal is to read an ADHOC .ADA file containing photon counts.
@@ -179,201 +426,37 @@ class ada ( file_reader ):
         if channel == -1:
             return
         
-        file_path = join ( self.__file_path, file_name )
-        photon_positions = numpy.fromfile ( file_path, dtype = numpy.int16 )
-        # We know the file is organized with y,x,y,x,y,x... 
-        # So the file will have size / 2 photons.
-        photon_hits = photon_positions.reshape ( photon_positions.size / 2, 2 )
-        for photon in range ( photon_hits.shape[0] ):
-            x = photon_hits[photon][0]
-            y = photon_hits[photon][1]
-            self.__array[channel][x][y] += 1                
-            # photons table:
-            s_key = str ( channel ) + ":" + str ( x ) + ":" + str ( y )
-            if s_key not in self.__photons.keys ( ):
-                photon = { }
-                photon [ 'channel' ] = channel
-                photon [ 'x'       ] = x
-                photon [ 'y'       ] = y
-                photon [ 'photons' ] = 1
-                self.__photons [ s_key ] = photon
-            else:
-                self.__photons [ s_key ] [ 'photons' ] += 1
+        photon_hits = read_photon_hits ( join ( self.__file_path, file_name ) )
+        numpy.add ( self.__array [ channel ],
+                    accumulate_photons ( photon_hits, self.__array.shape [ 1 : ] ),
+                    out = self.__array [ channel ],
+                    casting = 'unsafe' )
                 
         #it seems that the first frame is duplicated
         #it would be nice to be able to display the creation of the image photon by photon
 
+    def _build_photon_table ( self ):
+        """
+        This method's goal is to build the photon table from the accumulated array, as a columnar structure.
+
+        Each column is a numpy.ndarray, and the table has one row for each voxel where at least one photon was counted.
+        """
+        self.log.debug ( tuna.log.function_header ( ) )
+
+        channels, xs, ys = numpy.nonzero ( self.__array )
+        self.__photons = { 'channel' : channels,
+                           'x'       : xs,
+                           'y'       : ys,
+                           'photons' : self.__array [ channels, xs, ys ].astype ( numpy.int64 ) }
+
     def _read_adt_metadata ( self ):
         """
         This method's goal is to extract metadata from an ADT file.
+
+        The file is parsed in a single pass by tuna.io.metadata_parser.parse_adt ( ); the header is kept in self.__adt_header, and each record column is stored in self.__metadata as a ( numpy.ndarray, comment ) pair.
         """
         self.log.debug ( tuna.log.function_header ( ) )
 
-        adt = open ( self.__file_name, "r" )
-
-        adt_header_lines = []
-        for line in adt:
-            if line.startswith ( "-----------------------------------------------------------------------------" ):
-                break
-            adt_header_lines.append ( line )
-
-        adt_notes_lines = []
-        for line in adt:
-            if line.startswith ( "==>" ):
-                break
-            adt_notes_lines.append ( line )
-
-        adt_parameters = { }
-        for line in adt_header_lines:
-            pair_regex = re.search ( "=", line )
-            if pair_regex != None:
-                pair = line.split ( "=" )
-                key = pair[0].replace ( "\n", "" ).strip ( )
-                value = pair[1].replace ( "\n", "" ).strip ( )
-                adt_parameters [ key ] = [ key, value, "" ]
-            else:
-                adt_parameters_dict = { }
-                key = line.strip ( ).replace ( "\t", " " )
-                value = ""
-                comment = ""
-                adt_parameters [ key ] = [ key, value, comment ]
-
-        adt_notes = ""
-        for line in adt_notes_lines:
-            adt_notes += line.strip ( ).replace ( "\n", "" )
-
-        adt_parameters_dict = { }
-        key = "ADT notes"
-        value = adt_notes
-        comment = ""
-        adt_parameters [ key ] = [ key, value, comment ]
-
-        cycle_parameters = { }
-        adt.seek ( 0 )
-        for line in adt:
-            if line.startswith ( "==>" ):                
-                split_1 = line.split ( "==>  Beginning channel=" )
-                split_2 = split_1[1].split ( " at " )
-                acquisition_channel = split_2[0]
-                acquisition_start_time = split_2[1]
-                next_line = adt.readline ( )
-                split_1 = next_line.split ( "Was acquired at " )
-                split_2 = split_1[1].split ( ": ch=" )
-                acquisition_end_time = split_2[0]
-                split_3 = split_2[1].split ( "  cy=" )
-                #acquisition_channel = split_3[0]
-                split_4 = split_3[1].split ( " QGval=" )
-                acquisition_cycle = split_4[0]
-                split_5 = split_4[1].split ( "  ph=" )
-                acquisition_queensgate_value = split_5[0]
-                split_6 = split_5[1].split ( "  fr=" )
-                acquisition_photon_count = split_6[0]
-                acquisition_fr = split_6[1]
-
-                next_line = adt.readline ( )
-                split_1 = next_line.split ( "Cumulated exp=" )
-                split_2 = split_1[1].split ( "  phot=" )
-                acquisition_cumulated_exposure = split_2[0]
-                split_3 = split_2[1].split ( " efficiency=" )
-                acquisition_cumulated_photons = split_3[0]
-                split_4 = split_3[1].split ( " %  disk=" )
-                acquisition_efficiency = split_4[0]
-                split_5 = split_4[1].split ( " Mb" )
-                acquisition_disk_usage = split_5[1]
-
-                next_line = adt.readline ( )
-                split_1 = next_line.split ( "THT=" )
-                split_2 = split_1[1].split ( "v  shutter=" )
-                acquisition_THT = split_2[0]
-                split_3 = split_2[1].split ( "  discri=" )
-                acquisition_shutter = split_3[0]
-                split_4 = split_3[1].split ( " BlackLevel=" )
-                acquisition_discri = split_4[0]
-                split_5 = split_4[1].split ( " Whitelevel=" )
-                acquisition_blacklevel = split_5[0]
-                acquisition_whitelevel = split_5[1]
-
-                cycle = int ( acquisition_cycle.strip ( ) )
-                if cycle in cycle_parameters.keys ( ):
-                    old_parameters_dict = cycle_parameters [ cycle ]
-                    #self.log.debug ( "debug: old_parameters_dict == %s" % str ( old_parameters_dict ) )
-                    adt_parameters_dict = { }
-                    adt_parameters_dict["cycle"]              = cycle
-                    adt_parameters_dict["channel"]            = old_parameters_dict["channel"] + \
-                                                                [ int ( acquisition_channel.strip ( ) ) ]
-                    adt_parameters_dict["start time"]         = old_parameters_dict["start time"] + \
-                                                                [ acquisition_start_time.strip ( ) ]
-                    adt_parameters_dict["end time"]           = old_parameters_dict["end time"] + \
-                                                                [ acquisition_end_time.strip ( ) ]
-                    adt_parameters_dict["Queensgate value"]   = old_parameters_dict["Queensgate value"] + \
-                                                                [ int ( acquisition_queensgate_value.strip ( ) ) ]
-                    adt_parameters_dict["photon count"]       = old_parameters_dict["photon count"] + \
-                                                                [ int ( acquisition_photon_count.strip ( ) ) ]
-                    adt_parameters_dict["fr"]                 = old_parameters_dict["fr"] + \
-                                                                [ int ( acquisition_fr.strip ( ) ) ]
-                    adt_parameters_dict["cumulated exposure"] = old_parameters_dict["cumulated exposure"] + \
-                                                                [ acquisition_cumulated_exposure.strip ( ) ]
-                    adt_parameters_dict["cumulated photons"]  = old_parameters_dict["cumulated photons"] + \
-                                                                [ int ( acquisition_cumulated_photons.strip ( ) ) ]
-                    adt_parameters_dict["efficiency"]         = old_parameters_dict [ "efficiency" ] +\
-                                                                [ int ( acquisition_efficiency.strip ( ) ) ]
-                    adt_parameters_dict["disk usage"]         = old_parameters_dict["disk usage"] + \
-                                                                [ acquisition_disk_usage.strip ( ) ]
-                    adt_parameters_dict["THT"]                = old_parameters_dict["THT"] + \
-                                                                [ int ( acquisition_THT.strip ( ) ) ]
-                    adt_parameters_dict["shutter"]            = old_parameters_dict["shutter"] + \
-                                                                [ acquisition_shutter.strip ( ) ]
-                    adt_parameters_dict["discri"]             = old_parameters_dict["discri"] + \
-                                                                [ int ( acquisition_discri.strip ( ) ) ]
-                    adt_parameters_dict["blacklevel"]         = old_parameters_dict["blacklevel"] + \
-                                                                [ int ( acquisition_blacklevel.strip ( ) ) ]
-                    adt_parameters_dict["whitelevel"]         = old_parameters_dict["whitelevel"] + \
-                                                                [ int ( acquisition_whitelevel.strip ( ) ) ]
-                    #self.log.debug ( "debug: adt_parameters_dict == %s" % str ( adt_parameters_dict ) )
-                    cycle_parameters [ cycle ] = adt_parameters_dict
-                else:
-                    adt_parameters_dict = { }
-                    adt_parameters_dict["cycle"]              = cycle
-                    adt_parameters_dict["channel"]            = [ int ( acquisition_channel.strip ( ) ) ]
-                    adt_parameters_dict["start time"]         = [ acquisition_start_time.strip ( ) ]
-                    adt_parameters_dict["end time"]           = [ acquisition_end_time.strip ( ) ]
-                    adt_parameters_dict["Queensgate value"]   = [ int ( acquisition_queensgate_value.strip ( ) ) ]
-                    adt_parameters_dict["photon count"]       = [ int ( acquisition_photon_count.strip ( ) ) ]
-                    adt_parameters_dict["fr"]                 = [ int ( acquisition_fr.strip ( ) ) ] 
-                    adt_parameters_dict["cumulated exposure"] = [ acquisition_cumulated_exposure.strip ( ) ]
-                    adt_parameters_dict["cumulated photons"]  = [ int ( acquisition_cumulated_photons.strip ( ) ) ]
-                    adt_parameters_dict["efficiency"]         = [ int ( acquisition_efficiency.strip ( ) ) ]
-                    adt_parameters_dict["disk usage"]         = [ acquisition_disk_usage.strip ( ) ]
-                    adt_parameters_dict["THT"]                = [ int ( acquisition_THT.strip ( ) ) ]
-                    adt_parameters_dict["shutter"]            = [ acquisition_shutter.strip ( ) ]
-                    adt_parameters_dict["discri"]             = [ int ( acquisition_discri.strip ( ) ) ]
-                    adt_parameters_dict["blacklevel"]         = [ int ( acquisition_blacklevel.strip ( ) ) ]
-                    adt_parameters_dict["whitelevel"]         = [ int ( acquisition_whitelevel.strip ( ) ) ]
-                    cycle_parameters[cycle] = adt_parameters_dict
-
-        parameters = [ "channel",
-                       "start time",
-                       "end time",
-                       "Queensgate value",
-                       "photon count",
-                       "fr",
-                       "cumulated exposure",
-                       "cumulated photons",
-                       "efficiency",
-                       "disk usage",
-                       "THT",
-                       "shutter",
-                       "discri",
-                       "blacklevel",
-                       "whitelevel" ]
-
-        for parameter in parameters:
-            parameter_ordered_list = [ ]
-            for cycle in cycle_parameters.keys ( ):
-                parameter_ordered_list += cycle_parameters [ cycle ] [ parameter ]
-            adt_parameters_dict = { }
-            l_elements = [ parameter, parameter_ordered_list, "" ]
-            adt_parameters [ parameter ] = l_elements
-
-            self.__metadata [ parameter ] = ( parameter_ordered_list, "" )
-            #self.log.debug ( "self.__metadata = %s" % ( str ( self.__metadata ) ) )
+        self.__adt_header, records = parse_adt ( self.__file_name )
+        for parameter in records.keys ( ):
+            self.__metadata [ parameter ] = ( records [ parameter ], "" )
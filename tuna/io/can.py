@@ -1,11 +1,13 @@
 """
 This module's scope covers operations related to the can file format.
 
-The Tuna can is a image and metadata file format. It consists of a serializable object (instantiated from the tuna.io.can.can class), where convenience methods (such as algebraic procedures on its arrays) are defined.
+The Tuna can is a image and metadata file format. It consists of a serializable object (instantiated from the tuna.io.can.can class), where convenience methods (such as algebraic procedures on its arrays) are defined. Cans are stored on disk as .can files, whose format is described in tuna.io.can_file.
 """
 
 from .adhoc import adhoc
 from .adhoc_ada import ada
+from .can_file import can_file
+from .chunked_file import chunked_file
 from .file_reader import file_reader
 from .fits import fits
 
@@ -38,7 +40,10 @@ class can ( file_reader ):
         The wavelength, in Angstroms, of the observed light on the data.
 
     * photons : dictionary : defaults to None
-        A dictionary containing the description of each photon count on the data.
+        A columnar photon table, as described in convert_ndarray_into_table ( ), containing the description of each photon count on the data.
+
+    * transient : bool : defaults to False
+        If True, the can is a throwaway intermediate result, and is never recorded in the database. Results of can arithmetic are transient.
 
 
     The Tuna can is the preferred internal format for Tuna. Therefore, when most modules are used, they return their result in a can.
@@ -51,6 +56,11 @@ class can ( file_reader ):
         Out[3]: tuna.io.can.can
         raw2 = raw + raw
         raw_copy = raw2 - raw
+        raw2 -= raw
+        raw2 *= 0.5
+        first_planes = raw [ 0 : 2 ]
+        mirrored = raw.fliplr ( view = True )
+        independent = raw.copy ( )
         raw.flipud ( )
         raw.fliplr ( )
         raw.convert_ndarray_into_table ( )    
@@ -61,12 +71,26 @@ class can ( file_reader ):
                    file_name = None,
                    interference_order = None,
                    interference_reference_wavelength = None,
-                   photons = None ):
+                   photons = None,
+                   transient = False ):
         super ( can, self ).__init__ ( )
         self.log = logging.getLogger ( __name__ )
         self.log.setLevel ( logging.INFO )
-        self.__version__ = "0.1.5"
+        self.__version__ = "0.8.5"
         self.changelog = {
+            "0.8.5" : "Tuna 0.16.4 : in-place operators replace the array by a promoted copy when the result cannot be stored in the array's type, such as integer cubes divided or scaled by floats.",
+            "0.8.4" : "Tuna 0.16.4 : memory-mapped ADHOC files are left untouched until the can's array is first accessed.",
+            "0.8.3" : "Tuna 0.16.4 : the digest used by the database refresh is computed on the caller's thread, so that in-place changes cannot race with it.",
+            "0.8.2" : "Tuna 0.16.4 : the database is only updated after tuna.start_daemons ( ).",
+            "0.8.1" : "Tuna 0.16.4 : precision parameter for reading .ADT acquisitions.",
+            "0.8.0" : "Tuna 0.16.4 : in-place and scalar arithmetic, views (indexing, transpose, flips) sharing memory with their parent can, explicit copy ( ). Flips keep the array's dtype.",
+            "0.7.1" : "Tuna 0.16.4 : memmap also applies to FITS files.",
+            "0.7.0" : "Tuna 0.16.4 : database refresh runs on the database thread; added transient cans.",
+            "0.6.0" : "Tuna 0.16.4 : cached per-plane digests, explicit digest invalidation.",
+            "0.5.0" : "Tuna 0.16.4 : lazy reading of .can and .canz files; array, digest and dtype are properties, with the digest computed on demand.",
+            "0.4.0" : "Tuna 0.16.4 : read chunked .canz files.",
+            "0.3.0" : "Tuna 0.16.4 : read .can files, optionally memory-mapped.",
+            "0.2.0" : "Tuna 0.16.4 : sparse, columnar photon table, with vectorized conversions.",
             "0.1.5" : "Tuna 0.14.0 : improved docstrings.",
             "0.1.4" : "Updated docstring to new documentation style.",
             "0.1.3" : "Docstrings added.",
@@ -75,13 +99,20 @@ class can ( file_reader ):
             "0.1.0" : "Initial changelogged version."
             }
 
+        self.__array = None
+        self.__digest = None
+        self.__plane_digests = None
+        self.__loader = None
+        self.__lazy_dtype = None
+        self.__lazy_shape = None
+
         self.array = array
         self.file_name = file_name
         self.interference_order = interference_order
         self.interference_reference_wavelength = interference_reference_wavelength
         self.photons = photons
+        self.transient = transient
 
-        self.digest = None
         self.file_type = None
         self.ndim = None
         self.shape = None
@@ -91,68 +122,134 @@ class can ( file_reader ):
         self.metadata = None
         self.update ( )
 
+    @property
+    def array ( self ):
+        """
+        The can's data, as a numpy.ndarray. For a lazy can (see read ( )), the array is read from the file on first access.
+        """
+        if self.__array is None and self.__loader is not None:
+            loader = self.__loader
+            self.__loader = None
+            self.log.debug ( "Materializing lazy can from {}.".format ( self.file_name ) )
+            self.__array = loader ( )
+        return self.__array
+
+    @array.setter
+    def array ( self, array ):
+        self.__array = array
+        self.__loader = None
+        self.invalidate_digest ( )
+
+    @property
+    def digest ( self ):
+        """
+        The SHA1 digest of the can's array, as a string of hexadecimal digits. It is computed on first access and cached until the array is replaced, or until invalidate_digest ( ) is called.
+        """
+        if self.__digest is None and isinstance ( self.array, numpy.ndarray ):
+            self.__digest = tuna.tools.get_hash_from_array ( self.array )
+        return self.__digest
+
+    @digest.setter
+    def digest ( self, digest ):
+        self.__digest = digest
+
+    @property
+    def dtype ( self ):
+        """
+        The numpy.dtype of the can's array, or None for an empty can. For a lazy can, it is known without reading the array.
+        """
+        if self.__array is None and self.__loader is not None:
+            return self.__lazy_dtype
+        if isinstance ( self.__array, numpy.ndarray ):
+            return self.__array.dtype
+        return None
+
     def __add__ ( self, summand ):
         self.log.debug ( tuna.log.function_header ( ) )
 
-        sum_array = self.array + summand.array
-        result = can ( array = sum_array )
+        sum_array = self.array + self._operand ( summand )
+        result = can ( array = sum_array, transient = True )
         return result
 
+    def __getitem__ ( self, key ):
+        """
+        This method's goal is to index the can's array, as numpy does, into a new transient can.
+
+        Basic indexing (integers and slices) returns a can whose array is a view of this can's array: no data is copied, and changes to one are seen by the other. Advanced indexing (lists, arrays of indexes, masks) returns a can with a copy of the selected data, as numpy does.
+        """
+        return self._derived ( self.array [ key ] )
+
+    def __iadd__ ( self, summand ):
+        self.log.debug ( tuna.log.function_header ( ) )
+
+        self._in_place ( numpy.add, summand )
+        return self
+
+    def __imul__ ( self, factor ):
+        self.log.debug ( tuna.log.function_header ( ) )
+
+        self._in_place ( numpy.multiply, factor )
+        return self
+
+    def __isub__ ( self, subtrahend ):
+        self.log.debug ( tuna.log.function_header ( ) )
+
+        self._in_place ( numpy.subtract, subtrahend )
+        return self
+
+    def __itruediv__ ( self, divisor ):
+        self.log.debug ( tuna.log.function_header ( ) )
+
+        self._in_place ( numpy.true_divide, divisor )
+        return self
+
+    def __mul__ ( self, factor ):
+        self.log.debug ( tuna.log.function_header ( ) )
+
+        return can ( array = self.array * self._operand ( factor ), transient = True )
+
     def __sub__ ( self, subtrahend ):
         self.log.debug ( tuna.log.function_header ( ) )
 
-        subtraction_array = self.array - subtrahend.array
-        result = can ( array = subtraction_array )
+        subtraction_array = self.array - self._operand ( subtrahend )
+        result = can ( array = subtraction_array, transient = True )
         return result
 
+    def __truediv__ ( self, divisor ):
+        self.log.debug ( tuna.log.function_header ( ) )
+
+        return can ( array = self.array / self._operand ( divisor ), transient = True )
+
+    __radd__ = __add__
+    __rmul__ = __mul__
+
     def convert_ndarray_into_table ( self ):
         """
         This method's goal is to convert a numpy.ndarray into a photon table, where the value contained in the array, for each voxel, is considered as a photon count. 
-        
-        The result is saved in self.photons, which has the following structure (example)::
-
-            self.photons = [ 
-                { 'channel' : 10,
-                  'row'     : 128,
-                  'col'     : 1,
-                  'photons' : 1024 },
-                { 'channel' : 11,
-                  'row'     : 128,
-                  'col'     : 1,
-                  'photons' : 700 },
-                ...
-                { 'channel' : 30,
-                  'row'     : 128,
-                  'col'     : 128,
-                  'photons' : 0 } ]
+
+        The table is sparse and columnar: it only has entries for the voxels with non-zero values, and each column is a numpy.ndarray. Channels are numbered from 1. The result is saved in self.photons, which has the following structure (example)::
+
+            self.photons = { 
+                'channel' : numpy.array ( [   10,  11, ...,  30 ] ),
+                'row'     : numpy.array ( [  128, 128, ..., 128 ] ),
+                'col'     : numpy.array ( [    1,   1, ..., 127 ] ),
+                'photons' : numpy.array ( [ 1024, 700, ...,   3 ] ) }
 
         """
         self.log.debug ( tuna.log.function_header ( ) )
 
         start = time.time ( )
 
-        photons = [ ]
-        self.log.debug ( "Parsing image into photon table 0% done." )
-        last_percentage_logged = 0
-        for plane in range ( self.planes ):
-            percentage = 10 * int ( plane / self.planes * 10 )
-            if percentage > last_percentage_logged:
-                self.log.debug ( "Parsing image into photon table %d%% done." % ( percentage ) )
-                last_percentage_logged = percentage
-            for row in range ( self.rows ):
-                for col in range ( self.cols ):
-                    photon = { }
-                    photon [ 'channel' ] = plane + 1
-                    photon [ 'row'     ] = row
-                    photon [ 'col'     ] = col
-                    if self.ndim == 3:
-                        photon [ 'photons' ] = self.array [ plane ] [ row ] [ col ]
-                    elif self.ndim == 2:
-                        photon [ 'photons' ] = self.array [ row ] [ col ]
-                    photons.append ( photon )
-        self.log.debug ( "info: parsing image into photon table 100% done." )
+        if self.ndim == 2:
+            array = self.array [ numpy.newaxis ]
+        else:
+            array = self.array
+        planes, rows, cols = numpy.nonzero ( array )
+        self.photons = { 'channel' : ( planes + 1 ).astype ( numpy.int32 ),
+                         'row'     : rows.astype ( numpy.int32 ),
+                         'col'     : cols.astype ( numpy.int32 ),
+                         'photons' : array [ planes, rows, cols ] }
 
-        self.photons = photons
         self.log.debug ( "debug: convert_ndarray_into_table() took %ds." % ( time.time ( ) - start ) )
 
     def convert_table_into_ndarray ( self ):
@@ -163,33 +260,65 @@ class can ( file_reader ):
         """
         self.log.debug ( tuna.log.function_header ( ) )
 
-        planes = 0
-        rows = 0
-        cols = 0
-        for photon in self.photon:
-            planes = max ( planes, photon [ 'channel' ] + 1 )
-            rows   = max ( rows,   photon [ 'row'     ] )
-            cols   = max ( cols,   photon [ 'col'     ] )
+        planes = numpy.asarray ( self.photons [ 'channel' ], dtype = numpy.intp ) - 1
+        rows   = numpy.asarray ( self.photons [ 'row'     ], dtype = numpy.intp )
+        cols   = numpy.asarray ( self.photons [ 'col'     ], dtype = numpy.intp )
+        if planes.size == 0:
+            shape = ( 0, 0, 0 )
+        else:
+            shape = ( int ( planes.max ( ) ) + 1, 
+                      int ( rows.max ( ) ) + 1, 
+                      int ( cols.max ( ) ) + 1 )
         self.ndim = 3
-        self.planes = planes
-        self.rows = rows
-        self.cols = cols
-        self.shape = ( planes, rows, cols )
+        self.planes, self.rows, self.cols = shape
+        self.shape = shape
 
         array = numpy.zeros ( shape = self.shape )
-        
-        for photon in self.photons:
-            array [ photon [ 'channel ' ] - 1 ] [ photon [ 'row' ] ] [ photon [ 'col' ] ] = photon [ 'photons' ]
+        numpy.add.at ( array, ( planes, rows, cols ), self.photons [ 'photons' ] )
         
         self.array = array
 
-    def _database_refresh ( self ):
+    def copy ( self ):
+        """
+        This method's goal is to create an independent copy of this can: the new can has its own copy of the array and photon table, and changes to one are not seen by the other.
+
+        Returns:
+
+        * unnamed variable : can
+            A transient can, unless this can is not transient.
+        """
+        self.log.debug ( tuna.log.function_header ( ) )
+
+        photons = None
+        if self.photons is not None:
+            photons = { key : numpy.array ( self.photons [ key ] ) for key in self.photons.keys ( ) }
+        array = None
+        if isinstance ( self.array, numpy.ndarray ):
+            array = numpy.array ( self.array )
+        result = can ( array = array,
+                       interference_order = self.interference_order,
+                       interference_reference_wavelength = self.interference_reference_wavelength,
+                       photons = photons,
+                       transient = self.transient )
+        result.file_type = self.file_type
+        return result
+
+    def _database_refresh ( self, digest, file_name, file_type ):
         """
         Supposing both the can and the db connection are fine, check if there is an entry on db about this can's array, and create / update it as appropriate.
+
+        This is called on the database thread (see update ( )), so the database lookup does not block the can's user. The digest, file name and file type are taken by update ( ) on the caller's thread: the can may be modified in place while the refresh is queued, and a digest computed here could then describe the old, or half-modified, contents.
+
+        Parameters:
+
+        * digest : string
+            The digest of the can's array, when the refresh was requested.
+
+        * file_name : string
+
+        * file_type : string
         """
-        if not self.digest:
-            self.digest = tuna.tools.get_hash_from_array ( self.array )
-        records, sql_success = tuna.db.select_record ( 'datasets', { 'hash' : self.digest } )
+        records, sql_success = tuna.db.select_record ( 'datasets', { 'hash' : digest } )
         if not sql_success:
             self.log.debug ( "At database_refresh sql_success == False." )
             return
@@ -198,36 +327,82 @@ class can ( file_reader ):
             record = records [ 0 ]
             
         function = tuna.db.insert_record
-        file_name = self.file_name
-        file_type = self.file_type
         if record:
             self.log.debug ( "Can is already on db." )
             function = tuna.db.update_record
             if ( record [ 'file_name' ] != "None" and
-                 self.file_name == None ):
+                 file_name == None ):
                 file_name = record [ 'file_name' ]
                 file_type = record [ 'file_type' ]
-        function ( 'datasets', { 'hash'      : self.digest,
+        function ( 'datasets', { 'hash'      : digest,
                                  'file_name' : file_name,
                                  'file_type' : file_type } )
 
-    def fliplr ( self ):
+    def _derived ( self, array ):
+        """
+        This method's goal is to wrap an array derived from this can's array (typically a view) in a new transient can, with this can's interference parameters.
+        """
+        return can ( array = array,
+                     interference_order = self.interference_order,
+                     interference_reference_wavelength = self.interference_reference_wavelength,
+                     transient = True )
+
+    def fliplr ( self, view = False ):
+        """
+        This method's goal is to flip the can's data from left to right (the rightmost column becomes the leftmost one). This is applied to each plane of a cube, or the single plane of a planar image.
+
+        The flipped array is a view of the current array: no data is copied, and the dtype is kept.
+
+        Parameters:
+
+        * view : bool : defaults to False
+            If False, this can's array is replaced by its flipped view. If True, this can is left unchanged, and a new transient can, sharing memory with this one, is returned.
+
+        Returns:
+
+        * unnamed variable : can
+            The flipped can when view is True; None otherwise.
         """
-        This method's goal is to wrap around numpy.fliplr, which flips a 2D array from left to right (the rightmost column becomes the leftmost one). This is applied to each plane of a cube, or the single plane of a planar image.
+        flipped = self.array [ ..., : : -1 ]
+        if view:
+            return self._derived ( flipped )
+        self.array = flipped
+
+    def flipud ( self, view = False ):
         """
-        result = numpy.ndarray ( shape = self.array.shape )
-        for plane in range ( self.array.shape [ 0 ] ):
-            result [ plane ] = numpy.fliplr ( self.array [ plane ] )
-        self.array = result
+        This method's goal is to flip the can's data from up to down (the last line becomes the first). This is applied to each plane of a cube, or the single plane of a planar image.
+
+        The flipped array is a view of the current array: no data is copied, and the dtype is kept.
 
-    def flipud ( self ):
+        Parameters:
+
+        * view : bool : defaults to False
+            If False, this can's array is replaced by its flipped view. If True, this can is left unchanged, and a new transient can, sharing memory with this one, is returned.
+
+        Returns:
+
+        * unnamed variable : can
+            The flipped can when view is True; None otherwise.
         """
-        This method's goal is to wrap around numpy.flipud, which flips a 2D array from up to down (the last line becomes the first). This is applied to each plane of a cube, or the single plane of a planar image.
+        flipped = self.array [ ..., : : -1, : ]
+        if view:
+            return self._derived ( flipped )
+        self.array = flipped
+
+    def get_plane_digests ( self ):
         """
-        result = numpy.ndarray ( shape = self.array.shape )
-        for plane in range ( self.array.shape [ 0 ] ):
-            result [ plane ] = numpy.flipud ( self.array [ plane ] )
-        self.array = result
+        This method's goal is to access the SHA1 digest of each plane of the can's array. Comparing the plane digests of two cans locates the planes that differ between them.
+
+        The digests are computed on first call, and cached until the array is replaced, or until invalidate_digest ( ) is called.
+
+        Returns:
+
+        * unnamed variable : list of strings
+            The digest of each plane, in plane order; None for an empty can.
+        """
+        if self.__plane_digests is None and isinstance ( self.array, numpy.ndarray ):
+            self.__plane_digests = tuna.tools.get_plane_hashes_from_array ( self.array )
+        return self.__plane_digests
 
     def info ( self ):
         """
@@ -244,10 +419,84 @@ class can ( file_reader ):
         self.log.info ( "interference_order = %s" % str ( self.interference_order ) )
         self.log.info ( "interference_reference_wavelength = %s" % str ( self.interference_reference_wavelength ) )
 
-    def read ( self ):
+    def invalidate_digest ( self ):
+        """
+        This method's goal is to discard the cached digests of the can. It is called whenever the can's array is replaced, and by the in-place operators; it must be called after modifying the contents of can.array directly. Views (see __getitem__ ( ), transpose ( ) and the flips) share memory with their parent: after modifying one of them, the digests of the others must be invalidated too.
+        """
+        self.__digest = None
+        self.__plane_digests = None
+
+    def is_loaded ( self ):
+        """
+        This method's goal is to inform whether the can's array is in memory (or memory-mapped).
+
+        Returns:
+
+        * unnamed variable : bool
+            False for a lazy can whose array has not been accessed yet, True otherwise.
+        """
+        return self.__loader is None
+
+    def _set_lazy ( self, shape, dtype, loader ):
+        """
+        This method's goal is to turn this can into a lazy can: its geometry is taken from the given shape and dtype, and its array will be obtained by calling loader on first access.
+
+        Parameters:
+
+        * shape : tuple of integers
+
+        * dtype : numpy.dtype
+
+        * loader : callable
+            Takes no arguments and returns a numpy.ndarray with the given shape and dtype.
+        """
+        self.__array = None
+        self.invalidate_digest ( )
+        self.__loader = loader
+        self.__lazy_dtype = dtype
+        self.__lazy_shape = tuple ( shape )
+
+    def _in_place ( self, ufunc, value ):
+        """
+        This method's goal is to apply an arithmetic ufunc to the can's array and an operand, storing the result in the can's array, for the in-place operators.
+
+        When the result's type cannot be stored in the array's type (for example, an integer cube divided by 2, or multiplied by 0.5), the array is replaced by the result, with the promoted type; views of the can then no longer share its memory.
+        """
+        operand = self._operand ( value )
+        try:
+            ufunc ( self.array, operand, out = self.array )
+        except TypeError:
+            self.log.debug ( "{} result cannot be cast to {}, replacing the array.".format ( ufunc.__name__,
+                                                                                            self.array.dtype ) )
+            self.array = ufunc ( self.array, operand )
+        self.invalidate_digest ( )
+
+    def _operand ( self, value ):
+        """
+        This method's goal is to obtain the array of a can, or any other operand (a scalar or a numpy.ndarray) unchanged, for the arithmetic operators.
+        """
+        if isinstance ( value, can ):
+            return value.array
+        return value
+
+    def read ( self, memmap = False, processes = 1, lazy = False, precision = None ):
         """
         This method's goal is to read a file content's into a can. 
-        Will sequentially attempt to read the file as an .ADT, .fits, .AD2 and .AD3 formatted file. The first attempt to succeed is used.
+        Will sequentially attempt to read the file as an .ADT, .fits, .AD2, .AD3, .can and .canz formatted file. The first attempt to succeed is used.
+
+        Parameters:
+
+        * memmap : bool : defaults to False
+            If True, .AD2, .AD3 and .can files are memory-mapped instead of read into memory (see tuna.io.fits, tuna.io.adhoc and tuna.io.can_file). A memory-mapped ADHOC file is opened as a lazy can: its "no data" values are replaced by numpy.nan when self.array is first accessed.
+
+        * processes : integer : defaults to 1
+            The number of worker processes used to read the photon files of an .ADT acquisition (see tuna.io.adhoc_ada).
+
+        * lazy : bool : defaults to False
+            If True, .can and .canz files are opened by reading their header only: shape, dtype and metadata are available immediately, and the array is read on first access to self.array. Lazy cans are not looked up in the database when opened; call update ( ) to do so. Other formats are always read immediately.
+
+        * precision : string : defaults to None
+            Overrides the precision policy (see tuna.tools.precision) for the photon counts cube of an .ADT acquisition. Other formats keep the type stored in the file.
         """
         self.log.debug ( tuna.log.function_header ( ) )
 
@@ -257,7 +506,7 @@ class can ( file_reader ):
         if self.file_name:
             if ( self.file_name.startswith ( ".ADT", -4 ) or
                  self.file_name.startswith ( ".adt", -4 ) ):
-                ada_object = ada ( file_name = self.file_name )
+                ada_object = ada ( file_name = self.file_name, processes = processes, precision = precision )
                 ada_object.read ( )
                 self.array = ada_object.get_array ( )
                 self.metadata = ada_object.get_metadata ( )
@@ -267,7 +516,7 @@ class can ( file_reader ):
                 
             elif ( self.file_name.startswith ( ".fits", -5 ) or
                    self.file_name.startswith ( ".FITS", -5 ) ):
-                fits_object = fits ( file_name = self.file_name )
+                fits_object = fits ( file_name = self.file_name, memmap = memmap )
                 fits_object.read ( )
                 self.array = fits_object.get_array ( )
                 self.metadata = fits_object.get_metadata ( )
@@ -278,21 +527,106 @@ class can ( file_reader ):
                    self.file_name.startswith ( ".AD2", -4 ) or
                    self.file_name.startswith ( ".ad3", -4 ) or
                    self.file_name.startswith ( ".AD3", -4 ) ):
-                adhoc_object = adhoc ( file_name = self.file_name )
+                adhoc_object = adhoc ( file_name = self.file_name, memmap = memmap )
                 adhoc_object.read ( )
-                self.array = adhoc_object.get_array ( )
+                mapped = adhoc_object.get_array ( )
+                if memmap and isinstance ( mapped, numpy.ndarray ):
+                    self._set_lazy ( mapped.shape,
+                                     mapped.dtype,
+                                     lambda: self._apply_sentinel ( adhoc_object ) )
+                else:
+                    self.array = mapped
                 #self.metadata = adhoc_object.__trailer
                 self.file_type = "ada"
                 self.update ( )
 
+            elif ( self.file_name.startswith ( ".can", -4 ) or
+                   self.file_name.startswith ( ".CAN", -4 ) ):
+                can_file_object = can_file ( file_name = self.file_name )
+                if lazy:
+                    can_file_object.read_header ( )
+                    self._set_lazy ( can_file_object.get_shape ( ),
+                                     can_file_object.get_dtype ( ),
+                                     lambda: self._read_array ( can_file_object, memmap ) )
+                else:
+                    can_file_object.read ( memmap = memmap )
+                    self.array = can_file_object.get_array ( )
+                self.metadata = can_file_object.get_metadata ( )
+                self.interference_order = can_file_object.get_interference_order ( )
+                self.interference_reference_wavelength = can_file_object.get_interference_reference_wavelength ( )
+                self.file_type = "can"
+                self.update ( )
+
+            elif ( self.file_name.startswith ( ".canz", -5 ) or
+                   self.file_name.startswith ( ".CANZ", -5 ) ):
+                chunked_file_object = chunked_file ( file_name = self.file_name )
+                if lazy:
+                    chunked_file_object.read_header ( )
+                    self._set_lazy ( chunked_file_object.get_shape ( ),
+                                     chunked_file_object.get_dtype ( ),
+                                     chunked_file_object.get_region )
+                else:
+                    chunked_file_object.read ( )
+                    self.array = chunked_file_object.get_array ( )
+                self.metadata = chunked_file_object.get_metadata ( )
+                self.interference_order = chunked_file_object.get_interference_order ( )
+                self.interference_reference_wavelength = chunked_file_object.get_interference_reference_wavelength ( )
+                self.file_type = "canz"
+                self.update ( )
+
         self.log.debug ( "After attempting to read file, " + tuna.io.system.status ( ) )
 
+    def _apply_sentinel ( self, adhoc_object ):
+        """
+        This method's goal is to obtain the array of a memory-mapped ADHOC file, with its "no data" values replaced by numpy.nan, when it is first accessed.
+        """
+        adhoc_object.apply_sentinel ( )
+        return adhoc_object.get_array ( )
+
+    def _read_array ( self, can_file_object, memmap ):
+        """
+        This method's goal is to read the array of a lazy .can file, when it is first accessed.
+        """
+        can_file_object.read ( memmap = memmap )
+        return can_file_object.get_array ( )
+
+    def transpose ( self, *axes ):
+        """
+        This method's goal is to permute the axes of the can's array, as numpy.transpose does, into a new transient can whose array is a view of this can's array.
+
+        Parameters:
+
+        * axes : integers
+            The permutation of the axes; if omitted, the axes are reversed.
+
+        Returns:
+
+        * unnamed variable : can
+        """
+        if len ( axes ) == 0:
+            axes = None
+        return self._derived ( numpy.transpose ( self.array, axes ) )
+
     def update ( self ):
         """
         This method's goal is to clears current metadata, and regenerate this information based on the current contents of the can's array and photon table.
+
+        Unless the can is transient, it also schedules a refresh of the can's database record, which is run on the database thread.
+
+        For a lazy can whose array has not been read yet, the geometry is taken from the file's header, and the array is neither read nor looked up in the database.
         """
         self.log.debug ( tuna.log.function_header ( ) )
 
+        if not self.is_loaded ( ):
+            self.ndim = len ( self.__lazy_shape )
+            self.shape = self.__lazy_shape
+            if self.ndim == 3:
+                self.planes, self.rows, self.cols = self.shape
+            elif self.ndim == 2:
+                self.planes = 1
+                self.rows, self.cols = self.shape
+            return
+
         if ( ( not isinstance ( self.array, numpy.ndarray ) ) and
              self.photons == None ):
             self.log.debug ( "Empty Tuna can." )
@@ -323,4 +657,6 @@ class can ( file_reader ):
              self.ndim > 3 ):
             self.log.warning ( "ndarray has either less than 2 or more than 3 dimensions." )
 
-        self._database_refresh ( )
+        if ( not self.transient and
+             tuna.db is not None ):
+            tuna.db.submit ( self._database_refresh, self.digest, self.file_name, self.file_type )
@@ -0,0 +1,283 @@
+"""
+This module's scope covers the native, binary file format of Tuna cans.
+
+A .can file has three sections:
+
+* a fixed-size preamble of 32 bytes, containing a magic string, the format version, the length of the metadata block and the offset of the array section, all little-endian;
+* a metadata block, encoded as UTF-8 JSON, describing the array's dtype and shape, the can's interference parameters and its metadata dictionary;
+* the array section, containing the raw bytes of the array in C order, starting at an offset aligned to can_file_alignment bytes, so that it can be opened with numpy.memmap.
+"""
+__version__ = "0.1.0"
+__changelog__ = {
+    "0.1.0" : { "Tuna" : "0.16.4", "Change" : "Initial version." }
+    }
+
+import json
+import logging
+import numpy
+import struct
+from tuna.io.file_reader import file_reader
+import tuna
+
+can_file_magic = b"TUNACAN\x00"
+can_file_version = 1
+can_file_alignment = 64
+can_file_preamble = struct.Struct ( "<8sIIQQ" )
+
+def _encode_json ( value ):
+    """
+    This function's goal is to convert values that the json module does not know how to serialize.
+
+    numpy.ndarray values are tagged with their dtype, so that _decode_json ( ) can restore them; numpy scalars are converted to the equivalent Python scalars; anything else is converted to a string.
+    """
+    if isinstance ( value, numpy.ndarray ):
+        return { "__ndarray__" : value.tolist ( ),
+                 "dtype"       : value.dtype.str }
+    if isinstance ( value, numpy.generic ):
+        return value.item ( )
+    if isinstance ( value, bytes ):
+        return value.decode ( "utf-8", "replace" )
+    return str ( value )
+
+def _decode_json ( entry ):
+    """
+    This function's goal is to restore the numpy.ndarray values tagged by _encode_json ( ).
+    """
+    if "__ndarray__" in entry:
+        return numpy.array ( entry [ "__ndarray__" ], dtype = entry [ "dtype" ] )
+    return entry
+
+class can_file ( file_reader ):
+    """
+    This class' responsibility is to read and write .can files.
+
+    Its constructor signature is:
+
+    Parameters:
+
+    * array : numpy.ndarray : defaults to None
+        Contains the data to be written to a file.
+
+    * file_name : string : defaults to None
+        Contains the full location of a file to be read, or to be written to.
+
+    * metadata : dictionary : defaults to None
+        Contains the metadata to be written, or the metadata read from a file. Entries are stored as key : ( value, comment ).
+
+    * interference_order : integer : defaults to None
+        The value of the interference order of the observed light on the data.
+
+    * interference_reference_wavelength : integer : defaults to None
+        The wavelength, in Angstroms, of the observed light on the data.
+
+    Example::
+
+        import tuna
+        import numpy
+
+        zeros_array = numpy.zeros ( shape = ( 3, 3, 3 ) )
+        zeros_file = tuna.io.can_file ( array = zeros_array, file_name = "zeros.can" )
+        zeros_file.write ( )
+        can_file = tuna.io.can_file ( file_name = "zeros.can" )
+        can_file.read ( memmap = True )
+        can_file.get_array ( )
+        can_file.get_metadata ( )
+    """
+    def __init__ ( self,
+                   array = None,
+                   file_name = None,
+                   metadata = None,
+                   interference_order = None,
+                   interference_reference_wavelength = None ):
+        super ( can_file, self ).__init__ ( )
+        self.log = logging.getLogger ( __name__ )
+
+        self.__array = array
+        self.__file_name = file_name
+        self.__metadata = metadata
+        self.__interference_order = interference_order
+        self.__interference_reference_wavelength = interference_reference_wavelength
+
+        self.__dtype = None
+        self.__shape = None
+        self.__data_offset = None
+
+    def get_array ( self ):
+        """
+        This method's goal is to access the current array in this object.
+
+        Returns:
+
+        * self.__array : numpy.ndarray
+            Contains the current data stored in this object's array.
+        """
+        return self.__array
+
+    def get_dtype ( self ):
+        """
+        This method's goal is to access the dtype of the array, as described in the file's header.
+
+        Returns:
+
+        * self.__dtype : numpy.dtype
+            None if no header has been read.
+        """
+        return self.__dtype
+
+    def get_interference_order ( self ):
+        """
+        This method's goal is to access the interference order stored in this object.
+
+        Returns:
+
+        * self.__interference_order : integer
+        """
+        return self.__interference_order
+
+    def get_interference_reference_wavelength ( self ):
+        """
+        This method's goal is to access the interference reference wavelength stored in this object.
+
+        Returns:
+
+        * self.__interference_reference_wavelength : integer
+        """
+        return self.__interference_reference_wavelength
+
+    def get_metadata ( self ):
+        """
+        This method's goal is to access the current metadata in this object.
+
+        Returns:
+
+        * self.__metadata : dictionary
+            Contains the current metadata stored in this object.
+        """
+        return self.__metadata
+
+    def get_shape ( self ):
+        """
+        This method's goal is to access the shape of the array, as described in the file's header.
+
+        Returns:
+
+        * self.__shape : tuple
+            None if no header has been read.
+        """
+        return self.__shape
+
+    def read ( self, memmap = False ):
+        """
+        This method's goal is to read the file specified in the constructor's file_name as a .can file.
+
+        Parameters:
+
+        * memmap : bool : defaults to False
+            If True, the array section is opened with numpy.memmap in copy-on-write mode, instead of being read into memory: changes to the array are never written back to the file.
+        """
+        self.log.debug ( tuna.log.function_header ( ) )
+
+        self.read_header ( )
+
+        count = int ( numpy.prod ( self.__shape, dtype = numpy.int64 ) )
+        if count == 0:
+            self.__array = numpy.zeros ( shape = self.__shape, dtype = self.__dtype )
+        elif memmap:
+            self.__array = numpy.memmap ( self.__file_name,
+                                          dtype = self.__dtype,
+                                          mode = 'c',
+                                          offset = self.__data_offset,
+                                          shape = self.__shape )
+        else:
+            with open ( self.__file_name, "rb" ) as can_stream:
+                can_stream.seek ( self.__data_offset )
+                self.__array = numpy.fromfile ( can_stream,
+                                                dtype = self.__dtype,
+                                                count = count ).reshape ( self.__shape )
+        self._is_readable = True
+
+    def read_header ( self ):
+        """
+        This method's goal is to read the preamble and the metadata block of the file specified in the constructor's file_name, without reading its array section.
+
+        After this method, the shape, dtype, metadata and interference parameters are available through this object's get methods.
+
+        Raises ValueError if the file is not a valid .can file, if its format version is newer than can_file_version, or if it is shorter than its header describes.
+        """
+        self.log.debug ( tuna.log.function_header ( ) )
+
+        with open ( self.__file_name, "rb" ) as can_stream:
+            preamble = can_stream.read ( can_file_preamble.size )
+            if len ( preamble ) != can_file_preamble.size:
+                raise ValueError ( "File {} is too short to be a .can file.".format ( self.__file_name ) )
+            magic, version, flags, metadata_length, data_offset = can_file_preamble.unpack ( preamble )
+            if magic != can_file_magic:
+                raise ValueError ( "File {} is not a .can file.".format ( self.__file_name ) )
+            if version > can_file_version:
+                raise ValueError ( "File {} has .can format version {}, newer than the supported version {}.".format (
+                    self.__file_name, version, can_file_version ) )
+            block = can_stream.read ( metadata_length )
+            if len ( block ) != metadata_length:
+                raise ValueError ( "File {} has a truncated metadata block.".format ( self.__file_name ) )
+            can_stream.seek ( 0, 2 )
+            file_size = can_stream.tell ( )
+
+        header = json.loads ( block.decode ( "utf-8" ), object_hook = _decode_json )
+        self.__dtype = numpy.dtype ( header [ "dtype" ] )
+        self.__shape = tuple ( header [ "shape" ] )
+        self.__data_offset = data_offset
+        self.__interference_order = header [ "interference_order" ]
+        self.__interference_reference_wavelength = header [ "interference_reference_wavelength" ]
+        if header [ "metadata" ] is None:
+            self.__metadata = None
+        else:
+            self.__metadata = { }
+            for key in header [ "metadata" ].keys ( ):
+                self.__metadata [ key ] = tuple ( header [ "metadata" ] [ key ] )
+
+        expected_size = data_offset + int ( numpy.prod ( self.__shape, dtype = numpy.int64 ) ) * self.__dtype.itemsize
+        if file_size < expected_size:
+            raise ValueError ( "File {} has {} bytes, but its header describes {} bytes.".format (
+                self.__file_name, file_size, expected_size ) )
+
+    def write ( self ):
+        """
+        This method's goal is to write the object's current array and metadata as a .can file named file_name. An existing file is overwritten.
+
+        The array is written from its own buffer when it is C-contiguous; otherwise a contiguous copy is written.
+        """
+        self.log.debug ( tuna.log.function_header ( ) )
+
+        array = numpy.ascontiguousarray ( self.__array )
+        if array.dtype.hasobject:
+            raise ValueError ( "Arrays of Python objects cannot be written as .can files." )
+
+        metadata = None
+        if self.__metadata is not None:
+            metadata = { }
+            for key in self.__metadata.keys ( ):
+                metadata [ str ( key ) ] = list ( self.__metadata [ key ] )
+        header = { "dtype"                             : array.dtype.str,
+                   "shape"                             : list ( array.shape ),
+                   "interference_order"                : self.__interference_order,
+                   "interference_reference_wavelength" : self.__interference_reference_wavelength,
+                   "metadata"                          : metadata }
+        block = json.dumps ( header, default = _encode_json ).encode ( "utf-8" )
+
+        header_size = can_file_preamble.size + len ( block )
+        data_offset = - ( - header_size // can_file_alignment ) * can_file_alignment
+        preamble = can_file_preamble.pack ( can_file_magic,
+                                            can_file_version,
+                                            0,
+                                            len ( block ),
+                                            data_offset )
+
+        with open ( self.__file_name, "wb" ) as can_stream:
+            can_stream.write ( preamble )
+            can_stream.write ( block )
+            can_stream.write ( b"\x00" * ( data_offset - header_size ) )
+            array.tofile ( can_stream )
+
+        self.__dtype = array.dtype
+        self.__shape = array.shape
+        self.__data_offset = data_offset
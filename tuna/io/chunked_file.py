@@ -0,0 +1,408 @@
+"""
+This module's scope covers the chunked, compressed file format for Tuna cubes.
+
+A .canz file stores each plane of a cube as a grid of tiles, each tile compressed independently with zlib. It has four sections:
+
+* a fixed-size preamble of 32 bytes, containing a magic string, the format version, the length of the metadata block and the offset of the chunk index, all little-endian;
+* a metadata block, encoded as UTF-8 JSON, describing the array's dtype and shape, the tile shape, the can's interference parameters and its metadata dictionary;
+* the compressed chunks, in plane order, and within a plane in row-major tile order;
+* the chunk index, an array of little-endian unsigned 64 bit ( offset, length ) pairs, one per chunk.
+
+Reading a plane, or a region of a cube, only decompresses the chunks that intersect it. Photon-counting cubes, which are mostly zeros, compress extremely well.
+"""
+__version__ = "0.2.0"
+__changelog__ = {
+    "0.2.0" : { "Tuna" : "0.16.4", "Change" : "Planes are written as tiles of default_tile_shape unless a tile shape is given. Added get_tile_shape ( )." },
+    "0.1.0" : { "Tuna" : "0.16.4", "Change" : "Initial version." }
+    }
+
+import json
+import logging
+import numpy
+import struct
+from tuna.io.can_file import ( _decode_json,
+                               _encode_json )
+from tuna.io.file_reader import file_reader
+import tuna
+import zlib
+
+chunked_file_magic = b"TUNACANZ"
+chunked_file_version = 1
+chunked_file_preamble = struct.Struct ( "<8sIIQQ" )
+
+default_tile_shape = ( 256, 256 )
+"""
+The ( rows, cols ) shape of the chunks written when no tile shape is given. Planes smaller than a tile are stored as a single chunk.
+"""
+
+def _tile_edges ( length, tile_length ):
+    """
+    This function's goal is to compute the boundaries of the tiles along one axis.
+
+    Returns:
+
+    * unnamed variable : list
+        Of ( start, end ) tuples.
+    """
+    return [ ( start, min ( start + tile_length, length ) ) for start in range ( 0, length, tile_length ) ]
+
+def _selected_range ( selection, length ):
+    """
+    This function's goal is to convert an axis selection (None, an integer or a slice with step 1) into a ( start, end ) pair.
+    """
+    if selection is None:
+        return 0, length
+    if isinstance ( selection, slice ):
+        start, end, step = selection.indices ( length )
+        if step != 1:
+            raise ValueError ( "Only slices with step 1 are supported." )
+        return start, max ( start, end )
+    selection = int ( selection )
+    if selection < 0:
+        selection += length
+    if selection < 0 or selection >= length:
+        raise IndexError ( "Index {} is out of bounds for an axis of length {}.".format ( selection, length ) )
+    return selection, selection + 1
+
+class chunked_file ( file_reader ):
+    """
+    This class' responsibility is to read and write .canz files.
+
+    Its constructor signature is:
+
+    Parameters:
+
+    * array : numpy.ndarray : defaults to None
+        Contains the data to be written to a file.
+
+    * file_name : string : defaults to None
+        Contains the full location of a file to be read, or to be written to.
+
+    * metadata : dictionary : defaults to None
+        Contains the metadata to be written, or the metadata read from a file. Entries are stored as key : ( value, comment ).
+
+    * interference_order : integer : defaults to None
+        The value of the interference order of the observed light on the data.
+
+    * interference_reference_wavelength : integer : defaults to None
+        The wavelength, in Angstroms, of the observed light on the data.
+
+    * tile_shape : tuple of 2 integers : defaults to None
+        The ( rows, cols ) shape of each chunk, when writing. If None, default_tile_shape is used.
+
+    * compression_level : integer : defaults to 6
+        The zlib compression level, from 0 (no compression) to 9, when writing.
+
+    Example::
+
+        import tuna
+
+        raw = tuna.io.read ( file_name = "tuna/tuna/test/unit/unit_io/G093/G093.ADT" )
+        tuna.io.write ( array = raw.array, file_name = "G093.canz", file_format = "canz" )
+
+        chunked = tuna.io.chunked_file ( file_name = "G093.canz" )
+        chunked.read_header ( )
+        chunked.get_plane ( 10 )
+        chunked.get_region ( planes = slice ( 0, 5 ), rows = slice ( 100, 200 ), cols = slice ( 100, 200 ) )
+    """
+    def __init__ ( self,
+                   array = None,
+                   file_name = None,
+                   metadata = None,
+                   interference_order = None,
+                   interference_reference_wavelength = None,
+                   tile_shape = None,
+                   compression_level = 6 ):
+        super ( chunked_file, self ).__init__ ( )
+        self.log = logging.getLogger ( __name__ )
+
+        self.__array = array
+        self.__file_name = file_name
+        self.__metadata = metadata
+        self.__interference_order = interference_order
+        self.__interference_reference_wavelength = interference_reference_wavelength
+        self.__tile_shape = tile_shape
+        self.__compression_level = compression_level
+
+        self.__dtype = None
+        self.__shape = None
+        self.__index = None
+
+    def get_array ( self ):
+        """
+        This method's goal is to access the current array in this object.
+
+        Returns:
+
+        * self.__array : numpy.ndarray
+            Contains the current data stored in this object's array.
+        """
+        return self.__array
+
+    def get_dtype ( self ):
+        """
+        This method's goal is to access the dtype of the array, as described in the file's header.
+
+        Returns:
+
+        * self.__dtype : numpy.dtype
+            None if no header has been read.
+        """
+        return self.__dtype
+
+    def get_interference_order ( self ):
+        """
+        This method's goal is to access the interference order stored in this object.
+
+        Returns:
+
+        * self.__interference_order : integer
+        """
+        return self.__interference_order
+
+    def get_interference_reference_wavelength ( self ):
+        """
+        This method's goal is to access the interference reference wavelength stored in this object.
+
+        Returns:
+
+        * self.__interference_reference_wavelength : integer
+        """
+        return self.__interference_reference_wavelength
+
+    def get_metadata ( self ):
+        """
+        This method's goal is to access the current metadata in this object.
+
+        Returns:
+
+        * self.__metadata : dictionary
+            Contains the current metadata stored in this object.
+        """
+        return self.__metadata
+
+    def get_plane ( self, plane ):
+        """
+        This method's goal is to read a single plane from the file, decompressing only its chunks.
+
+        Parameters:
+
+        * plane : integer
+            The index of the plane. For a 2D array, the only plane is 0.
+
+        Returns:
+
+        * unnamed variable : numpy.ndarray
+            A 2D array with the plane's data.
+        """
+        region = self._read_region ( plane, None, None )
+        return region [ 0 ]
+
+    def get_region ( self, planes = None, rows = None, cols = None ):
+        """
+        This method's goal is to read a region of the cube from the file, decompressing only the chunks that intersect it.
+
+        Parameters:
+
+        * planes : integer or slice : defaults to None
+            The planes to read; None selects all planes. Ignored for 2D arrays.
+
+        * rows : integer or slice : defaults to None
+            The rows to read; None selects all rows.
+
+        * cols : integer or slice : defaults to None
+            The columns to read; None selects all columns.
+
+        Returns:
+
+        * unnamed variable : numpy.ndarray
+            A 3D array, indexed as [ plane, row, col ], for 3D files; a 2D array, indexed as [ row, col ], for 2D files. Axes selected by an integer are kept, with length 1. Slices with a step other than 1 are not supported.
+        """
+        region = self._read_region ( planes, rows, cols )
+        if len ( self.__shape ) == 2:
+            return region [ 0 ]
+        return region
+
+    def get_tile_shape ( self ):
+        """
+        This method's goal is to access the ( rows, cols ) shape of the chunks, as described in the file's header.
+
+        Returns:
+
+        * self.__tile_shape : tuple of 2 integers
+            As given to the constructor, or as read from the file's header.
+        """
+        return self.__tile_shape
+
+    def get_shape ( self ):
+        """
+        This method's goal is to access the shape of the array, as described in the file's header.
+
+        Returns:
+
+        * self.__shape : tuple
+            None if no header has been read.
+        """
+        return self.__shape
+
+    def _read_region ( self, planes, rows, cols ):
+        """
+        This method's goal is to decompress the chunks intersecting a region, and copy their intersection into a new 3D array.
+        """
+        self.log.debug ( tuna.log.function_header ( ) )
+
+        if self.__index is None:
+            self.read_header ( )
+
+        if len ( self.__shape ) == 2:
+            total_planes, total_rows, total_cols = ( 1, ) + tuple ( self.__shape )
+            planes = None
+        else:
+            total_planes, total_rows, total_cols = self.__shape
+        plane_start, plane_end = _selected_range ( planes, total_planes )
+        row_start, row_end = _selected_range ( rows, total_rows )
+        col_start, col_end = _selected_range ( cols, total_cols )
+
+        region = numpy.zeros ( shape = ( plane_end - plane_start,
+                                         row_end - row_start,
+                                         col_end - col_start ),
+                               dtype = self.__dtype )
+        if region.size == 0:
+            return region
+
+        row_edges = _tile_edges ( total_rows, self.__tile_shape [ 0 ] )
+        col_edges = _tile_edges ( total_cols, self.__tile_shape [ 1 ] )
+        tiles_per_plane = len ( row_edges ) * len ( col_edges )
+
+        with open ( self.__file_name, "rb" ) as chunked_stream:
+            for plane in range ( plane_start, plane_end ):
+                for tile_row, ( tile_row_start, tile_row_end ) in enumerate ( row_edges ):
+                    if tile_row_end <= row_start or tile_row_start >= row_end:
+                        continue
+                    for tile_col, ( tile_col_start, tile_col_end ) in enumerate ( col_edges ):
+                        if tile_col_end <= col_start or tile_col_start >= col_end:
+                            continue
+                        chunk = plane * tiles_per_plane + tile_row * len ( col_edges ) + tile_col
+                        offset, length = self.__index [ chunk ]
+                        chunked_stream.seek ( int ( offset ) )
+                        tile = numpy.frombuffer ( zlib.decompress ( chunked_stream.read ( int ( length ) ) ),
+                                                  dtype = self.__dtype )
+                        tile = tile.reshape ( ( tile_row_end - tile_row_start,
+                                                tile_col_end - tile_col_start ) )
+                        low_row = max ( row_start, tile_row_start )
+                        high_row = min ( row_end, tile_row_end )
+                        low_col = max ( col_start, tile_col_start )
+                        high_col = min ( col_end, tile_col_end )
+                        region [ plane - plane_start,
+                                 low_row - row_start : high_row - row_start,
+                                 low_col - col_start : high_col - col_start ] = tile [
+                                     low_row - tile_row_start : high_row - tile_row_start,
+                                     low_col - tile_col_start : high_col - tile_col_start ]
+        return region
+
+    def read ( self ):
+        """
+        This method's goal is to read the whole array of the file specified in the constructor's file_name.
+        """
+        self.log.debug ( tuna.log.function_header ( ) )
+
+        self.read_header ( )
+        self.__array = self.get_region ( )
+        self._is_readable = True
+
+    def read_header ( self ):
+        """
+        This method's goal is to read the preamble, the metadata block and the chunk index of the file specified in the constructor's file_name, without decompressing any chunk.
+
+        Raises ValueError if the file is not a valid .canz file, or if its format version is newer than chunked_file_version.
+        """
+        self.log.debug ( tuna.log.function_header ( ) )
+
+        with open ( self.__file_name, "rb" ) as chunked_stream:
+            preamble = chunked_stream.read ( chunked_file_preamble.size )
+            if len ( preamble ) != chunked_file_preamble.size:
+                raise ValueError ( "File {} is too short to be a .canz file.".format ( self.__file_name ) )
+            magic, version, flags, metadata_length, index_offset = chunked_file_preamble.unpack ( preamble )
+            if magic != chunked_file_magic:
+                raise ValueError ( "File {} is not a .canz file.".format ( self.__file_name ) )
+            if version > chunked_file_version:
+                raise ValueError ( "File {} has .canz format version {}, newer than the supported version {}.".format (
+                    self.__file_name, version, chunked_file_version ) )
+            block = chunked_stream.read ( metadata_length )
+            chunked_stream.seek ( index_offset )
+            index = numpy.frombuffer ( chunked_stream.read ( ), dtype = "<u8" )
+
+        header = json.loads ( block.decode ( "utf-8" ), object_hook = _decode_json )
+        self.__dtype = numpy.dtype ( header [ "dtype" ] )
+        self.__shape = tuple ( header [ "shape" ] )
+        self.__tile_shape = tuple ( header [ "tile_shape" ] )
+        self.__interference_order = header [ "interference_order" ]
+        self.__interference_reference_wavelength = header [ "interference_reference_wavelength" ]
+        if header [ "metadata" ] is None:
+            self.__metadata = None
+        else:
+            self.__metadata = { }
+            for key in header [ "metadata" ].keys ( ):
+                self.__metadata [ key ] = tuple ( header [ "metadata" ] [ key ] )
+        self.__index = index.reshape ( ( -1, 2 ) )
+
+    def write ( self ):
+        """
+        This method's goal is to write the object's current array and metadata as a .canz file named file_name. An existing file is overwritten.
+        """
+        self.log.debug ( tuna.log.function_header ( ) )
+
+        array = numpy.asarray ( self.__array )
+        if array.dtype.hasobject:
+            raise ValueError ( "Arrays of Python objects cannot be written as .canz files." )
+        if array.ndim == 2:
+            cube = array [ numpy.newaxis ]
+        elif array.ndim == 3:
+            cube = array
+        else:
+            raise ValueError ( "Only 2D and 3D arrays can be written as .canz files." )
+
+        if self.__tile_shape is None:
+            tile_shape = default_tile_shape
+        else:
+            tile_shape = ( int ( self.__tile_shape [ 0 ] ), int ( self.__tile_shape [ 1 ] ) )
+
+        metadata = None
+        if self.__metadata is not None:
+            metadata = { }
+            for key in self.__metadata.keys ( ):
+                metadata [ str ( key ) ] = list ( self.__metadata [ key ] )
+        header = { "dtype"                             : array.dtype.str,
+                   "shape"                             : list ( array.shape ),
+                   "tile_shape"                        : list ( tile_shape ),
+                   "codec"                             : "zlib",
+                   "interference_order"                : self.__interference_order,
+                   "interference_reference_wavelength" : self.__interference_reference_wavelength,
+                   "metadata"                          : metadata }
+        block = json.dumps ( header, default = _encode_json ).encode ( "utf-8" )
+
+        row_edges = _tile_edges ( cube.shape [ 1 ], tile_shape [ 0 ] )
+        col_edges = _tile_edges ( cube.shape [ 2 ], tile_shape [ 1 ] )
+        index = [ ]
+        with open ( self.__file_name, "wb" ) as chunked_stream:
+            chunked_stream.write ( chunked_file_preamble.pack ( chunked_file_magic, chunked_file_version, 0, len ( block ), 0 ) )
+            chunked_stream.write ( block )
+            offset = chunked_file_preamble.size + len ( block )
+            for plane in range ( cube.shape [ 0 ] ):
+                for row_start, row_end in row_edges:
+                    for col_start, col_end in col_edges:
+                        tile = numpy.ascontiguousarray ( cube [ plane, row_start : row_end, col_start : col_end ] )
+                        chunk = zlib.compress ( tile.tobytes ( ), self.__compression_level )
+                        chunked_stream.write ( chunk )
+                        index.append ( ( offset, len ( chunk ) ) )
+                        offset += len ( chunk )
+            chunked_stream.write ( numpy.array ( index, dtype = "<u8" ).tobytes ( ) )
+            chunked_stream.seek ( 0 )
+            chunked_stream.write ( chunked_file_preamble.pack ( chunked_file_magic, chunked_file_version, 0, len ( block ), offset ) )
+
+        self.__dtype = array.dtype
+        self.__shape = array.shape
+        self.__tile_shape = tile_shape
+        self.__index = numpy.array ( index, dtype = "<u8" ).reshape ( ( -1, 2 ) )
+        self.log.debug ( "Wrote {} chunks, {} bytes of compressed data for {} bytes of array.".format (
+            len ( index ), offset - chunked_file_preamble.size - len ( block ), array.nbytes ) )
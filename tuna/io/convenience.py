@@ -5,9 +5,11 @@ This module's scope covers tools that make data access more convenient.
 import logging
 
 from .can import can
+from .can_file import can_file
+from .chunked_file import chunked_file
 from .fits import fits
 
-def read ( file_name ):
+def read ( file_name, memmap = False, processes = 1, lazy = False, precision = None ):
     """
     This function's goal is to create a tuna can, and attempt to read the specified file_name using the can.read ( ) method.
 
@@ -16,6 +18,18 @@ def read ( file_name ):
     * file_name : string
         Specifies an existing file, containing data in a format Tuna understands.
 
+    * memmap : bool : defaults to False
+        If True, formats that support it (currently .fits, .AD2, .AD3 and .can) are memory-mapped instead of read into memory.
+
+    * processes : integer : defaults to 1
+        The number of worker processes used to read formats that support parallel ingest (currently .ADT acquisitions).
+
+    * lazy : bool : defaults to False
+        If True, formats that support it (currently .can and .canz) are opened by reading their header only, and the array is read on first access (see tuna.io.can.read).
+
+    * precision : string : defaults to None
+        Overrides the precision policy (see tuna.tools.precision) for formats whose type is chosen by Tuna (currently .ADT acquisitions).
+
     Returns:
 
     * tuna_can : tuna.io.can
@@ -25,9 +39,18 @@ def read ( file_name ):
 
         import tuna
         tuna.io.read ( "data_file.fits" )
+        tuna.io.read ( "data_file.ad3", memmap = True )
+        tuna.io.read ( "data_file.can", memmap = True )
+        tuna.io.read ( "data_file.ADT", processes = 8 )
+        tuna.io.read ( "data_file.can", lazy = True ).shape
+        tuna.io.read ( "data_file.ADT", precision = "single" )
     """
-    __version__ = "0.1.0"
+    __version__ = "0.5.0"
     changelog = {
+        "0.5.0" : "Tuna 0.16.4 : Added precision parameter.",
+        "0.4.0" : "Tuna 0.16.4 : Added lazy parameter.",
+        "0.3.0" : "Tuna 0.16.4 : Added processes parameter.",
+        "0.2.0" : "Tuna 0.16.4 : Added memmap parameter.",
         "0.1.0" : "Tuna 0.13.0 : Added example to docstring."
         }
     log = logging.getLogger ( __name__ )
@@ -36,14 +59,16 @@ def read ( file_name ):
 
     if file_name:
         tuna_can = can ( file_name = file_name )
-        tuna_can.read ( )
+        tuna_can.read ( memmap = memmap, processes = processes, lazy = lazy, precision = precision )
         return tuna_can
 
 def write ( array       = None, 
             file_format = None,
             file_name   = None, 
             metadata    = None,
-            photons   = None ):
+            photons   = None,
+            tile_shape  = None,
+            compression_level = 6 ):
     """
     This method's goal is to write a file using the specified input.
 
@@ -52,13 +77,17 @@ def write ( array       = None,
     * array : numpy.ndarray
         The data to be saved in the file.
     * file_format: string 
-        Specifies one of Tuna's known write formats (only "fits" is implemented so far).
+        Specifies one of Tuna's known write formats: "fits", "can" or "canz" (chunked and compressed, see tuna.io.chunked_file).
     * file_name: string 
         Must contain a valid file path and name.
     * metadata: dictionary
-        A structure containing the metadata to be saved as fits headers.
+        A structure containing the metadata to be saved as fits headers, or in the metadata block of a .can file.
     * photons: dictionary
         A structure containing photon descriptions, in the same format as specified in tuna.io.can.convert_ndarray_into_table ( ).    
+    * tile_shape: tuple of 2 integers
+        The ( rows, cols ) shape of the chunks of a "canz" file. If None, tuna.io.chunked_file.default_tile_shape is used. Reading a region of the file only decompresses the chunks it touches.
+    * compression_level: integer
+        The zlib compression level of a "canz" file, from 0 (no compression) to 9.
 
     Example::
 
@@ -67,9 +96,15 @@ def write ( array       = None,
 
         zeros_array = numpy.zeros ( shape = ( 2, 3, 3 ) )
         tuna.io.write ( array = zeros_array, file_name = "zeros.fits", file_format = "fits" )
+        tuna.io.write ( array = zeros_array, file_name = "zeros.can", file_format = "can" )
+        tuna.io.write ( array = zeros_array, file_name = "zeros.canz", file_format = "canz" )
+        tuna.io.write ( array = zeros_array, file_name = "zeros.canz", file_format = "canz", tile_shape = ( 64, 64 ), compression_level = 9 )
     """
-    __version__ = '0.1.3'
+    __version__ = '0.4.0'
     changelog = {
+        "0.4.0" : "Tuna 0.16.4 : Added the tile_shape and compression_level parameters for the canz file format.",
+        "0.3.0" : "Tuna 0.16.4 : Added the canz file format.",
+        "0.2.0" : "Tuna 0.16.4 : Added the can file format.",
         "0.1.3" : "Tuna 0.13.0 : Added example to docstring.",
         '0.1.2' : "Added docstring.",
         '0.1.1' : "Added error message when file format is unknown."
@@ -89,4 +124,24 @@ def write ( array       = None,
         log.info ( "FITS file written at %s." % str ( file_name ) )
         return
 
+    if ( file_format == 'can' or
+         file_format == 'CAN' ):
+        can_file_object = can_file ( array = array,
+                                     file_name = file_name,
+                                     metadata = metadata )
+        can_file_object.write ( )
+        log.info ( "can file written at %s." % str ( file_name ) )
+        return
+
+    if ( file_format == 'canz' or
+         file_format == 'CANZ' ):
+        chunked_file_object = chunked_file ( array = array,
+                                             file_name = file_name,
+                                             metadata = metadata,
+                                             tile_shape = tile_shape,
+                                             compression_level = compression_level )
+        chunked_file_object.write ( )
+        log.info ( "canz file written at %s." % str ( file_name ) )
+        return
+
     log.error ( "No file_format '{}' known.".format ( file_format ) )
@@ -1,36 +1,171 @@
 """
 This module's scope covers database operations.
+
+Tuna records the hashes of its datasets in a MySQL database when a server is available on localhost, and otherwise in an embedded SQLite database with the same schema.
 """
-__version__ = "0.1.1"
+__version__ = "0.4.2"
 __changelog__ = {
+    "0.4.2" : { "Tuna" : "0.16.4", "Change" : "A failed batch is replayed a group, then a record, at a time, so that only the failing records are dropped. select_record ( ) does not commit on the database thread." },
+    "0.4.1" : { "Tuna" : "0.16.4", "Change" : "flush ( ) also waits for the thread to finish connecting and checking the tables." },
+    "0.4.0" : { "Tuna" : "0.16.4", "Change" : "Database backends: MySQL, or an embedded SQLite database in WAL mode when no MySQL server is available." },
+    "0.3.0" : { "Tuna" : "0.16.4", "Change" : "LRU cache of select results, kept up to date by queued inserts and updates. Added submit ( ), to run functions on the database thread." },
+    "0.2.0" : { "Tuna" : "0.16.4", "Change" : "Event-driven writer thread: queued inserts and updates are written in parameterized executemany batches, with one commit per batch. Added flush ( )." },
     "0.1.1" : { "Tuna" : "0.16.0", "Change" : "Clean up of changelogs / versions on individual classes/methods. Made message about lack of MySQL a debug message." },
     "0.1.0" : { "Tuna" : "0.15.3", "Change" : "Made message about lack of SQL server during select less spammy." }
     }
 
+import collections
 import logging
-import pymysql
+import os
+import sqlite3
 import sys
 import threading
 import time
-import traceback
 import tuna
+try:
+    import pymysql
+except ImportError:
+    pymysql = None
+
+default_sqlite_file_name = os.path.join ( os.path.expanduser ( "~" ), ".tuna", "tuna.sqlite" )
+"""
+The location of the embedded SQLite database, used when no MySQL server is available.
+"""
+
+def _dictionary_row ( cursor, row ):
+    """
+    This function's goal is to return SQLite rows as dictionaries, as pymysql's DictCursor does.
+    """
+    return { column [ 0 ] : value for column, value in zip ( cursor.description, row ) }
+
+class mysql_backend ( object ):
+    """
+    This class' responsibility is to connect to the MySQL server on 'localhost', which should have a database 'tuna' and a user 'tuna' that has all rights on the database 'tuna', using the password 'tuna'.
+    """
+    name = "MySQL"
+    placeholder = "%s"
+
+    def connect ( self ):
+        """
+        This method's goal is to open a connection to the server.
+
+        Returns:
+
+        * unnamed variable : pymysql.connections.Connection
+            Its cursors return rows as dictionaries.
+        """
+        if pymysql is None:
+            raise ImportError ( "pymysql is not installed." )
+        return pymysql.connect ( host        = 'localhost',
+                                 user        = 'tuna',
+                                 passwd      = 'tuna',
+                                 db          = 'tuna',
+                                 charset     = 'utf8mb4',
+                                 cursorclass = pymysql.cursors.DictCursor )
+
+    def list_tables ( self, connection ):
+        """
+        This method's goal is to list the tables in the database.
+
+        Returns:
+
+        * unnamed variable : list of strings
+        """
+        cursor = connection.cursor ( )
+        cursor.execute ( "show tables" )
+        connection.commit ( )
+        result = cursor.fetchall ( )
+        cursor.close ( )
+        return [ entry [ key ] for entry in result for key in entry.keys ( ) ]
+
+class sqlite_backend ( object ):
+    """
+    This class' responsibility is to open an embedded SQLite database, with the same schema as the MySQL database, so that no database server is needed.
+
+    The database is opened in WAL mode, so that readers in other processes are not blocked by the writer thread. Statements are parameterized, and prepared statements are reused by the sqlite3 module's statement cache.
+
+    Its constructor signature is:
+
+    Parameters:
+
+    * file_name : string : defaults to None
+        The location of the database file; its directory is created if needed. If None, default_sqlite_file_name is used.
+    """
+    name = "SQLite"
+    placeholder = "?"
+
+    def __init__ ( self, file_name = None ):
+        super ( sqlite_backend, self ).__init__ ( )
+        if file_name is None:
+            file_name = default_sqlite_file_name
+        self.file_name = file_name
+
+    def connect ( self ):
+        """
+        This method's goal is to open the database file.
+
+        Returns:
+
+        * unnamed variable : sqlite3.Connection
+            Its cursors return rows as dictionaries. It may be used from any thread; the database object serializes its use.
+        """
+        directory = os.path.dirname ( self.file_name )
+        if directory:
+            os.makedirs ( directory, exist_ok = True )
+        connection = sqlite3.connect ( self.file_name,
+                                       timeout = 30,
+                                       check_same_thread = False )
+        connection.row_factory = _dictionary_row
+        connection.execute ( "pragma journal_mode = wal" )
+        connection.execute ( "pragma synchronous = normal" )
+        return connection
+
+    def list_tables ( self, connection ):
+        """
+        This method's goal is to list the tables in the database.
+
+        Returns:
+
+        * unnamed variable : list of strings
+        """
+        cursor = connection.cursor ( )
+        cursor.execute ( "select name from sqlite_master where type = 'table'" )
+        result = cursor.fetchall ( )
+        cursor.close ( )
+        return [ entry [ 'name' ] for entry in result ]
 
 class database ( threading.Thread ):
     """
-    This class' responsibilities are creating and maintaining a connection to a system's MySQL database. It is also the gateway through which queries are to be made.
+    This class' responsibilities are creating and maintaining a connection to a database, through one of the backends in this module. It is also the gateway through which queries are to be made.
+
+    Its constructor signature is:
+
+    Parameters:
+
+    * backend : object : defaults to None
+        Either a mysql_backend or a sqlite_backend instance. If None, the MySQL server on localhost is used if it is available; otherwise, an embedded SQLite database at default_sqlite_file_name is used.
 
     It inherits from the :ref:`threading_label`.Thread class, and it auto-starts its thread execution. Clients are expected to use its .join ( ) method before using its results.
 
+    Results of select_record ( ) are kept in a least-recently-used cache of select_cache_size entries, which queued inserts and updates keep up to date, so that looking up a known digest does not need a round trip to the database manager.
+
+    Inserts and updates are queued, and written by the object's thread, which sleeps until records are queued. All records pending when the thread wakes are written as a batch: consecutive records for the same table and columns are sent as a single parameterized executemany statement, and the batch is committed once. Clients that need the records to be written, such as tests, can call flush ( ).
+
     This module is part of the "guts" of Tuna and is not meant as a user-serviceable module.
     """
-    def __init__ ( self ):
+    def __init__ ( self, backend = None ):
         super ( self.__class__, self ).__init__ ( )
         self.log = logging.getLogger ( __name__ )
 
         self.daemon = True
         self.shutdown = False
 
+        self.automatic_backend = backend is None
+        if backend is None:
+            backend = mysql_backend ( )
+        self.backend = backend
         self.connection = None
+        self.connection_lock = threading.RLock ( )
         self.expected_tables = {
             'datasets' : "( hash varchar ( 40 ) primary key,"
                          "file_name varchar ( 255 ),"
@@ -40,8 +175,14 @@ class database ( threading.Thread ):
                          "radius int,"
                          "threshold int )"
         }
+        self.placeholder = self.backend.placeholder
+        self.select_cache = collections.OrderedDict ( )
+        self.select_cache_lock = threading.Lock ( )
+        self.select_cache_size = 1024
         self.queue = [ ]
-        self.queue_lock = tuna.io.lock ( )
+        self.queue_condition = threading.Condition ( )
+        self.pending = 0
+        self.ready = threading.Event ( )
 
     def __del__ ( self ):
         self.stop ( )
@@ -50,17 +191,19 @@ class database ( threading.Thread ):
         """
         This method is required by :ref:`threading_label`, which allows parallel exection in a separate thread.
 
-        This method's goal is to connect to a MySQL daemon, verify that it has the appropriate tables and keep the connection open until the object is stopped.
+        This method's goal is to connect to the database, verify that it has the appropriate tables and keep the connection open until the object is stopped.
         """
         self.log.debug ( "<%s>" % ( sys._getframe ( ).f_code.co_name ) )
                              
         # Check database connection is up.
-        if not self.check_mysql_connection ( ):
+        if not self.check_connection ( ):
             # Try to up it.
-            self.open_mysql_connection ( )
+            self.open_connection ( )
             # Check again.
-            if not self.check_mysql_connection ( ):
-                self.log.debug ( "Could not open MySQL connection, aborting use of database." )
+            if not self.check_connection ( ):
+                self.log.debug ( "Could not open a database connection, aborting use of database." )
+                self.discard_queue ( )
+                self.ready.set ( )
                 return
 
         # Check config is good.
@@ -70,33 +213,44 @@ class database ( threading.Thread ):
             # check again.
             if not self.check_tables ( ):
                 self.log.error ( "Could not configure db tables." )
-                self.stop ( )
+                self.discard_queue ( )
+                self.close_connection ( )
+                self.ready.set ( )
                 return
 
-        while not self.shutdown:
-            self.log.debug ( "Starting database loop." )
-            time.sleep ( 1 )
+        self.ready.set ( )
+
+        while True:
+            with self.queue_condition:
+                while ( not self.queue and
+                        not self.shutdown ):
+                    self.queue_condition.wait ( )
+                if ( not self.queue and
+                     self.shutdown ):
+                    break
 
             if not self.connection:
                 self.log.warning ( "Connection became None during runtime." )
-                #self.stop ( )
 
             self.dequeue ( )
 
-        self.close_mysql_connection ( )
+        self.close_connection ( )
             
         self.log.debug ( "<%s>" % ( sys._getframe ( ).f_code.co_name ) )
 
     def stop ( self ):
         """
-        This method's goal is to initiate a shutdown sequence of the object, which will disconnect from the MySQL daemon and stop the thread.
+        This method's goal is to initiate a shutdown sequence of the object. The thread writes the records still queued, disconnects from the database and stops.
         """
-        self.shutdown = True
-        self.close_mysql_connection ( )
+        with self.queue_condition:
+            self.shutdown = True
+            self.queue_condition.notify_all ( )
+        if not self.is_alive ( ):
+            self.close_connection ( )
 
     # Connection methods.
 
-    def check_mysql_connection ( self ):
+    def check_connection ( self ):
         """
         This method's goal is to verify that the connection to the database manager is working.
 
@@ -109,29 +263,49 @@ class database ( threading.Thread ):
             return False
         return True
 
-    def close_mysql_connection ( self ):
+    def close_connection ( self ):
         """
         This method's goal is to close the connection to the database manager.
         """
-        if self.check_mysql_connection ( ):
-            self.connection.close ( )
-            self.connection = None
+        with self.connection_lock:
+            if self.check_connection ( ):
+                self.connection.close ( )
+                self.connection = None
 
-    def open_mysql_connection ( self ):
+    def open_connection ( self ):
         """
-        This method's goal is to connect to the database manager. Which should reside on the 'localhost', have a database 'tuna' and a user 'tuna' that has all rights on the database 'tuna', using the password 'tuna'.
+        This method's goal is to connect to the database manager through self.backend. If the backend was chosen automatically and the MySQL server cannot be reached, the embedded SQLite backend is used instead.
         """
         try:
-            self.connection = pymysql.connect ( host        = 'localhost',
-                                                user        = 'tuna',
-                                                passwd      = 'tuna',
-                                                db          = 'tuna',
-                                                charset     = 'utf8mb4',
-                                                cursorclass = pymysql.cursors.DictCursor )
+            self.connection = self.backend.connect ( )
         except Exception as e:
-            self.log.debug ( "Exception during MySQL connection open: {}.".format ( e ) )
+            self.log.debug ( "Exception during {} connection open: {}.".format ( self.backend.name, e ) )
             self.connection = None
-        self.log.debug ( "MySQL connection opened." )
+            if self.automatic_backend and isinstance ( self.backend, mysql_backend ):
+                self.backend = sqlite_backend ( )
+                self.placeholder = self.backend.placeholder
+                self.open_connection ( )
+                return
+        if self.connection:
+            self.log.debug ( "{} connection opened.".format ( self.backend.name ) )
+
+    def check_mysql_connection ( self ):
+        """
+        This method is kept for compatibility; see check_connection ( ).
+        """
+        return self.check_connection ( )
+
+    def close_mysql_connection ( self ):
+        """
+        This method is kept for compatibility; see close_connection ( ).
+        """
+        self.close_connection ( )
+
+    def open_mysql_connection ( self ):
+        """
+        This method is kept for compatibility; see open_connection ( ).
+        """
+        self.open_connection ( )
 
     # Config methods. They suppose connection is fine.
 
@@ -140,21 +314,13 @@ class database ( threading.Thread ):
         This method's goal is to verify that the database connected to contains the proper tables for running Tuna.
         """
         try:
-            cursor = self.connection.cursor ( )
-            cursor.execute ( "show tables" )
-            self.connection.commit ( )
-            result = cursor.fetchall ( )
-            cursor.close ( )
+            result_tables = self.backend.list_tables ( self.connection )
         except Exception as e:
             self.log.error ( tuna.console.output_exception ( e ) )
             return False
-        result_tables = [ ]
-        for entry in result:
-            for key in entry.keys ( ):
-                result_tables.append ( entry [ key ] )
         expected_tables = list ( self.expected_tables.keys ( ) )
         if sorted ( result_tables ) != sorted ( expected_tables ):
-            self.log.debug ( "Tables in db '{}' differ from the expected '{}'!".format ( result,
+            self.log.debug ( "Tables in db '{}' differ from the expected '{}'!".format ( result_tables,
                                                                                          expected_tables ) )
             return False
         return True
@@ -164,16 +330,12 @@ class database ( threading.Thread ):
         This method's goal is to populate an empty database with a structure defined in self.expected_tables.
         """
         try:
-            cursor = self.connection.cursor ( )
-            cursor.execute ( "show tables" )
-            self.connection.commit ( )
-            result = cursor.fetchall ( )
-            cursor.close ( )
+            result = self.backend.list_tables ( self.connection )
         except Exception as e:
             self.log.error ( tuna.console.output_exception ( e ) )
             return
             
-        if result != ( ):
+        if result:
             self.log.error ( "Database '{}' is not empty AND is different from expected!".format ( result ) )
             return
 
@@ -199,6 +361,7 @@ class database ( threading.Thread ):
         * columns_values : dictionary
             A dictionary where keys must contain valid column identifiers for the specified table, and the dictionary values must be valid values of the type the database specifies for that column, in that table.
         """
+        self.cache_record ( table, columns_values, insert = True )
         self.enqueue ( { 'function' : self.insert_record_processor,
                          'args' : ( table, columns_values ),
                          'kwargs' : { } } )
@@ -214,31 +377,8 @@ class database ( threading.Thread ):
         * columns_values : dictionary
             A dictionary where keys must contain valid column identifiers for the specified table, and the dictionary values must be valid values of the type the database specifies for that column, in that table.
         """
-        columns_string = "( "
-        for column in columns_values.keys ( ):
-            if columns_string != "( ":
-                columns_string += ", "
-            columns_string += str ( column )
-        columns_string += " )"
-        self.log.debug ( "columns_string = '{}'.".format ( columns_string ) )
-
-        for key in columns_values.keys ( ):
-            entry = columns_values [ key ]
-            try:
-                values_string += ", '{}'".format ( entry )
-            except UnboundLocalError:
-                values_string = "'{}'".format ( entry )
-        values_string = "( " + values_string + " )"
-
-        self.log.debug ( "values_string = '{}'.".format ( values_string ) )
-        sql = "insert into {} {} values {}".format ( table, 
-                                                     columns_string,
-                                                     values_string )
-        cursor = self.connection.cursor ( )
-        self.log.debug ( "sql = '{}'.".format ( sql ) )
-        cursor.execute ( sql )
+        self.write_records ( self.insert_record_processor, table, [ columns_values ] )
         self.connection.commit ( )
-        cursor.close ( )
         
     def select_record ( self, table, columns_values ):
         """
@@ -256,33 +396,114 @@ class database ( threading.Thread ):
         * unnamed variable : list
             The same structure as returned by pymysql.cursor.fetchall ( ).
         * unnamed variable : bool
-            Will be True if the connection is open, and data was retrieved without raising an exception. Otherwise, will return False.
+            Will be True if the connection is open, and data was retrieved without raising an exception, or if the result was found in the select cache. Otherwise, will return False.
         """
-        for key in columns_values.keys ( ):
-            try:
-                where_string += " and {} = '{}'".format ( key, columns_values [ key ] )
-            except UnboundLocalError:
-                where_string = "{} = '{}'".format ( key, columns_values [ key ] )
-                continue
+        key = self.cache_key ( table, columns_values )
+        with self.select_cache_lock:
+            if key in self.select_cache:
+                self.select_cache.move_to_end ( key )
+                return [ dict ( row ) for row in self.select_cache [ key ] ], True
+
+        columns = list ( columns_values.keys ( ) )
+        where_string = " and ".join ( [ "{} = {}".format ( column, self.placeholder ) for column in columns ] )
         sql = "select * from {} where {}".format ( table, 
                                                    where_string )
         self.log.debug ( "sql = '{}'.".format ( sql ) )
 
-        if not self.check_mysql_connection ( ):
-            self.log.debug ( "No SQL connection during select, aborting." )
-            return None, False
-        
-        try:
-            cursor = self.connection.cursor ( )
-            cursor.execute ( sql )
-            self.connection.commit ( )
-            res = cursor.fetchall ( )
-            self.log.debug ( "res = {}".format ( res ) )
-            cursor.close ( )
-            return res, True
-        except Exception as e:
-            self.log.error ( tuna.console.output_exception ( e ) )
-            return None, False
+        with self.connection_lock:
+            if not self.check_connection ( ):
+                self.log.debug ( "No SQL connection during select, aborting." )
+                return None, False
+
+            try:
+                cursor = self.connection.cursor ( )
+                cursor.execute ( sql, [ columns_values [ column ] for column in columns ] )
+                if threading.current_thread ( ) is not self:
+                    # On the database thread, a commit would end the transaction of the batch being processed.
+                    self.connection.commit ( )
+                res = cursor.fetchall ( )
+                self.log.debug ( "res = {}".format ( res ) )
+                cursor.close ( )
+                self.cache_result ( key, res )
+                return res, True
+            except Exception as e:
+                self.log.error ( tuna.console.output_exception ( e ) )
+                return None, False
+
+    # select cache
+
+    def cache_key ( self, table, columns_values ):
+        """
+        This method's goal is to build the select cache key of a query.
+        """
+        return ( table, tuple ( sorted ( ( str ( column ), str ( columns_values [ column ] ) ) for column in columns_values.keys ( ) ) ) )
+
+    def cache_record ( self, table, columns_values, insert ):
+        """
+        This method's goal is to keep the select cache consistent with a record being inserted or updated, so that a lookup of the record by its hash finds its new contents.
+
+        Other cached queries on the same table may be affected by the change, so they are discarded.
+
+        Parameters:
+
+        * table : string
+            Must contain a name for a valid table on the database.
+        * columns_values : dictionary
+            The record being written; must have a 'hash' entry for it to be cached.
+        * insert : bool
+            True for an insert, False for an update.
+        """
+        if 'hash' not in columns_values:
+            self.clear_cache ( table )
+            return
+        key = self.cache_key ( table, { 'hash' : columns_values [ 'hash' ] } )
+        with self.select_cache_lock:
+            for cached_key in list ( self.select_cache.keys ( ) ):
+                if cached_key [ 0 ] == table and cached_key != key:
+                    del self.select_cache [ cached_key ]
+            cached = self.select_cache.pop ( key, None )
+            if insert:
+                record = dict ( columns_values )
+            elif cached:
+                record = dict ( cached [ 0 ] )
+                record.update ( columns_values )
+            else:
+                return
+            self.select_cache [ key ] = ( record, )
+            self.trim_cache ( )
+
+    def cache_result ( self, key, result ):
+        """
+        This method's goal is to store the result of a select in the select cache.
+        """
+        with self.select_cache_lock:
+            self.select_cache [ key ] = tuple ( result )
+            self.select_cache.move_to_end ( key )
+            self.trim_cache ( )
+
+    def clear_cache ( self, table = None ):
+        """
+        This method's goal is to discard cached select results.
+
+        Parameters:
+
+        * table : string : defaults to None
+            If not None, only the results for this table are discarded.
+        """
+        with self.select_cache_lock:
+            if table is None:
+                self.select_cache.clear ( )
+                return
+            for cached_key in list ( self.select_cache.keys ( ) ):
+                if cached_key [ 0 ] == table:
+                    del self.select_cache [ cached_key ]
+
+    def trim_cache ( self ):
+        """
+        This method's goal is to discard the least recently used select results beyond select_cache_size. The caller must hold select_cache_lock.
+        """
+        while len ( self.select_cache ) > self.select_cache_size:
+            self.select_cache.popitem ( last = False )
 
     def update_record ( self, table, columns_values ):
         """
@@ -295,6 +516,7 @@ class database ( threading.Thread ):
         * columns_values : dictionary
             A dictionary where keys must contain valid column identifiers for the specified table, and the dictionary values must be valid values of the type the database specifies for that column, in that table.
         """
+        self.cache_record ( table, columns_values, insert = False )
         self.enqueue ( { 'function' : self.update_record_processor,
                          'args' : ( table, columns_values ),
                          'kwargs' : { } } )
@@ -308,37 +530,48 @@ class database ( threading.Thread ):
         * table : string
             Must contain a name for a valid table on the database.
         * columns_values : dictionary
-            A dictionary where keys must contain valid column identifiers for the specified table, and the dictionary values must be valid values of the type the database specifies for that column, in that table.
+            A dictionary where keys must contain valid column identifiers for the specified table, and the dictionary values must be valid values of the type the database specifies for that column, in that table. The row to be updated is selected by the 'hash' entry.
         """
-        for key in columns_values.keys ( ):
-            if key == "hash":
-                continue
-            try:
-                update_string += ", {} = '{}'".format ( key, columns_values [ key ] )
-            except UnboundLocalError:
-                update_string = "{} = '{}'".format ( key, columns_values [ key ] )
-                continue
-
-        where_string = "hash = '{}'".format ( columns_values [ 'hash' ] )
-        sql = "update {} set {} where {}".format ( table, 
-                                                   update_string,
-                                                   where_string )
-        self.log.debug ( "sql = '{}'.".format ( sql ) )
+        self.write_records ( self.update_record_processor, table, [ columns_values ] )
+        self.connection.commit ( )
 
+    def write_records ( self, function, table, rows ):
+        """
+        This method's goal is to write several records with the same columns to a table, through a single parameterized executemany statement. It does not commit.
+
+        Parameters:
+
+        * function : method
+            Either self.insert_record_processor or self.update_record_processor, selecting the statement to be executed.
+        * table : string
+            Must contain a name for a valid table on the database.
+        * rows : list of dictionaries
+            Each dictionary has the same structure as the columns_values parameter of insert_record ( ) or update_record ( ), and all dictionaries have the same keys.
+        """
+        columns = list ( rows [ 0 ].keys ( ) )
+        if function == self.update_record_processor:
+            columns = [ column for column in columns if column != 'hash' ]
+            set_string = ", ".join ( [ "{} = {}".format ( column, self.placeholder ) for column in columns ] )
+            sql = "update {} set {} where hash = {}".format ( table,
+                                                              set_string,
+                                                              self.placeholder )
+            values = [ [ row [ column ] for column in columns ] + [ row [ 'hash' ] ] for row in rows ]
+        else:
+            sql = "insert into {} ( {} ) values ( {} )".format ( table,
+                                                                 ", ".join ( columns ),
+                                                                 ", ".join ( [ self.placeholder ] * len ( columns ) ) )
+            values = [ [ row [ column ] for column in columns ] for row in rows ]
+
+        self.log.debug ( "sql = '{}', {} rows.".format ( sql, len ( values ) ) )
         cursor = self.connection.cursor ( )
-        cursor.execute ( sql )
-        self.connection.commit ( )
-        res = cursor.fetchall ( )
+        cursor.executemany ( sql, values )
         cursor.close ( )
-        if len ( res ) == 0:
-            return None
-        return res [ 0 ]
 
     # queue
            
     def enqueue ( self, data ):
         """
-        This method's goal is to add a request to the queue.
+        This method's goal is to add a request to the queue, and wake the object's thread.
 
         Parameters:
 
@@ -346,22 +579,79 @@ class database ( threading.Thread ):
             Must contain valid entries for the following keys: function, args and kwargs.
         """
         self.log.debug ( "enqueue: {}.".format ( data ) )
-        self.queue_lock.get ( )
-        self.queue.append ( data )
-        self.queue_lock.let ( )
+        with self.queue_condition:
+            if self.shutdown:
+                self.log.debug ( "Database is shut down, request discarded." )
+                return
+            self.queue.append ( data )
+            self.pending += 1
+            self.queue_condition.notify_all ( )
 
     def dequeue ( self ):
         """
-        This method's goal is to pop the first entry on the query queue, and attempt to process it.
+        This method's goal is to take all entries on the query queue, and process them as a batch, in the order they were queued.
+        """
+        with self.queue_condition:
+            batch = self.queue
+            self.queue = [ ]
+        if batch:
+            self.log.debug ( "dequeue: {} requests.".format ( len ( batch ) ) )
+            try:
+                self.process_batch ( batch )
+            finally:
+                with self.queue_condition:
+                    self.pending -= len ( batch )
+                    self.queue_condition.notify_all ( )
+
+    def submit ( self, function, *args, **kwargs ):
+        """
+        This method's goal is to run a function on the database thread, after the requests already queued, so that callers do not wait on the database manager.
+
+        Parameters:
+
+        * function : callable
+            Will be called as function ( *args, **kwargs ). Exceptions it raises are logged.
+        """
+        self.enqueue ( { 'function' : function,
+                         'args' : args,
+                         'kwargs' : kwargs } )
+
+    def discard_queue ( self ):
+        """
+        This method's goal is to stop accepting requests, and drop the ones already queued. It is used when the database cannot be used, so that requests do not accumulate.
+        """
+        with self.queue_condition:
+            self.shutdown = True
+            self.queue = [ ]
+            self.pending = 0
+            self.queue_condition.notify_all ( )
+
+    def flush ( self, timeout = None ):
         """
-        self.queue_lock.get ( )
-        data = None
-        if len ( self.queue ) > 0:
-            data = self.queue.pop ( )
-        self.queue_lock.let ( )
-        if data:
-            self.log.debug ( "dequeue: {}.".format ( data ) )
-            self.process ( data )
+        This method's goal is to wait until the object's thread has finished its setup, and all queued requests have been processed.
+
+        Parameters:
+
+        * timeout : float : defaults to None
+            The maximum time to wait, in seconds. If None, waits until the queue is empty.
+
+        Returns:
+
+        * unnamed variable : bool
+            True if the object's thread has finished its setup (connecting and checking the tables) and all queued requests were processed; False if the timeout elapsed, or if the object's thread is not running while requests are still queued.
+        """
+        if timeout is not None:
+            deadline = time.time ( ) + timeout
+        if self.is_alive ( ):
+            if not self.ready.wait ( timeout = timeout ):
+                return False
+            if timeout is not None:
+                timeout = max ( 0, deadline - time.time ( ) )
+        with self.queue_condition:
+            if not self.is_alive ( ):
+                return self.pending == 0
+            return self.queue_condition.wait_for ( lambda: self.pending == 0,
+                                                   timeout = timeout )
 
     def process ( self, data ):
         """
@@ -377,3 +667,81 @@ class database ( threading.Thread ):
             data [ 'function' ] ( *data [ 'args' ], **data [ 'kwargs' ] )
         except Exception as e:
             self.log.error ( tuna.console.output_exception ( e ) )
+
+    def process_batch ( self, batch ):
+        """
+        This method's goal is to process a list of query requests with as few round trips to the database manager as possible.
+
+        Consecutive inserts (or updates) on the same table, with the same columns, are written through a single call to write_records ( ), and the whole batch is committed once. Other requests are processed individually, through process ( ).
+
+        If the batch fails, it is rolled back and replayed one group at a time, each group with its own commit; the records of a failing group are then written one at a time, and only the records that fail are dropped (and the cached selects of their table discarded).
+
+        Parameters:
+
+        * batch : list of dictionaries
+            Each must contain valid entries for the following keys: function, args and kwargs.
+        """
+        groups = [ ]
+        for data in batch:
+            if ( data [ 'function' ] in ( self.insert_record_processor,
+                                          self.update_record_processor ) and
+                 not data [ 'kwargs' ] ):
+                table, columns_values = data [ 'args' ]
+                key = ( data [ 'function' ], table, tuple ( columns_values.keys ( ) ) )
+                if groups and groups [ -1 ] [ 0 ] == key:
+                    groups [ -1 ] [ 1 ].append ( columns_values )
+                else:
+                    groups.append ( ( key, [ columns_values ] ) )
+            else:
+                groups.append ( ( None, data ) )
+
+        with self.connection_lock:
+            done = 0
+            try:
+                for key, group in groups:
+                    if key is None:
+                        self.process ( group )
+                    else:
+                        self.write_records ( key [ 0 ], key [ 1 ], group )
+                    done += 1
+                self.connection.commit ( )
+                return
+            except Exception as e:
+                self.log.warning ( "Batch of {} requests failed, replaying it: {}".format ( len ( batch ), e ) )
+                self.rollback ( )
+
+            for index in range ( len ( groups ) ):
+                key, group = groups [ index ]
+                if key is None:
+                    # Functions run through submit ( ) are not run twice.
+                    if index >= done:
+                        self.process ( group )
+                        try:
+                            self.connection.commit ( )
+                        except Exception as e:
+                            self.log.error ( tuna.console.output_exception ( e ) )
+                            self.rollback ( )
+                    continue
+                try:
+                    self.write_records ( key [ 0 ], key [ 1 ], group )
+                    self.connection.commit ( )
+                    continue
+                except Exception:
+                    self.rollback ( )
+                for row in group:
+                    try:
+                        self.write_records ( key [ 0 ], key [ 1 ], [ row ] )
+                        self.connection.commit ( )
+                    except Exception as e:
+                        self.rollback ( )
+                        self.log.error ( "Dropping record {} of table {}: {}".format ( row, key [ 1 ], e ) )
+                        self.clear_cache ( key [ 1 ] )
+
+    def rollback ( self ):
+        """
+        This method's goal is to roll back the current transaction, ignoring errors (such as a connection that was lost).
+        """
+        try:
+            self.connection.rollback ( )
+        except Exception:
+            pass
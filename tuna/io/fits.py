@@ -3,8 +3,13 @@ This module's scope covers operations related to the FITS file format.
 
 As much as possible, operations are deferred to astropy.io.fits.
 """
-__version__ = "0.1.0"
+__version__ = "0.4.2"
 __changelog__ = {
+    "0.4.2" : { "Tuna" : "0.16.4", "Change" : "fits_plane_writer also writes int8 and uint64 arrays, as FITS offset integers." },
+    "0.4.1" : { "Tuna" : "0.16.4", "Change" : "Metadata with several distinct values is written to the header again, as a comma-separated string, so that it is read back by read ( )." },
+    "0.4.0" : { "Tuna" : "0.16.4", "Change" : "Added fits_plane_writer; write ( ) streams the array a plane at a time. Metadata and photon tables are written as typed binary tables." },
+    "0.3.0" : { "Tuna" : "0.16.4", "Change" : "Mosaic panels are read and decompressed in parallel, by tuna.io.mosaic." },
+    "0.2.0" : { "Tuna" : "0.16.4", "Change" : "Lazy HDU loading, optional memory mapping, native dtype for single images and mosaics. Fixed mosaic assembly and the metadata dictionary shared between instances." },
     "0.1.0" : { "Tuna" : "0.16.0", "Change" : "Added debug messages during metadata parsing. Fixed metdata not reading entries from multiple HDU lists." }
     }
 
@@ -13,11 +18,254 @@ import copy
 import logging
 import math
 import numpy
+import os
 import sys
 from tuna.io.file_reader import file_reader
+from tuna.io.mosaic import assemble_mosaic
 import tuna
 import warnings
 
+_structural_keys = ( "SIMPLE", "BITPIX", "NAXIS", "EXTEND", "BZERO", "BSCALE", "PCOUNT", "GCOUNT", "XTENSION", "END" )
+
+_bitpix_per_dtype = { "uint8"   : (   8, None ),
+                      "int16"   : (  16, None ),
+                      "int32"   : (  32, None ),
+                      "int64"   : (  64, None ),
+                      "float32" : ( -32, None ),
+                      "float64" : ( -64, None ),
+                      "int8"    : (   8, - 2 ** 7 ),
+                      "uint16"  : (  16, 2 ** 15 ),
+                      "uint32"  : (  32, 2 ** 31 ),
+                      "uint64"  : (  64, 2 ** 63 ) }
+
+def _is_structural_key ( key ):
+    """
+    This function's goal is to identify header keys that describe the data layout, which are set by the writers and not copied from the metadata.
+    """
+    return key in _structural_keys or ( key.startswith ( "NAXIS" ) and key [ 5 : ].isdigit ( ) )
+
+def _card_value ( value ):
+    """
+    This function's goal is to convert a metadata value into a value astropy accepts in a header card.
+    """
+    if isinstance ( value, numpy.generic ):
+        value = value.item ( )
+    if isinstance ( value, bytes ):
+        value = value.decode ( "utf-8", "replace" )
+    if not isinstance ( value, ( bool, int, float, complex, str ) ):
+        value = str ( value )
+    return value
+
+def _build_header ( metadata, header = None ):
+    """
+    This function's goal is to convert a metadata dictionary into FITS header cards.
+
+    Scalar entries become cards. Sequence entries become a card with their value when all their values are equal; otherwise, with their values joined by commas, as a (possibly long) string card. write_metadata_table ( ) also stores them as typed columns. Keys longer than 8 characters are truncated, and the original key is appended to the card's comment.
+
+    Parameters:
+
+    * metadata : dictionary
+        Entries are stored as key : ( value, comment ).
+
+    * header : astropy.io.fits.Header : defaults to None
+        The header where cards are appended. If None, a new header is created.
+
+    Returns:
+
+    * header : astropy.io.fits.Header
+    """
+    log = logging.getLogger ( __name__ )
+    if header is None:
+        header = astrofits.Header ( )
+    if not metadata:
+        return header
+
+    for key in metadata.keys ( ):
+        value = metadata [ key ] [ 0 ]
+        comment = metadata [ key ] [ 1 ]
+        if numpy.ndim ( value ) > 0:
+            distinct_values = numpy.unique ( numpy.asarray ( value ) )
+            if distinct_values.size == 1:
+                value = distinct_values [ 0 ]
+            else:
+                log.debug ( "Metadata {} has {} distinct values, joining them in a single card.".format (
+                    key, distinct_values.size ) )
+                value = ", ".join ( [ str ( _card_value ( entry ) ) for entry in value ] )
+
+        if len ( key ) > 8:
+            fits_key = key [ : 8 ]
+            comment += "original key = " + key
+        else:
+            fits_key = key
+        fits_key = fits_key.replace ( ' ', '_' )
+        if _is_structural_key ( fits_key.upper ( ) ):
+            continue
+        header.append ( astrofits.Card ( fits_key, _card_value ( value ), comment ) )
+    return header
+
+def _table_hdu ( columns ):
+    """
+    This function's goal is to build a binary table HDU from columnar data, in a single operation.
+
+    The column formats are derived from the dtypes of the arrays: unicode columns are stored as UTF-8 byte strings, and int8 columns as int16 (FITS has no signed byte columns).
+
+    Parameters:
+
+    * columns : dictionary
+        Each key is a column name, associated with a numpy.ndarray. All arrays must have the same length.
+
+    Returns:
+
+    * unnamed variable : astropy.io.fits.BinTableHDU
+    """
+    arrays = [ ]
+    for key in columns.keys ( ):
+        column = numpy.asarray ( columns [ key ] )
+        if column.dtype.kind == 'U':
+            column = numpy.char.encode ( column, "utf-8" )
+        elif column.dtype == numpy.int8:
+            column = column.astype ( numpy.int16 )
+        arrays.append ( column )
+    records = numpy.rec.fromarrays ( arrays, names = [ str ( key ) for key in columns.keys ( ) ] )
+    return astrofits.BinTableHDU.from_columns ( records )
+
+def _prefixed_file_name ( prefix, file_name ):
+    """
+    This function's goal is to add a prefix to the base name of a path.
+    """
+    directory, base_name = os.path.split ( file_name )
+    return os.path.join ( directory, prefix + base_name )
+
+class fits_plane_writer ( object ):
+    """
+    This class' responsibility is to write a FITS file a plane at a time, so that large cubes never need to be held in memory.
+
+    The header, with the final dimensions, is written when the object is created; planes are then appended in order, and the file is complete when the last plane is written.
+
+    Its constructor signature is:
+
+    Parameters:
+
+    * file_name : string
+        Contains a valid path for a yet non-existing file.
+
+    * shape : tuple of integers
+        The shape of the complete array, in numpy order ( planes, rows, cols ). For 2D arrays, each "plane" is a row.
+
+    * dtype : numpy.dtype
+        One of uint8, int16, int32, int64, float32, float64, uint16 or uint32; unsigned 16 and 32 bits data is stored with the usual BZERO offset.
+
+    * metadata : dictionary : defaults to None
+        Contains metadata to be written as FITS header cards (see _build_header).
+
+    Example::
+
+        import tuna
+        import numpy
+
+        with tuna.io.fits_plane_writer ( file_name = "model.fits",
+                                         shape = ( 36, 512, 512 ),
+                                         dtype = numpy.float32 ) as writer:
+            for plane in range ( 36 ):
+                writer.write ( numpy.full ( ( 512, 512 ), plane, dtype = numpy.float32 ) )
+    """
+    def __init__ ( self, file_name, shape, dtype, metadata = None ):
+        super ( fits_plane_writer, self ).__init__ ( )
+        self.log = logging.getLogger ( __name__ )
+
+        self.__file_name = file_name
+        self.__shape = tuple ( int ( length ) for length in shape )
+        self.__dtype = numpy.dtype ( dtype )
+        if self.__dtype.name not in _bitpix_per_dtype:
+            raise TypeError ( "FITS images cannot store dtype {}.".format ( self.__dtype ) )
+        if os.path.exists ( file_name ):
+            raise OSError ( "File '{}' already exists.".format ( file_name ) )
+        bitpix, self.__bzero = _bitpix_per_dtype [ self.__dtype.name ]
+
+        header = astrofits.Header ( )
+        header [ "SIMPLE" ] = True
+        header [ "BITPIX" ] = bitpix
+        header [ "NAXIS" ] = len ( self.__shape )
+        for axis in range ( len ( self.__shape ) ):
+            header [ "NAXIS{}".format ( axis + 1 ) ] = self.__shape [ - 1 - axis ]
+        header [ "EXTEND" ] = True
+        if self.__bzero is not None:
+            header [ "BSCALE" ] = 1
+            header [ "BZERO" ] = self.__bzero
+        _build_header ( metadata, header )
+
+        self.__planes = self.__shape [ 0 ] if len ( self.__shape ) > 0 else 0
+        self.__written = 0
+        self.__stream = astrofits.StreamingHDU ( file_name, header )
+
+    def __enter__ ( self ):
+        return self
+
+    def __exit__ ( self, exception_type, exception_value, traceback ):
+        self.close ( )
+
+    def close ( self ):
+        """
+        This method's goal is to close the file. If fewer planes than the shape describes were written, the file is left incomplete, and an error is logged.
+        """
+        if self.__stream is None:
+            return
+        if self.__written != self.__planes:
+            self.log.error ( "File {} closed after {} of {} planes.".format (
+                self.__file_name, self.__written, self.__planes ) )
+        self.__stream.close ( )
+        self.__stream = None
+
+    def get_written_planes ( self ):
+        """
+        This method's goal is to access the number of planes written so far.
+
+        Returns:
+
+        * self.__written : integer
+        """
+        return self.__written
+
+    def write ( self, data ):
+        """
+        This method's goal is to append one plane, or a block of consecutive planes, to the file.
+
+        Parameters:
+
+        * data : numpy.ndarray
+            Either a single plane, with shape shape [ 1 : ], or a block of planes, with shape ( n, ) + shape [ 1 : ]. It is converted to the writer's dtype if needed.
+
+        Returns:
+
+        * unnamed variable : bool
+            True when the file is complete.
+        """
+        if self.__stream is None:
+            raise OSError ( "File {} is closed.".format ( self.__file_name ) )
+        data = numpy.asarray ( data )
+        if data.shape == self.__shape [ 1 : ]:
+            data = data [ numpy.newaxis ]
+        if data.shape [ 1 : ] != self.__shape [ 1 : ]:
+            raise ValueError ( "Planes of shape {} cannot be written to an array of shape {}.".format (
+                data.shape [ 1 : ], self.__shape ) )
+        if self.__written + data.shape [ 0 ] > self.__planes:
+            raise ValueError ( "Writing {} planes would exceed the {} planes of the file.".format (
+                data.shape [ 0 ], self.__planes ) )
+
+        data = numpy.ascontiguousarray ( data, dtype = self.__dtype.newbyteorder ( ">" ) )
+        if self.__bzero is not None:
+            # Flipping the sign bit subtracts BZERO, mapping the values onto the type FITS stores: signed integers, or unsigned bytes.
+            bits = numpy.dtype ( ">u{}".format ( self.__dtype.itemsize ) )
+            if self.__dtype.itemsize == 1:
+                stored = bits
+            else:
+                stored = numpy.dtype ( ">i{}".format ( self.__dtype.itemsize ) )
+            sign_bit = numpy.array ( 1 << ( 8 * self.__dtype.itemsize - 1 ), dtype = bits )
+            data = ( data.view ( bits ) ^ sign_bit ).astype ( bits ).view ( stored )
+        self.__stream.write ( data )
+        self.__written += data.shape [ 0 ]
+        return self.__written == self.__planes
+
 class fits ( file_reader ):
     """
     This class' responsibility is to operate on FITS files.
@@ -38,6 +286,12 @@ class fits ( file_reader ):
     * photons : dictionary : defaults to None
         Contains the table of photon counts and positions. It is either supplied to be saved to a file, or generated from the data on a file.
 
+    * memmap : bool : defaults to False
+        If True, read ( ) opens the file memory-mapped, and keeps it open until close ( ) is called, so that the data is only read from disk as it is accessed.
+
+    * workers : integer : defaults to None
+        The number of threads used to read the panels of a mosaic. If None, one thread per CPU is used.
+
     Example::
 
         import tuna
@@ -55,15 +309,22 @@ class fits ( file_reader ):
     def __init__ ( self, 
                    array = None, 
                    file_name = None, 
-                   metadata = { },
-                   photons = None ):
+                   metadata = None,
+                   photons = None,
+                   memmap = False,
+                   workers = None ):
         super ( fits, self ).__init__ ( )
         self.log = logging.getLogger ( __name__ )
 
+        if metadata is None:
+            metadata = { }
         self.__file_name = file_name
         self.__array = array
         self.__metadata = metadata
         self.__photons = photons
+        self.__memmap = memmap
+        self.__workers = workers
+        self.__hdu_list = None
 
     def get_array ( self ):
         """
@@ -87,79 +348,84 @@ class fits ( file_reader ):
         """        
         return self.__metadata
 
+    def close ( self ):
+        """
+        This method's goal is to close the file opened by read ( ). When the file was read with memmap = True, the array must not be used after the file is closed.
+        """
+        if self.__hdu_list is not None:
+            self.__hdu_list.close ( )
+            self.__hdu_list = None
+
     def read ( self ):
         """
         This method's goal is to read the file specified in the constructor's file_name as a FITS file.
 
         It will inspect the FITS header and try to do the "best thing" according to how many image HDU lists it finds; if there is only one list, that will be the data. If there are multiple lists, and these lists can be arranged as a mosaic (i.e., there are a "quadratic" number of images - 4, 9, 25, etc) they will. This is done in a counter-clockwise order, if we assume the 0th row and column is the top left of the image.
+
+        HDUs are loaded lazily: their headers are parsed to find the image HDUs and their shapes, and data is only read for the HDUs that compose the result. The data keeps the dtype it has in the file (after the FITS scaling, if any). When the object was created with memmap = True, a single image is returned as a memory-mapped array, and mosaics are assembled into an array preallocated with the dtype of the panels.
         """
         self.log.debug ( tuna.log.function_header ( ) )
-        found = False
 
         if self.__file_name == None:
             self.log.debug ( "No file_name for FITS read." )
             self._is_readable = False
+            return
 
         self.log.debug ( "Trying to read file %s as FITS file." % self.__file_name )
         try:
             with warnings.catch_warnings ( ):
                 warnings.simplefilter ( "error" )
-                hdu_list = astrofits.open ( self.__file_name )
+                hdu_list = astrofits.open ( self.__file_name,
+                                            memmap = self.__memmap,
+                                            lazy_load_hdus = True )
             self.log.debug ( "File %s opened as a FITS file." % self.__file_name )
 
-            # The file might have many HDU lists. If there are no arrays, then the file is invalid.
-            hdu_info = hdu_list.info ( output = False )
-            self.log.debug ( "hdu_info = {}".format ( hdu_info ) )
-            if len ( hdu_info ) == 1:
-                self.__array = hdu_list [ 0 ].data
-                found = True
-                
-            invalid_flag = True
-            for entry in hdu_info:
-                if entry [ 4 ] != ( ):
-                    invalid_flag = False
-                    break
-            if not found and invalid_flag:
+            # The file might have many HDU lists; only images with dimensions are candidates for the data.
+            possible_arrays = [ ]
+            shapes = { }
+            for entry_index, hdu in enumerate ( hdu_list ):
+                if not isinstance ( hdu, ( astrofits.PrimaryHDU,
+                                           astrofits.ImageHDU,
+                                           astrofits.CompImageHDU ) ):
+                    continue
+                naxis = hdu.header.get ( "NAXIS", 0 )
+                if naxis == 0:
+                    continue
+                possible_arrays.append ( entry_index )
+                shapes [ entry_index ] = tuple ( hdu.header [ "NAXIS{}".format ( axis ) ] for axis in range ( naxis, 0, -1 ) )
+            self.log.debug ( "Image HDUs: {}".format ( shapes ) )
+
+            if len ( possible_arrays ) == 0:
                 self.log.error ( "File is invalid: no dimensions found in its HDU list." )
+                hdu_list.close ( )
                 return
 
             # If the file has a single array, that is its data.
-            possible_arrays = [ ]
-            for entry_index in range ( len ( hdu_info ) ):
-                if hdu_info [ entry_index ] [ 4 ] != ( ):
-                    possible_arrays.append ( entry_index )
+            self.__array = None
             if len ( possible_arrays ) == 1:
                 self.__array = hdu_list [ possible_arrays [ 0 ] ].data
 
             # If the file has several arrays, then possibly a mosaic is its data.
-            if not found and len ( possible_arrays ) % 4 == 0:
+            else:
+                multiplier = int ( round ( math.sqrt ( len ( possible_arrays ) ) ) )
+                common_shape = shapes [ possible_arrays [ 0 ] ]
                 mosaic = True
-                common_ndims = hdu_info [ possible_arrays [ 0 ] ] [ 4 ]
+                if multiplier * multiplier != len ( possible_arrays ):
+                    self.log.info ( "Cannot build a mosaic since the number of HDU lists is not a square." )
+                    mosaic = False
                 for entry_index in possible_arrays:
-                    if hdu_info [ entry_index ] [ 4 ] != common_ndims:
+                    if shapes [ entry_index ] != common_shape:
                         self.log.info ( "Cannot build a mosaic since HDU lists have different sizes." )
                         mosaic = False
+                        break
+                if len ( common_shape ) != 2:
+                    self.log.info ( "Cannot build a mosaic since HDU lists are not 2D images." )
+                    mosaic = False
                 if mosaic:
                     self.log.debug ( "Creating a mosaic from the multiple HDU lists of the file." )
-                    multiplier = math.sqrt ( len ( possible_arrays ) )
-                    cols = common_ndims [ 1 ] * multiplier
-                    rows = common_ndims [ 0 ] * multiplier
-                    self.__array = numpy.zeros ( shape = ( cols, rows ) )
-                    cursor_col = 0
-                    cursor_row = 0
-                    for entry in possible_arrays:
-                        self.log.debug ( "Adding HDU list {} to position ( {}, {} ).".format (
-                            entry, cursor_col, cursor_row ) )
-                        self.log.debug ( "Splicing array {} into {}, {}".format (
-                            hdu_list [ entry ].data.shape, cursor_col, cursor_row ) )
-                        self.__array [ cursor_col : cursor_col + common_ndims [ 1 ],
-                                       cursor_row : cursor_row + common_ndims [ 0 ] ] = hdu_list [ entry ].data
-                        cursor_row += common_ndims [ 0 ]
-                        if cursor_row >= common_ndims [ 0 ] * multiplier:
-                            cursor_row = 0
-                            cursor_col += common_ndims [ 1 ]
+                    self.__array = self._read_mosaic ( possible_arrays, common_shape, multiplier )
                 
-            if type ( self.__array ) == None:
+            if self.__array is None:
                 if len ( possible_arrays ) > 1:
                     self.log.error ( "File has several distinct entries for data, and Tuna doesn't know how to parse it." )
                 self.log.error ( "Data section of the file is None!" )
@@ -170,27 +436,72 @@ class fits ( file_reader ):
             metadata = { }
             for entry in possible_arrays:
                 self.log.debug ( "Processing header for hdu_list [ {} ].".format ( entry ) )
-                for key in hdu_list [ entry ].header.keys ( ):
-                    metadata_value   = hdu_list [ entry ].header [ key ]
-                    metadata_comment = hdu_list [ entry ].header.comments [ key ]
-                    if key in list ( self.__metadata.keys ( ) ):
-                        if ( metadata_value, metadata_comment ) == self.__metadata [ key ]:
+                header = hdu_list [ entry ].header
+                for key in header.keys ( ):
+                    metadata_value   = header [ key ]
+                    metadata_comment = header.comments [ key ]
+                    if key in metadata:
+                        if ( metadata_value, metadata_comment ) == metadata [ key ]:
                             self.log.debug ( "Ignoring duplicated metadata entry with key {}.".format ( key ) )
                             continue
                         else:
-                            self.log.warning ( "Replacing metadata {} : ( {}, {} ) with new entry ( {}, {} ).".format ( key, self.__metadata [ key ] [ 0 ], self.__metadata [ key ] [ 1 ], metadata_value, metadata_comment ) )
-                    self.__metadata [ key ] = ( metadata_value, metadata_comment )
+                            self.log.warning ( "Replacing metadata {} : ( {}, {} ) with new entry ( {}, {} ).".format ( key, metadata [ key ] [ 0 ], metadata [ key ] [ 1 ], metadata_value, metadata_comment ) )
+                    metadata [ key ] = ( metadata_value, metadata_comment )
                     self.log.debug ( "{}: value = {}, comment = {}.".format ( key, metadata_value, metadata_comment ) )
-                
+            self.__metadata = metadata
+
+            if self.__memmap:
+                self.__hdu_list = hdu_list
+            else:
+                hdu_list.close ( )
             self._is_readable = True
         except OSError as e:
             self.log.error ( "OSError: %s." % e )
             self._is_readable = False
 
+    def _read_mosaic ( self, panels, panel_shape, multiplier ):
+        """
+        This method's goal is to assemble the 2D images of several HDUs into a single mosaic.
+
+        Panels are placed from left to right and then from top to bottom. The mosaic is allocated once, with the dtype of the first panel (in native byte order), and the panels are read, decompressed and copied into their slots by a pool of threads (see tuna.io.mosaic).
+
+        Parameters:
+
+        * panels : list of integers
+            The indexes of the HDUs, in mosaic order.
+
+        * panel_shape : tuple of 2 integers
+            The shape of each panel's data.
+
+        * multiplier : integer
+            The number of panels along each side of the mosaic.
+
+        Returns:
+
+        * unnamed variable : numpy.ndarray
+        """
+        self.log.debug ( tuna.log.function_header ( ) )
+
+        jobs = [ ]
+        for position, entry in enumerate ( panels ):
+            cursor_col = ( position // multiplier ) * panel_shape [ 0 ]
+            cursor_row = ( position % multiplier ) * panel_shape [ 1 ]
+            self.log.debug ( "Adding HDU list {} to position ( {}, {} ).".format (
+                entry, cursor_col, cursor_row ) )
+            jobs.append ( ( ( slice ( cursor_col, cursor_col + panel_shape [ 0 ] ),
+                              slice ( cursor_row, cursor_row + panel_shape [ 1 ] ) ),
+                            ( self.__file_name, entry ) ) )
+        return assemble_mosaic ( jobs,
+                                 shape = ( panel_shape [ 0 ] * multiplier,
+                                           panel_shape [ 1 ] * multiplier ),
+                                 workers = self.__workers )
+
     def write ( self, file_name = None ):
         """
         This method's goal is to write the object's current array and metadata as a FITS file named file_name.
 
+        The array is written a plane at a time, by a fits_plane_writer, so that memory-mapped or lazily computed arrays are never copied as a whole.
+
         Parameters:
 
         * file_name: string
@@ -199,49 +510,27 @@ class fits ( file_reader ):
         self.log.debug ( tuna.log.function_header ( ) )
 
         if self.__file_name:
-            header = astrofits.Header ( )
-            if self.__metadata:
-                columns = { }
-                key_list = [ ]
-                for key in self.__metadata.keys ( ):
-                    comment  = self.__metadata [ key ] [ 1 ]
-                    value = ""
-                    for metadata_value in self.__metadata [ key ] [ 0 ]:
-                        if ( value == "" ):
-                            value += str ( metadata_value )
-                        else:
-                            value += ", " + str ( metadata_value )
-
-                    if len ( key ) > 8:
-                        fits_key = key [ : 8 ]
-                        comment += "original key = " + key
-                    else:
-                        fits_key = key
-
-                    fits_key = fits_key.replace ( ' ', '_' )
-                    
-                    self.log.debug ( "fits_key = %s" % fits_key )
-                    self.log.debug ( "len ( value ) = %d" % len ( value ) )
-                    self.log.debug ( "len ( comment ) = %d" % len ( comment ) )
-
-                    card = astrofits.Card ( fits_key, value, comment )
-                    self.log.debug ( "str ( card ) = %s" % str ( card ) )
-                    header.append ( card )
-
-            hdu = astrofits.PrimaryHDU ( self.__array, header )
-            hdu_list = astrofits.HDUList ( [ hdu ] )
+            array = numpy.asarray ( self.__array )
             try:
-                hdu_list.writeto ( self.__file_name )
+                with fits_plane_writer ( file_name = self.__file_name,
+                                         shape = array.shape,
+                                         dtype = array.dtype,
+                                         metadata = self.__metadata ) as writer:
+                    if array.ndim < 2:
+                        writer.write ( array )
+                    else:
+                        for plane in range ( array.shape [ 0 ] ):
+                            writer.write ( array [ plane ] )
             except OSError as e:
-                if e == "File '" + self.__file_name + "' already exists.":
-                    self.log.error ( "File %s already exists." % self.__file_name )
-                    sys.exit ( 1 )
+                self.log.error ( "OSError: {}".format ( e ) )
 
     def write_metadata_table ( self ):
         """
         This method's goal is to write the object's metadata as a FITS table file.
 
-        It will write the file at the path "metadata\_" + self.__file_name.
+        Metadata entries whose values are sequences with more than one distinct value (such as the records of an ADT file) are written as typed columns of a binary table; the other entries are written as header cards by write ( ). Entries whose length differs from the longest sequence are not written.
+
+        It will write the file with the base name of self.__file_name prefixed by "metadata\_".
         """
         self.log.debug ( tuna.log.function_header ( ) )
 
@@ -251,60 +540,35 @@ class fits ( file_reader ):
         columns = { }
         for key in self.__metadata.keys ( ):
             values = self.__metadata [ key ] [ 0 ]
-            distinct_values = set ( values )
-            if ( len ( distinct_values ) > 2 ):
-                self.log.debug ( "More than 2 distinct values: %s." % str ( distinct_values ) )
-                format_string = "A21"
-                columns [ key ] = ( values, format_string )
-
-        fits_columns = [ ]
-        for key in columns.keys ( ):
-            fits_columns . append ( astrofits . Column ( name = key, 
-                                                         array  = columns [ key ] [ 0 ], 
-                                                         format = columns [ key ] [ 1 ] ) )
-
-        fits_columns_definition = astrofits . ColDefs ( fits_columns )
-        # The new_table method will be deprecated, when it is, use the commented line below.
-        fits_table_hdu = astrofits . new_table ( fits_columns_definition )                
-        #fits_table_hdu = astrofits . BinTableHDU . from_columns ( fits_columns_definition )
-        primary_hdu = astrofits.PrimaryHDU ( )
-        hdu_list = astrofits.HDUList ( [ primary_hdu, fits_table_hdu ] )
-        hdu_list.writeto ( "metadata_" + self.__file_name )
+            if numpy.ndim ( values ) != 1:
+                continue
+            values = numpy.asarray ( values )
+            if numpy.unique ( values ).size > 1:
+                columns [ key ] = values
+        if not columns:
+            return
+        length = max ( column.size for column in columns.values ( ) )
+        for key in list ( columns.keys ( ) ):
+            if columns [ key ].size != length:
+                self.log.debug ( "Metadata {} has {} values, expected {}; not written.".format (
+                    key, columns [ key ].size, length ) )
+                del columns [ key ]
+
+        hdu_list = astrofits.HDUList ( [ astrofits.PrimaryHDU ( ), _table_hdu ( columns ) ] )
+        hdu_list.writeto ( _prefixed_file_name ( "metadata_", self.__file_name ) )
 
     def write_photons_table ( self ):
         """
         This method's goal is to write the object's photons dictionary as a FITS table file.
 
-        It will write the file at the path "photons\_" + self.__file_name.
+        The photons dictionary is expected to be columnar, as returned by tuna.io.adhoc_ada.ada.get_photons ( ) or built by tuna.io.can.convert_ndarray_into_table ( ): each key is written as a column, with the dtype of its numpy.ndarray.
+
+        It will write the file with the base name of self.__file_name prefixed by "photons\_".
         """
         self.log.debug ( tuna.log.function_header ( ) )
 
-        if self.__photons == None:
+        if self.__photons is None:
             return
 
-        columns = { }
-        columns [ 'channel' ] = [ [ ], "I2" ]
-        columns [ 'x' ]       = [ [ ], "I3" ]
-        columns [ 'y' ]       = [ [ ], "I3" ]
-        columns [ 'photons' ] = [ [ ], "I5" ]
-
-        for entry in self.__photons:
-            columns [ 'channel' ] [ 0 ] .append ( self.__photons [ entry ] [ 'channel' ] )
-            columns [ 'x' ]       [ 0 ] .append ( self.__photons [ entry ] [ 'x'       ] )
-            columns [ 'y' ]       [ 0 ] .append ( self.__photons [ entry ] [ 'y'       ] )
-            columns [ 'photons' ] [ 0 ] .append ( self.__photons [ entry ] [ 'photons' ] )
-
-        
-        fits_columns = [ ]
-        for key in columns.keys ( ):
-            fits_columns . append ( astrofits . Column ( name = key, 
-                                                         array  = columns [ key ] [ 0 ], 
-                                                         format = columns [ key ] [ 1 ] ) )
-
-        fits_columns_definition = astrofits . ColDefs ( fits_columns )
-        # The new_table method will be deprecated, when it is, use the commented line below.
-        fits_table_hdu = astrofits . new_table ( fits_columns_definition )                
-        #fits_table_hdu = astrofits . BinTableHDU . from_columns ( fits_columns_definition )
-        primary_hdu = astrofits.PrimaryHDU ( )
-        hdu_list = astrofits.HDUList ( [ primary_hdu, fits_table_hdu ] )
-        hdu_list.writeto ( "photons_" + self.__file_name )
+        hdu_list = astrofits.HDUList ( [ astrofits.PrimaryHDU ( ), _table_hdu ( self.__photons ) ] )
+        hdu_list.writeto ( _prefixed_file_name ( "photons_", self.__file_name ) )
@@ -3,7 +3,90 @@ This module's scope covers the operations related to metadata.
 """
 
 import logging
+import numpy
 import re
+import sys
+
+_adt_record_regex = re.compile (
+    r"^==>[ \t]*Beginning channel=[ \t]*(?P<channel>-?\d+) at[ \t]*(?P<start_time>\S+)[ \t]*\n"
+    r"Was acquired at[ \t]*(?P<end_time>\d+:\d+:\d+):[ \t]*ch=[ \t]*-?\d+[ \t]+cy=[ \t]*(?P<cycle>\d+)"
+    r"[ \t]+QGval=[ \t]*(?P<queensgate>-?\d+)[ \t]+ph=[ \t]*(?P<photons>\d+)[ \t]+fr=[ \t]*(?P<fr>\d+)[ \t]*\n"
+    r"Cumulated exp=[ \t]*(?P<exposure>\S+)[ \t]+phot=[ \t]*(?P<cumulated_photons>\d+)"
+    r"[ \t]+efficiency=[ \t]*(?P<efficiency>\d+)[ \t]*%[ \t]+disk=[ \t]*(?P<disk>[-.\d]+)[ \t]*Mb[ \t]*\n"
+    r"THT=[ \t]*(?P<THT>\d+)v[ \t]+shutter=[ \t]*(?P<shutter>.*?)[ \t]+discri=[ \t]*(?P<discri>\d+)"
+    r"[ \t]+BlackLevel=[ \t]*(?P<blacklevel>\d+)[ \t]+Whitelevel=[ \t]*(?P<whitelevel>\d+)",
+    re.MULTILINE )
+
+_adt_record_columns = [ ( "channel",            "channel",           numpy.int64 ),
+                        ( "cycle",              "cycle",             numpy.int64 ),
+                        ( "start time",         "start_time",        str ),
+                        ( "end time",           "end_time",          str ),
+                        ( "Queensgate value",   "queensgate",        numpy.int64 ),
+                        ( "photon count",       "photons",           numpy.int64 ),
+                        ( "fr",                 "fr",                numpy.int64 ),
+                        ( "cumulated exposure", "exposure",          str ),
+                        ( "cumulated photons",  "cumulated_photons", numpy.int64 ),
+                        ( "efficiency",         "efficiency",        numpy.int64 ),
+                        ( "disk usage",         "disk",              numpy.float64 ),
+                        ( "THT",                "THT",               numpy.int64 ),
+                        ( "shutter",            "shutter",           str ),
+                        ( "discri",             "discri",            numpy.int64 ),
+                        ( "blacklevel",         "blacklevel",        numpy.int64 ),
+                        ( "whitelevel",         "whitelevel",        numpy.int64 ) ]
+
+def parse_adt ( file_name ):
+    """
+    This function's goal is to parse an ADT file in a single pass.
+
+    The file is read once; its header lines are parsed into a dictionary, and the records describing each acquired channel (the blocks starting with "==>") are matched with a compiled regular expression and stored as columns.
+
+    Parameters:
+
+    * file_name : string
+        Full or relative path and file name for an ADT file.
+
+    Returns:
+
+    * header : dictionary
+        Each header entry is stored as key : ( value, comment ). Header lines of the form "key = value" or "key : value" are split on the separator, other lines are stored as keys with an empty value. The notes section is stored under the key "ADT notes".
+
+    * records : dictionary
+        Each key is the name of a record field ("channel", "cycle", "start time", "end time", "Queensgate value", "photon count", "fr", "cumulated exposure", "cumulated photons", "efficiency", "disk usage", "THT", "shutter", "discri", "blacklevel", "whitelevel"), and its value is a numpy.ndarray with one entry per record. The records are ordered by cycle, and in file order within a cycle.
+    """
+    with open ( file_name, "r" ) as adt:
+        text = adt.read ( )
+
+    header = { }
+    notes = ""
+    in_notes = False
+    for line in text.splitlines ( ):
+        if line.startswith ( "==>" ):
+            break
+        if line.startswith ( "-------------------------" ):
+            in_notes = True
+            continue
+        if in_notes:
+            notes += line.strip ( )
+            continue
+        if "=" in line:
+            key, value = line.split ( "=", 1 )
+        elif " : " in line:
+            key, value = line.split ( " : ", 1 )
+        else:
+            key, value = line.replace ( "\t", " " ), ""
+        header [ key.strip ( ) ] = ( value.strip ( ), "" )
+    header [ "ADT notes" ] = ( notes, "" )
+
+    matches = [ match.groupdict ( ) for match in _adt_record_regex.finditer ( text ) ]
+    records = { }
+    for parameter, group, column_type in _adt_record_columns:
+        records [ parameter ] = numpy.array ( [ match [ group ] for match in matches ] ).astype ( column_type )
+
+    order = numpy.argsort ( records [ "cycle" ], kind = "mergesort" )
+    for parameter in records.keys ( ):
+        records [ parameter ] = records [ parameter ] [ order ]
+
+    return header, records
 
 class metadata_parser ( object ):
     """
@@ -18,11 +101,12 @@ class metadata_parser ( object ):
     """
     def __init__ ( self, file_name = None ):
         super ( metadata_parser, self ).__init__ ( )
-        self.__version__ = "0.1.0"
+        self.__version__ = "0.2.0"
         self.changelog = {
+            "0.2.0" : "Tuna 0.16.4 : single-pass, columnar parsing of ADT files.",
             "0.1.0" : "Tuna 0.14.0 : updated docstrings to new style.",
             }
-        
+
         self.log = logging.getLogger ( __name__ )
 
         self.__file_name = file_name
@@ -35,12 +119,23 @@ class metadata_parser ( object ):
         This method's goal is to access the parsed metadata.
 
         Returns:
-        
+
         * self.__results : dictionary
             Contains the metadata obtained from reading the input file.
         """
         return self.__results
 
+    def read_adt_metadata ( self ):
+        """
+        This method's goal is to parse the metadata of an ADT file, using parse_adt ( ).
+
+        Header entries and record columns are both stored in self.__results, as key : ( value, comment ) pairs.
+        """
+        header, records = parse_adt ( self.__file_name )
+        self.__results = header
+        for parameter in records.keys ( ):
+            self.__results [ parameter ] = ( records [ parameter ], "" )
+
     def run ( self ):
         """
         This method's goal is to verify file format and attempts to parse the metadata accordingly.
@@ -53,7 +148,7 @@ class metadata_parser ( object ):
                  self.__file_name.startswith ( ".adt", -4 ) ):
                 self.read_adt_metadata ( )
         else:
-            self.log ( "File name %s does not have .ADT or .adt suffix, aborting." % ( self.__file_name ) )
+            self.log.warning ( "File name %s does not have .ADT or .adt suffix, aborting." % ( self.__file_name ) )
 
 def get_metadata ( file_name = None ):
     """
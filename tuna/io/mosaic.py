@@ -0,0 +1,127 @@
+"""
+This module's scope covers the parallel assembly of mosaics from the extensions of FITS files.
+
+Reading a mosaic is a sequence of independent jobs: each panel is read (and, for tile-compressed HDUs, decompressed) from its file, and copied into its own slot of the output array. assemble_mosaic ( ) runs these jobs on a pool of workers; since the slots do not overlap, the panels are written into the shared output array without locking.
+
+Example::
+
+    >>> import numpy
+    >>> import tuna
+    >>> jobs = [ ( ( slice ( 0, 512 ), slice ( 0, 512 ) ), ( "mosaic.fits", 1 ) ),
+    ...          ( ( slice ( 0, 512 ), slice ( 512, 1024 ) ), ( "mosaic.fits", 2 ) ) ]
+    >>> mosaic = tuna.io.assemble_mosaic ( jobs, shape = ( 512, 1024 ) )
+"""
+__version__ = "0.1.0"
+__changelog__ = {
+    "0.1.0" : { "Tuna" : "0.16.4", "Change" : "Initial version." }
+    }
+
+import astropy.io.fits as astrofits
+import concurrent.futures
+import logging
+import numpy
+import os
+
+log = logging.getLogger ( __name__ )
+
+def read_fits_panel ( file_name, extension ):
+    """
+    This function's goal is to read the data of one extension of a FITS file.
+
+    The file is opened by each call, so that calls from different workers do not share astropy objects.
+
+    Parameters:
+
+    * file_name : string
+
+    * extension : integer
+        The index of the HDU in the file.
+
+    Returns:
+
+    * unnamed variable : numpy.ndarray
+        The data of the HDU, decompressed and scaled by astropy.
+    """
+    with astrofits.open ( file_name, memmap = False, lazy_load_hdus = True ) as hdu_list:
+        return hdu_list [ extension ].data
+
+def _default_workers ( ):
+    """
+    This function's goal is to choose the size of the pool, when it is not specified by the caller.
+    """
+    return os.cpu_count ( ) or 1
+
+def assemble_mosaic ( jobs,
+                      read_panel = read_fits_panel,
+                      output = None,
+                      shape = None,
+                      workers = None,
+                      use_processes = False ):
+    """
+    This function's goal is to read several panels on a pool of workers, and copy each one into its slot of a single output array.
+
+    Parameters:
+
+    * jobs : list of tuples
+        Each entry is a pair ( slot, source ): slot is a tuple of indexes (typically slices) into the output array, and source is a tuple of arguments for read_panel.
+
+    * read_panel : callable : defaults to read_fits_panel
+        Called as read_panel ( *source ), it must return the data for the slot. With use_processes = True, it must be a module-level function, so that it can be sent to the worker processes.
+
+    * output : numpy.ndarray : defaults to None
+        The array where panels are written. If None, it is allocated with the given shape and with the dtype of the first panel, in native byte order.
+
+    * shape : tuple of integers : defaults to None
+        The shape of the output array; only used when output is None.
+
+    * workers : integer : defaults to None
+        The number of workers in the pool. If None, one worker per CPU is used. With a single worker, or a single job, panels are read in the caller's thread.
+
+    * use_processes : bool : defaults to False
+        If False, panels are read by a pool of threads and written into the output array by the threads themselves; numpy and astropy release the GIL during most of the decoding. If True, panels are read by a pool of processes and copied into the output array by the caller, as they arrive.
+
+    Returns:
+
+    * output : numpy.ndarray
+        The assembled array.
+    """
+    jobs = list ( jobs )
+    if output is None:
+        if shape is None:
+            raise ValueError ( "Either output or shape must be specified." )
+        if len ( jobs ) == 0:
+            raise ValueError ( "Cannot determine the dtype of a mosaic without panels." )
+        # The first panel determines the dtype of the mosaic.
+        slot, source = jobs [ 0 ]
+        data = read_panel ( *source )
+        output = numpy.empty ( shape = shape, dtype = data.dtype.newbyteorder ( "=" ) )
+        output [ slot ] = data
+        jobs = jobs [ 1 : ]
+
+    if workers is None:
+        workers = _default_workers ( )
+    workers = max ( 1, min ( workers, len ( jobs ) ) )
+    log.debug ( "Assembling {} panels with {} {}.".format (
+        len ( jobs ), workers, "processes" if use_processes else "threads" ) )
+
+    if workers == 1:
+        for slot, source in jobs:
+            output [ slot ] = read_panel ( *source )
+        return output
+
+    if use_processes:
+        with concurrent.futures.ProcessPoolExecutor ( max_workers = workers ) as executor:
+            futures = { executor.submit ( read_panel, *source ) : slot for slot, source in jobs }
+            for future in concurrent.futures.as_completed ( futures ):
+                output [ futures [ future ] ] = future.result ( )
+        return output
+
+    def place_panel ( slot, source ):
+        output [ slot ] = read_panel ( *source )
+
+    with concurrent.futures.ThreadPoolExecutor ( max_workers = workers ) as executor:
+        futures = [ executor.submit ( place_panel, slot, source ) for slot, source in jobs ]
+        for future in concurrent.futures.as_completed ( futures ):
+            # Re-raises the exceptions from the workers.
+            future.result ( )
+    return output
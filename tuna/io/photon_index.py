@@ -0,0 +1,277 @@
+"""
+This module's scope covers the time-resolved index of the photons of an ADHOC ADT acquisition.
+
+The index keeps, for each ADA file of the acquisition, the cycle and channel it belongs to, its acquisition times and the positions of its photons. Cubes restricted to some cycles, or to a time window, can then be rebuilt from the index without reading the ADA files again.
+"""
+__version__ = "0.1.0"
+__changelog__ = {
+    "0.1.0" : { "Tuna" : "0.16.4", "Change" : "Initial version." }
+    }
+
+import logging
+import numpy
+from os.path import dirname, join
+import tuna
+
+from .adhoc_ada import ( list_photon_files,
+                         read_photon_hits )
+from .metadata_parser import parse_adt
+
+def _elapsed_seconds ( times ):
+    """
+    This function's goal is to convert a sequence of "HH:MM:SS" strings into seconds elapsed since the first entry, assuming the times are in chronological order and wrap around at midnight.
+
+    Parameters:
+
+    * times : sequence of strings
+
+    Returns:
+
+    * elapsed : numpy.ndarray
+        Of numpy.float64 values.
+    """
+    seconds = numpy.array ( [ 3600 * int ( entry [ 0 ] ) + 60 * int ( entry [ 1 ] ) + int ( entry [ 2 ] )
+                              for entry in [ time.split ( ":" ) for time in times ] ],
+                            dtype = numpy.float64 )
+    if seconds.size == 0:
+        return seconds
+    days = numpy.concatenate ( ( [ 0 ], numpy.cumsum ( numpy.diff ( seconds ) < 0 ) ) )
+    elapsed = seconds + 86400 * days
+    return elapsed - elapsed [ 0 ]
+
+class photon_index ( object ):
+    """
+    This class' responsibility is to build, store and query a time-resolved index of the photons of an ADT acquisition.
+
+    For each ADA file, the index stores its cycle, its channel, the start and end of its exposure (in seconds since the start of the acquisition) and the slice of a single photon array that contains its photons, as linearized voxel indices. The channel of each file follows the same convention as tuna.io.ada, so that the full cube rebuilt from the index is identical to the one read by tuna.io.ada.
+
+    Its constructor signature is:
+
+    Parameters:
+
+    * file_name : string : defaults to None
+        Either the path to an ADT file, in which case build ( ) will index its ADA files; or the path to an index previously written with save ( ), in which case read ( ) will load it.
+
+    Example usage::
+
+        import tuna
+        index = tuna.io.photon_index ( file_name = "tuna/tuna/test/unit/unit_io/G093/G093.ADT" )
+        index.build ( )
+        index.save ( "G093_index.npz" )
+
+        index = tuna.io.photon_index ( file_name = "G093_index.npz" )
+        index.read ( )
+        good_seeing = index.get_array ( exclude_cycles = [ 3, 4 ] )
+        first_hour = index.get_array ( end_time = 3600 )
+    """
+    def __init__ ( self, file_name = None ):
+        super ( photon_index, self ).__init__ ( )
+        self.log = logging.getLogger ( __name__ )
+
+        self.__file_name = file_name
+        self.__shape = None
+        self.__photons = None
+        self.__files = None
+        self.__cycle = None
+        self.__channel = None
+        self.__start = None
+        self.__end = None
+        self.__offset = None
+        self.__count = None
+
+    def build ( self ):
+        """
+        This method's goal is to build the index from the ADT file given as file_name and from the ADA files in the same directory.
+
+        The cycle of each ADA file is taken from its name, when the ADT header describes a "File names" template with "cc" (cycle) and "kk" (channel) fields; otherwise, files are assumed to be ordered by cycle. The acquisition times of each file are taken from the ADT record with the same cycle and channel.
+        """
+        self.log.debug ( tuna.log.function_header ( ) )
+
+        header, records = parse_adt ( self.__file_name )
+        file_path = dirname ( self.__file_name )
+        photon_files = list_photon_files ( file_path )
+
+        number_of_channels = len ( set ( records [ 'channel' ] ) )
+        dimensions = [ int ( value ) for value in header [ "X and Y dimensions" ] [ 0 ].split ( ) ]
+        self.__shape = ( number_of_channels, dimensions [ 0 ], dimensions [ 1 ] )
+
+        template = header.get ( "File names", ( "", "" ) ) [ 0 ]
+        cycle_position = template.find ( "cc" )
+        channel_position = template.find ( "kk" )
+
+        # Start and end times, interleaved, form a chronological sequence.
+        times = numpy.empty ( 2 * len ( records [ 'cycle' ] ), dtype = records [ 'start time' ].dtype )
+        times [ 0 : : 2 ] = records [ 'start time' ]
+        times [ 1 : : 2 ] = records [ 'end time' ]
+        elapsed = _elapsed_seconds ( times )
+        start = elapsed [ 0 : : 2 ]
+        end = elapsed [ 1 : : 2 ]
+        record_lookup = { }
+        for record in range ( len ( records [ 'cycle' ] ) ):
+            record_lookup [ ( records [ 'cycle' ] [ record ], records [ 'channel' ] [ record ] ) ] = record
+
+        plane_size = dimensions [ 0 ] * dimensions [ 1 ]
+        if numpy.prod ( self.__shape, dtype = numpy.int64 ) < 2 ** 32:
+            index_type = numpy.uint32
+        else:
+            index_type = numpy.uint64
+
+        files = len ( photon_files )
+        self.__files = numpy.array ( photon_files )
+        self.__cycle = numpy.zeros ( files, dtype = numpy.int64 )
+        self.__channel = numpy.zeros ( files, dtype = numpy.int64 )
+        self.__start = numpy.full ( files, numpy.nan )
+        self.__end = numpy.full ( files, numpy.nan )
+        self.__offset = numpy.zeros ( files, dtype = numpy.int64 )
+        self.__count = numpy.zeros ( files, dtype = numpy.int64 )
+
+        pieces = [ ]
+        offset = 0
+        for element in range ( files ):
+            file_name = photon_files [ element ]
+            channel = element % number_of_channels
+            if ( cycle_position >= 0 and
+                 channel_position >= 0 and
+                 len ( file_name ) == len ( template ) ):
+                cycle = int ( file_name [ cycle_position : cycle_position + 2 ] )
+                record = record_lookup.get ( ( cycle, int ( file_name [ channel_position : channel_position + 2 ] ) ) )
+            else:
+                cycle = element // number_of_channels + 1
+                record = record_lookup.get ( ( cycle, channel ) )
+
+            photon_hits = read_photon_hits ( join ( file_path, file_name ) )
+            x = photon_hits [ :, 0 ].astype ( numpy.int64 )
+            y = photon_hits [ :, 1 ].astype ( numpy.int64 )
+            valid = ( x >= 0 ) & ( x < dimensions [ 0 ] ) & ( y >= 0 ) & ( y < dimensions [ 1 ] )
+            linear = ( channel * plane_size + x [ valid ] * dimensions [ 1 ] + y [ valid ] ).astype ( index_type )
+            pieces.append ( linear )
+
+            self.__cycle [ element ] = cycle
+            self.__channel [ element ] = channel
+            if record is not None:
+                self.__start [ element ] = start [ record ]
+                self.__end [ element ] = end [ record ]
+            self.__offset [ element ] = offset
+            self.__count [ element ] = linear.size
+            offset += linear.size
+
+        if pieces:
+            self.__photons = numpy.concatenate ( pieces )
+        else:
+            self.__photons = numpy.zeros ( 0, dtype = index_type )
+        self.log.info ( "Indexed {} photons from {} files.".format ( self.__photons.size, files ) )
+
+    def get_array ( self,
+                    cycles = None,
+                    exclude_cycles = None,
+                    start_time = None,
+                    end_time = None ):
+        """
+        This method's goal is to rebuild a cube from the photons of the selected ADA files.
+
+        Parameters:
+
+        * cycles : list of integers : defaults to None
+            If not None, only files from these cycles are used.
+
+        * exclude_cycles : list of integers : defaults to None
+            If not None, files from these cycles are not used.
+
+        * start_time : float : defaults to None
+            If not None, only files whose exposure started at or after this time (in seconds since the start of the acquisition) are used.
+
+        * end_time : float : defaults to None
+            If not None, only files whose exposure ended at or before this time (in seconds since the start of the acquisition) are used.
+
+        Returns:
+
+        * unnamed variable : numpy.ndarray
+            An integer cube, indexed as [ channel, x, y ], with the photon counts of the selected files.
+        """
+        self.log.debug ( tuna.log.function_header ( ) )
+
+        selected = numpy.ones ( self.__cycle.size, dtype = bool )
+        if cycles is not None:
+            selected &= numpy.isin ( self.__cycle, cycles )
+        if exclude_cycles is not None:
+            selected &= ~ numpy.isin ( self.__cycle, exclude_cycles )
+        if start_time is not None:
+            selected &= self.__start >= start_time
+        if end_time is not None:
+            selected &= self.__end <= end_time
+
+        pieces = [ self.__photons [ offset : offset + count ]
+                   for offset, count in zip ( self.__offset [ selected ], self.__count [ selected ] ) ]
+        if pieces:
+            linear = numpy.concatenate ( pieces )
+        else:
+            linear = numpy.zeros ( 0, dtype = numpy.intp )
+        counts = numpy.bincount ( linear, minlength = int ( numpy.prod ( self.__shape, dtype = numpy.int64 ) ) )
+        return counts.reshape ( self.__shape )
+
+    def get_cycles ( self ):
+        """
+        This method's goal is to list the cycles present in the index.
+
+        Returns:
+
+        * unnamed variable : numpy.ndarray
+            The sorted, distinct cycle numbers.
+        """
+        return numpy.unique ( self.__cycle )
+
+    def get_files ( self ):
+        """
+        This method's goal is to describe the indexed files.
+
+        Returns:
+
+        * unnamed variable : dictionary
+            With keys 'file', 'cycle', 'channel', 'start', 'end' and 'photons', each associated with a numpy.ndarray with one entry per ADA file.
+        """
+        return { 'file'    : self.__files,
+                 'cycle'   : self.__cycle,
+                 'channel' : self.__channel,
+                 'start'   : self.__start,
+                 'end'     : self.__end,
+                 'photons' : self.__count }
+
+    def read ( self ):
+        """
+        This method's goal is to load an index previously written by save ( ), from the file given as file_name.
+        """
+        self.log.debug ( tuna.log.function_header ( ) )
+
+        with numpy.load ( self.__file_name ) as stored:
+            self.__shape = tuple ( int ( value ) for value in stored [ 'shape' ] )
+            self.__photons = stored [ 'photons' ]
+            self.__files = stored [ 'files' ]
+            self.__cycle = stored [ 'cycle' ]
+            self.__channel = stored [ 'channel' ]
+            self.__start = stored [ 'start' ]
+            self.__end = stored [ 'end' ]
+            self.__offset = stored [ 'offset' ]
+            self.__count = stored [ 'count' ]
+
+    def save ( self, file_name ):
+        """
+        This method's goal is to write the index to disk, as an uncompressed numpy .npz file.
+
+        Parameters:
+
+        * file_name : string
+            Contains a valid path for the index file.
+        """
+        self.log.debug ( tuna.log.function_header ( ) )
+
+        with open ( file_name, "wb" ) as index_file:
+            numpy.savez ( index_file,
+                          shape   = numpy.array ( self.__shape ),
+                          photons = self.__photons,
+                          files   = self.__files,
+                          cycle   = self.__cycle,
+                          channel = self.__channel,
+                          start   = self.__start,
+                          end     = self.__end,
+                          offset  = self.__offset,
+                          count   = self.__count )
@@ -1,9 +1,26 @@
 """
 This namespace aggregates modules related to modeling.
+
+Submodules are imported when one of their names is first accessed, since the fitters import astropy.modeling and mpyfit.
 """
 
-import astropy
-from .airy     import ( airy_fitter,
-                        airy_plane,
-                        fit_airy )
-from .parabola import ( parabolic_fitter )
+import importlib
+import importlib.util
+
+_names = { "airy_fitter"      : ( "airy", "airy_fitter" ),
+           "airy_plane"       : ( "airy", "airy_plane" ),
+           "fit_airy"         : ( "airy", "fit_airy" ),
+           "parabolic_fitter" : ( "parabola", "parabolic_fitter" ) }
+
+def __getattr__ ( name ):
+    if name in _names:
+        module_name, attribute = _names [ name ]
+        value = getattr ( importlib.import_module ( "." + module_name, __name__ ), attribute )
+        globals ( ) [ name ] = value
+        return value
+    if importlib.util.find_spec ( "." + name, __name__ ) is not None:
+        return importlib.import_module ( "." + name, __name__ )
+    raise AttributeError ( "module '{}' has no attribute '{}'".format ( __name__, name ) )
+
+def __dir__ ( ):
+    return sorted ( set ( globals ( ).keys ( ) ) | set ( _names.keys ( ) ) )
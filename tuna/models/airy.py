@@ -2,8 +2,11 @@
 This module's scope is the modeling and fitting of Airy functions to data.
 """
 
-__version__ = "0.1.0"
-__changelog__ = { "Tuna" : "0.15.0", "Change" : "Added wrapper function fit_airy" }
+__version__ = "0.2.0"
+__changelog__ = {
+    "0.2.0" : { "Tuna" : "0.16.4", "Change" : "airy_plane follows the precision policy; fits are always computed in double precision." },
+    "0.1.0" : { "Tuna" : "0.15.0", "Change" : "Added wrapper function fit_airy" }
+    }
 
 import copy
 import logging
@@ -26,7 +29,8 @@ def airy_plane ( b_ratio = 9.e-6,
                  intensity = 100,
                  shape_cols = 512,
                  shape_rows = 512,
-                 wavelength = 0.6563 ):
+                 wavelength = 0.6563,
+                 precision = None ):
     """
     This function's goal is to model the Airy function as:
 
@@ -80,6 +84,9 @@ def airy_plane ( b_ratio = 9.e-6,
     * wavelength : float : defaults to 0.6563
         Wavelength in microns ( lambda_c ).
 
+    * precision : string : defaults to None
+        Overrides the precision policy (see tuna.tools.precision): the model is computed, and returned, with numpy.float32 values under "single" and numpy.float64 values under "double".
+
     Returns:
 
     * result : numpy.ndarray
@@ -100,14 +107,24 @@ def airy_plane ( b_ratio = 9.e-6,
                 % ( b_ratio, center_col, center_row, continuum, finesse, gap,
                     intensity, shape_cols, shape_rows, wavelength ) )
 
-    indices_rows, indices_cols = numpy.indices ( ( shape_cols, shape_rows ) )
+    # phase = k / sqrt ( 1 + x ), with k = 2 pi gap / wavelength and x = ( b r ) ** 2, is a large number of radians.
+    # Since sin ** 2 has period pi, it is computed as ( k mod pi ) - k ( 1 - 1 / sqrt ( 1 + x ) ), which keeps single precision accurate.
+    k = 2.0 * math.pi * float ( gap ) / float ( wavelength )
+
+    float_type = tuna.tools.float_type ( precision )
+    b_ratio, center_col, center_row, continuum, finesse, gap, intensity, wavelength = [
+        float_type ( value ) for value in ( b_ratio, center_col, center_row, continuum, finesse, gap, intensity, wavelength ) ]
+
+    indices_rows, indices_cols = numpy.indices ( ( shape_cols, shape_rows ), dtype = float_type )
     distances = numpy.sqrt ( ( indices_rows - center_col ) ** 2 +
                              ( indices_cols - center_row ) ** 2 )
     log.debug ( "distances [ 0 ] [ 0 ] = %s" % str ( distances [ 0 ] [ 0 ] ) )
     
     log.debug ( "Calculating airy_function_I" )
     airy_function_I = 4.0 * finesse ** 2 / numpy.pi ** 2
-    phase = 2.0 * numpy.pi * gap / ( wavelength * numpy.sqrt ( 1 + b_ratio ** 2 * distances ** 2 ) )
+    x = b_ratio ** 2 * distances ** 2
+    root = numpy.sqrt ( 1 + x )
+    phase = float_type ( math.fmod ( k, math.pi ) ) - float_type ( k ) * x / ( root * ( 1 + root ) )
     log.debug ( "phase     [ 0 ] [ 0 ] = %s" % str ( phase [ 0 ] [ 0 ] ) )
     result = continuum + intensity / ( 1. + airy_function_I * numpy.sin ( phase ) ** 2 )
     log.debug ( "result    [ 0 ] [ 0 ] = %s" % str ( result [ 0] [ 0 ] ) )
@@ -143,7 +160,8 @@ def least_mpyfit ( p, args ):
                              intensity,
                              shape_cols,
                              shape_rows,
-                             wavelength )
+                             wavelength,
+                             precision = "double" )
         #log.debug ( "plane = %s" % str ( plane ) )
         log.debug ( "plane.shape = {}, data.shape = {}".format ( plane.shape, data.shape ) )
     except Exception as e:
@@ -206,8 +224,9 @@ class airy_fitter ( threading.Thread ):
                    
         self.log = logging.getLogger ( __name__ )
         super ( self.__class__, self ).__init__ ( )
-        self.__version__ = "0.1.5"
+        self.__version__ = "0.1.6"
         self.changelog = {
+            "0.1.6" : "Tuna 0.16.4 : fit result is a transient can, not recorded in the database.",
             "0.1.5" : "Tuna 0.14.0 : updated docstrings to new style.",
             "0.1.4" : "Added docstrings.",
             "0.1.3" : "Tweaked xtol to 1e-6, works on some tests.",
@@ -366,7 +385,8 @@ class airy_fitter ( threading.Thread ):
                                               fit_parameters [ 6 ],
                                               self.shape_cols,
                                               self.shape_rows,
-                                              self.wavelength ) )
+                                              self.wavelength ),
+                                 transient = True )
         self.parameters = fit_parameters
 
 def fit_airy ( b_ratio : float,
@@ -2,6 +2,8 @@
 """
 This module's scope are the operations required to reduce data from a high resolution spectrograph.
 
+The intermediate cubes of the reduction (the discontinuum and the Airy fits) are allocated with the floating point type chosen by the precision policy (see tuna.tools.precision); phase maps and wavelength calibration are computed in double precision.
+
 Example::
 
     >>> import tuna
@@ -219,7 +221,8 @@ class reducer ( threading.Thread ):
         self.continuum = tuna.plugins.run ( "Continuum detector" ) ( self.overscanned,
                                                                      self.continuum_to_FSR_ratio )
 
-        self.discontinuum = tuna.io.can ( array = numpy.ndarray ( shape = self.overscanned.shape ) )
+        self.discontinuum = tuna.io.can ( array = numpy.ndarray ( shape = self.overscanned.shape,
+                                                                 dtype = tuna.tools.float_type ( ) ) )
         for plane in range ( self.overscanned.planes ):
             self.discontinuum.array [ plane, : , : ] = numpy.abs ( self.overscanned.array [ plane, : , : ] - self.continuum.array )
 
@@ -291,7 +294,8 @@ class reducer ( threading.Thread ):
                                                               wavelength = self.calibration_wavelength,
                                                               mpyfit_parinfo = parinfo_initial )
 
-            airy_fit = numpy.ndarray ( shape = self.overscanned.shape )
+            airy_fit = numpy.ndarray ( shape = self.overscanned.shape,
+                                       dtype = tuna.tools.float_type ( ) )
             airy_fit [ 0 ] = airy_fitter_0 [ 1 ].array
 
             b_ratio     = airy_fitter_0 [ 0 ] [ 0 ]
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 """
 This module's scope is the reduction of data from a calibration lamp using SOAR's SAMI instrument.
+
+The intermediate cubes of the reduction (the raw cube, the discontinuum and the Airy fits) are allocated with the floating point type chosen by the precision policy (see tuna.tools.precision); phase maps and wavelength calibration are computed in double precision.
 """
 
 import astropy.io.fits
@@ -14,6 +16,25 @@ import threading
 import time
 import tuna
 
+def _read_trimmed_panel ( file_name, extension, first_axis, second_axis ):
+    """
+    This function's goal is to read the trimmed section of a panel, for tuna.io.assemble_mosaic ( ).
+
+    Parameters:
+
+    * file_name : string
+
+    * extension : integer
+
+    * first_axis, second_axis : slice
+        The trimmed section of the panel's data, along the first and second axes of its array.
+
+    Returns:
+
+    * unnamed variable : numpy.ndarray
+    """
+    return tuna.io.read_fits_panel ( file_name, extension ) [ first_axis, second_axis ]
+
 class reducer ( threading.Thread ):
     """
     Creates and stores an unwrapped phase map, taking as input a raw data cube.
@@ -226,48 +247,35 @@ class reducer ( threading.Thread ):
         # Create empty array for cube
         cube = numpy.zeros ( shape = ( number_of_channels,
                                        ccd_size [ 0 ],
-                                       ccd_size [ 1 ] ) )
+                                       ccd_size [ 1 ] ),
+                             dtype = tuna.tools.float_type ( ) )
         
-        # For each channel file:
+        # For each channel file, list its panels' trimmed sections and their slots in the cube:
+        jobs = [ ]
         for channel in self.file_names_per_channel.keys ( ):
             self.log.info ( "Processing channel {} from raw file {}.".format (
                 channel, self.file_names_per_channel [ channel ] ) )
-            channel_hdu = astropy.io.fits.open ( self.file_names_per_channel [ channel ] )
+            channel_hdu = astropy.io.fits.open ( self.file_names_per_channel [ channel ],
+                                                 lazy_load_hdus = True )
 
             # For each panel in the file:
             for panel in range ( 1, number_of_extensions_per_channel + 1 ):
-                # Obtain the trimmed and overscan (bias) data
                 self.log.debug ( "Processing panel {}.".format ( panel ) )
-                self.log.debug ( "channel_hdu [ {} ].data.shape = {}.".format (
-                    panel, channel_hdu [ panel ].data.shape ) )
                 trimsec = channel_hdu [ panel ].header [ 'TRIMSEC' ]
-                biassec = channel_hdu [ panel ].header [ 'BIASSEC' ]
                 trim_rows, trim_cols = self.parse_header_ranges ( header_ranges = trimsec )
-                bias_rows, bias_cols = self.parse_header_ranges ( header_ranges = biassec )
                 self.log.debug ( "trim = ({}, {})".format ( trim_cols, trim_rows ) )
-                self.log.debug ( "bias = ({}, {})".format ( bias_cols, bias_rows ) )
-                trim_data = channel_hdu [ panel ].data [ trim_cols [ 0 ] - 1 : trim_cols [ 1 ] - 1,
-                                                         trim_rows [ 0 ] - 1 : trim_rows [ 1 ] - 1 ]
-                #self.log.debug ( "trim_data = {}.".format ( trim_data ) )
-                # fit and remove overscan
-                bias_data = channel_hdu [ panel ].data [ bias_cols [ 0 ] - 1 : bias_cols [ 1 ] - 1,
-                                                         bias_rows [ 0 ] - 1 : bias_rows [ 1 ] - 1 ]
-                #self.log.debug ( "bias_data = {}".format ( bias_data ) )
-                bias_median = numpy.median ( bias_data, axis = 1 )
-                #self.log.debug ( "bias_median = {}".format ( bias_median ) )
-                col_indexes = numpy.arange ( bias_median.size ) + 1
-                #self.log.debug ( "col_indexes = {}".format ( col_indexes ) )
-                bias_fit_parameters = numpy.polyfit ( col_indexes, bias_median, 4 )
-                bias_fit = numpy.polyval ( bias_fit_parameters, col_indexes )
-                bias_fit = bias_fit.reshape ( ( bias_fit.size, 1 ) )
-                bias_fit = numpy.repeat ( bias_fit, trim_data.shape [ 1 ], axis = 1 )
-                debiased_data = trim_data - bias_fit
-                #self.log.debug ( "debiased_data = {}.".format ( debiased_data ) )
-                
-                # Add trimmed data to cube
-                cube [ channel,
-                       panel_geometry [ panel ] [ 0 ] [ 0 ] : panel_geometry [ panel ] [ 0 ] [ 1 ],
-                       panel_geometry [ panel ] [ 1 ] [ 0 ] : panel_geometry [ panel ] [ 1 ] [ 1 ] ] = trim_data
+                slot = ( channel,
+                         slice ( panel_geometry [ panel ] [ 0 ] [ 0 ], panel_geometry [ panel ] [ 0 ] [ 1 ] ),
+                         slice ( panel_geometry [ panel ] [ 1 ] [ 0 ], panel_geometry [ panel ] [ 1 ] [ 1 ] ) )
+                jobs.append ( ( slot,
+                                ( self.file_names_per_channel [ channel ],
+                                  panel,
+                                  slice ( trim_cols [ 0 ] - 1, trim_cols [ 1 ] - 1 ),
+                                  slice ( trim_rows [ 0 ] - 1, trim_rows [ 1 ] - 1 ) ) ) )
+            channel_hdu.close ( )
+
+        # Read, decompress and trim the panels in parallel, adding the trimmed data to the cube.
+        tuna.io.assemble_mosaic ( jobs, read_panel = _read_trimmed_panel, output = cube )
 
         # move bad lines and columns to the "border" of the cube
         bad_cols = cube [ :,
@@ -289,7 +297,8 @@ class reducer ( threading.Thread ):
                                                                      self.continuum_to_FSR_ratio )
 
         # Discontinuum calculation
-        self.discontinuum = tuna.io.can ( array = numpy.ndarray ( shape = self.overscanned.shape ) )
+        self.discontinuum = tuna.io.can ( array = numpy.ndarray ( shape = self.overscanned.shape,
+                                                                 dtype = tuna.tools.float_type ( ) ) )
         for plane in range ( self.overscanned.planes ):
             self.discontinuum.array [ plane, : , : ] = numpy.abs ( self.overscanned.array [ plane, : , : ] - self.continuum.array )
         #
@@ -362,7 +371,8 @@ class reducer ( threading.Thread ):
                                                               wavelength = self.calibration_wavelength,
                                                               mpyfit_parinfo = parinfo_initial )
 
-            airy_fit = numpy.ndarray ( shape = self.overscanned.shape )
+            airy_fit = numpy.ndarray ( shape = self.overscanned.shape,
+                                       dtype = tuna.tools.float_type ( ) )
             airy_fit [ 0 ] = airy_fitter_0 [ 1 ].array
 
             b_ratio     = airy_fitter_0 [ 0 ] [ 0 ]
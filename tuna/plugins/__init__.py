@@ -34,9 +34,18 @@ Costs:
 
 It is our opinion that the benefits far outweight the costs associated with a modular approach. Also, it is our expectation that costs associated with developing the framework, and adapting existing code to it, would become smaller in the future, as new code is already produced modularly, and as the expertise of adapting code is spread to a wider community of developers.
   
+Caching plugin results
+----------------------
+
+Reductions are often re-run on the same data, changing only the parameters of late steps. After tuna.plugins.enable_cache ( ) is called, the plugins returned by tuna.plugins.run ( ) store their results on disk, keyed by the digests of their input cans and by their other parameters, and identical calls return the stored result instead of recomputing it. See tuna.plugins.cache for details.
+
 .. [CosmoSIS] Zuntz et al, *CosmoSIS: Modular cosmological parameter estimation*. Available at http://arxiv.org/abs/1409.3409. Retrieved on 2015-09-17.
 """
 
+from .cache    import ( disable_cache,
+                        enable_cache,
+                        get_cache,
+                        plugin_cache )
 from .registry import ( registry,
                         run )
 
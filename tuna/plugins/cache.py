@@ -0,0 +1,296 @@
+"""
+This module's scope is the memoization of plugin results.
+
+When the cache is enabled, the callables returned by tuna.plugins.run ( ) look up their results in an on-disk, content-addressed store before running. The key of a call is derived from the plugin's step name and implementation, from the digests of its input cans and arrays, and from the values of its other parameters; therefore, re-running a pipeline on the same data with the same parameters reuses the results of the earlier run, while changing a parameter, or the data, runs the plugin again.
+
+Example::
+
+    >>> import tuna
+    >>> tuna.plugins.enable_cache ( max_bytes = 2 * 1024 ** 3 )
+    >>> raw = tuna.io.read ( "lamp.fits" )
+    >>> barycenter = tuna.plugins.run ( "Barycenter algorithm" ) ( data_can = raw )
+    >>> # The second call is read from the cache.
+    >>> barycenter = tuna.plugins.run ( "Barycenter algorithm" ) ( data_can = raw )
+    >>> tuna.plugins.disable_cache ( )
+"""
+__version__ = "0.1.1"
+__changelog__ = {
+    "0.1.1" : { "Tuna" : "0.16.4", "Change" : "Cans are described by the dtype and shape of their arrays, as well as by their digests." },
+    "0.1.0" : { "Tuna" : "0.16.4", "Change" : "Initial version." }
+    }
+
+import functools
+import hashlib
+import logging
+import numpy
+import os
+import pickle
+import tempfile
+import tuna
+
+default_cache_directory = os.path.join ( os.path.expanduser ( "~" ), ".tuna", "plugin_cache" )
+"""
+The default location of the plugin results store.
+"""
+
+default_cache_max_bytes = 2 * 1024 ** 3
+"""
+The default size bound of the plugin results store, in bytes.
+"""
+
+_key_format_version = 2
+
+class _uncacheable ( Exception ):
+    """
+    Raised when a parameter has no stable description, so that the call cannot be cached.
+    """
+    pass
+
+def _describe ( value ):
+    """
+    This function's goal is to build a stable, hashable description of a plugin parameter.
+
+    Cans and arrays are described by their dtypes, shapes and digests, so that their contents, and not their identity, define the key. Raises _uncacheable for values that have no stable description.
+    """
+    if isinstance ( value, tuna.io.can ):
+        dtype = None
+        shape = None
+        if isinstance ( value.array, numpy.ndarray ):
+            dtype = value.array.dtype.str
+            shape = value.array.shape
+        return ( "can", dtype, shape, value.digest, value.interference_order, value.interference_reference_wavelength )
+    if isinstance ( value, numpy.ndarray ):
+        return ( "ndarray", value.dtype.str, value.shape, tuna.tools.get_hash_from_array ( value ) )
+    if isinstance ( value, numpy.generic ):
+        return ( "scalar", value.dtype.str, value.item ( ) )
+    if value is None or isinstance ( value, ( bool, int, float, complex, str, bytes ) ):
+        return ( type ( value ).__name__, value )
+    if isinstance ( value, ( list, tuple ) ):
+        return ( type ( value ).__name__, tuple ( _describe ( entry ) for entry in value ) )
+    if isinstance ( value, dict ):
+        return ( "dict", tuple ( sorted ( ( repr ( key ), _describe ( value [ key ] ) ) for key in value.keys ( ) ) ) )
+    raise _uncacheable ( "Parameter of type {} cannot be described.".format ( type ( value ) ) )
+
+class plugin_cache ( object ):
+    """
+    This class' responsibility is to store and retrieve plugin results, keyed by the plugin and its inputs, in a size-bounded directory.
+
+    Each result is stored as a pickle file named after its key. Files are evicted in least-recently-used order (by modification time, which is updated on every hit) when the total size of the store exceeds max_bytes.
+
+    Its constructor signature is:
+
+    Parameters:
+
+    * directory : string : defaults to None
+        The location of the store; it is created if needed. If None, default_cache_directory is used.
+
+    * max_bytes : integer : defaults to None
+        The size bound of the store, in bytes. If None, default_cache_max_bytes is used.
+    """
+    def __init__ ( self, directory = None, max_bytes = None ):
+        super ( plugin_cache, self ).__init__ ( )
+        self.log = logging.getLogger ( __name__ )
+
+        if directory is None:
+            directory = default_cache_directory
+        if max_bytes is None:
+            max_bytes = default_cache_max_bytes
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs ( self.directory, exist_ok = True )
+
+    def clear ( self ):
+        """
+        This method's goal is to remove all stored results.
+        """
+        for file_name in self._entries ( ):
+            os.remove ( file_name )
+
+    def _entries ( self ):
+        """
+        This method's goal is to list the files of the stored results.
+        """
+        return [ os.path.join ( self.directory, file_name )
+                 for file_name in os.listdir ( self.directory )
+                 if file_name.endswith ( ".pickle" ) ]
+
+    def _evict ( self ):
+        """
+        This method's goal is to remove the least recently used results, until the store is within max_bytes.
+        """
+        entries = [ ]
+        for file_name in self._entries ( ):
+            try:
+                status = os.stat ( file_name )
+            except OSError:
+                continue
+            entries.append ( ( status.st_mtime, status.st_size, file_name ) )
+        total = sum ( entry [ 1 ] for entry in entries )
+        for mtime, size, file_name in sorted ( entries ):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove ( file_name )
+            except OSError:
+                pass
+            total -= size
+
+    def get ( self, key ):
+        """
+        This method's goal is to retrieve a stored result.
+
+        Parameters:
+
+        * key : string
+            As returned by make_key ( ).
+
+        Returns:
+
+        * unnamed variable : bool
+            True if the result was found.
+
+        * unnamed variable : object
+            The stored result, or None.
+        """
+        file_name = os.path.join ( self.directory, key + ".pickle" )
+        try:
+            with open ( file_name, "rb" ) as result_file:
+                result = pickle.load ( result_file )
+            os.utime ( file_name )
+        except FileNotFoundError:
+            return False, None
+        except Exception as e:
+            self.log.debug ( "Discarding unreadable cache entry {}: {}.".format ( file_name, e ) )
+            try:
+                os.remove ( file_name )
+            except OSError:
+                pass
+            return False, None
+        return True, result
+
+    def make_key ( self, step_name, function, args, kwargs ):
+        """
+        This method's goal is to derive the key of a plugin call.
+
+        Parameters:
+
+        * step_name : string
+            The registry key of the plugin.
+
+        * function : callable
+            The plugin's implementation.
+
+        * args : tuple
+
+        * kwargs : dictionary
+
+        Returns:
+
+        * unnamed variable : string
+            Hexadecimal digits; None if some parameter cannot be described, in which case the call should not be cached.
+        """
+        try:
+            description = ( _key_format_version,
+                            step_name,
+                            getattr ( function, "__module__", None ),
+                            getattr ( function, "__qualname__", repr ( function ) ),
+                            _describe ( tuple ( args ) ),
+                            _describe ( dict ( kwargs ) ) )
+        except _uncacheable as e:
+            self.log.debug ( "Not caching {}: {}".format ( step_name, e ) )
+            return None
+        return hashlib.sha1 ( repr ( description ).encode ( "utf-8" ) ).hexdigest ( )
+
+    def put ( self, key, result ):
+        """
+        This method's goal is to store a result, and evict older results if the store becomes larger than max_bytes.
+
+        Results that cannot be pickled are not stored.
+
+        Parameters:
+
+        * key : string
+            As returned by make_key ( ).
+
+        * result : object
+        """
+        try:
+            data = pickle.dumps ( result, protocol = pickle.HIGHEST_PROTOCOL )
+        except Exception as e:
+            self.log.debug ( "Result of type {} cannot be stored: {}.".format ( type ( result ), e ) )
+            return
+        if len ( data ) > self.max_bytes:
+            return
+
+        handle, temporary_name = tempfile.mkstemp ( dir = self.directory, suffix = ".tmp" )
+        with os.fdopen ( handle, "wb" ) as result_file:
+            result_file.write ( data )
+        os.replace ( temporary_name, os.path.join ( self.directory, key + ".pickle" ) )
+        self._evict ( )
+
+    def wrap ( self, step_name, function ):
+        """
+        This method's goal is to return a callable that looks results up in the store before calling function, and stores the results it computes.
+
+        Parameters:
+
+        * step_name : string
+            The registry key of the plugin.
+
+        * function : callable
+            The plugin's implementation.
+        """
+        @functools.wraps ( function )
+        def cached_plugin ( *args, **kwargs ):
+            key = self.make_key ( step_name, function, args, kwargs )
+            if key is None:
+                return function ( *args, **kwargs )
+            found, result = self.get ( key )
+            if found:
+                self.log.debug ( "Using cached result for \"{}\".".format ( step_name ) )
+                return result
+            result = function ( *args, **kwargs )
+            self.put ( key, result )
+            return result
+        return cached_plugin
+
+_cache = None
+
+def disable_cache ( ):
+    """
+    This function's goal is to stop memoizing plugin results. Stored results are kept on disk.
+    """
+    global _cache
+    _cache = None
+
+def enable_cache ( directory = None, max_bytes = None ):
+    """
+    This function's goal is to memoize the results of the plugins returned by tuna.plugins.run ( ) from now on.
+
+    Parameters:
+
+    * directory : string : defaults to None
+        The location of the store. If None, default_cache_directory is used.
+
+    * max_bytes : integer : defaults to None
+        The size bound of the store, in bytes. If None, default_cache_max_bytes is used.
+
+    Returns:
+
+    * unnamed variable : plugin_cache
+        The active cache.
+    """
+    global _cache
+    _cache = plugin_cache ( directory = directory, max_bytes = max_bytes )
+    return _cache
+
+def get_cache ( ):
+    """
+    This function's goal is to access the active cache.
+
+    Returns:
+
+    * unnamed variable : plugin_cache
+        None if the cache is disabled.
+    """
+    return _cache
@@ -97,24 +97,101 @@ Finally, if you want to add a plugin that has no signature yet, the syntax is id
   * "Parabola fit" : tuna.models.parabola.parabolic_fitter
   * "Ring center finder" : tuna.tools.spectral_rings_fitter.find_rings
   * "Something new" : my_super_complicated_noise_function
+
+Resolving plugins
+-----------------
+
+The registry's entries are dotted import paths, and the signatures of Tuna's own plugins are declared next to them; therefore, listing or describing the registry does not import any tool. The module implementing a plugin is imported the first time tuna.plugins.run ( ) is called for its step, and the reference is kept for later calls. A job that only runs the "Barycenter algorithm" does not import the modules of the other plugins (nor sympy or mpyfit, which they depend on).
+
+Plugins from other packages
+---------------------------
+
+Installed packages can provide plugins through the "tuna.plugins" entry point group, where the name of each entry point is the step name::
+
+  setup ( ...
+          entry_points = { "tuna.plugins" : [ "Noise detector = my_package.noise:detect_noise" ] } )
+
+The entry points are discovered the first time the registry is used. A plugin for a new step is added to the registry; a plugin for one of Tuna's steps replaces Tuna's implementation, as long as its signature is the one declared for that step. Entries set by calling tuna.plugins.registry ( ) take precedence over both.
 """
 
+__version__ = "0.2.0"
+__changelog__ = {
+    "0.2.0" : { "Tuna" : "0.16.4", "Change" : "Entries are dotted paths resolved on first use; plugins are discovered through entry points." }
+    }
+
+import importlib
+import importlib.metadata
+import logging
 import tuna
+from .cache import get_cache
+
+entry_point_group = "tuna.plugins"
+"""
+The entry point group where other packages declare Tuna plugins.
+"""
 
 __registry = {
-    "Airy fit" : tuna.models.airy.fit_airy,
-    "Apply wavelength calibration" : tuna.tools.wavelength.wavelength_calibration.wavelength_calibrator,
-    "B-ratio estimation" : tuna.tools.estimate_b_ratio,
-    "Barycenter algorithm" : tuna.tools.barycenter_geometry,
-    "Continuum detector" : tuna.tools.continuum_detector,
-    "Find the ring borders" : tuna.tools.phase_map.ring_borders.ring_border_detector,
-    "FSR mapper" : tuna.tools.fsr.fsr_mapper,
-    "Noise detector" : tuna.tools.noise.detect_noise,
-    "Overscan" : tuna.tools.overscan.no_overscan,
-    "Parabola fit" : tuna.models.parabola.parabolic_fitter,
-    "Ring center finder" : tuna.tools.spectral_rings_fitter,
+    "Airy fit" : "tuna.models.airy.fit_airy",
+    "Apply wavelength calibration" : "tuna.tools.wavelength.wavelength_calibration.wavelength_calibrator",
+    "B-ratio estimation" : "tuna.tools.estimate_b_ratio.estimate_b_ratio",
+    "Barycenter algorithm" : "tuna.tools.barycenter.barycenter_geometry",
+    "Continuum detector" : "tuna.tools.continuum.continuum_detector",
+    "Find the ring borders" : "tuna.tools.phase_map.ring_borders.ring_border_detector",
+    "FSR mapper" : "tuna.tools.fsr.fsr_mapper",
+    "Noise detector" : "tuna.tools.noise.detect_noise",
+    "Overscan" : "tuna.tools.overscan.no_overscan",
+    "Parabola fit" : "tuna.models.parabola.parabolic_fitter",
+    "Ring center finder" : "tuna.tools.spectral_rings_fitter.find_rings",
     }
 
+__defaults = dict ( __registry )
+
+__signatures = {
+    "Airy fit" : { "b_ratio" : "float",
+                   "center_col" : "float",
+                   "center_row" : "float",
+                   "data" : "numpy.ndarray",
+                   "finesse" : "float",
+                   "gap" : "float",
+                   "mpyfit_parinfo" : "list",
+                   "wavelength" : "float",
+                   "return" : "( dict, tuna.io.can.can )" },
+    "Apply wavelength calibration" : { },
+    "B-ratio estimation" : { },
+    "Barycenter algorithm" : { "data_can" : "tuna.io.can.can",
+                               "return" : "tuna.io.can.can" },
+    "Continuum detector" : { "continuum_to_FSR_ratio" : "float",
+                             "raw" : "tuna.io.can.can",
+                             "return" : "tuna.io.can.can" },
+    "Find the ring borders" : { },
+    "FSR mapper" : { "center" : "tuple",
+                     "concentric_rings" : "dict",
+                     "distances" : "tuna.io.can.can",
+                     "wrapped" : "tuna.io.can.can",
+                     "return" : "tuna.io.can.can" },
+    "Noise detector" : { "data" : "tuna.io.can.can",
+                         "noise_mask_radius" : "int",
+                         "noise_threshold" : "float",
+                         "wrapped" : "tuna.io.can.can",
+                         "return" : "tuna.io.can.can" },
+    "Overscan" : { "data" : "tuna.io.can.can",
+                   "elements_to_remove" : "dict",
+                   "return" : "tuna.io.can.can" },
+    "Parabola fit" : { },
+    "Ring center finder" : { "data" : "numpy.ndarray",
+                             "ipython" : "object",
+                             "min_rings" : "int",
+                             "plane" : "int",
+                             "plot_log" : "bool",
+                             "return" : "dict" },
+    }
+
+__resolved = { }
+
+__discovered = False
+
+_log = logging.getLogger ( __name__ )
+
 def get_full_module_path ( reference : object ) -> str:
     """
     This function's goal is to return a standardized string version of the full module path and function name, when given a reference to a function as input.
@@ -136,6 +213,127 @@ def get_full_module_path ( reference : object ) -> str:
     else:
         return reference.__module__ + "." + reference.__name__
 
+def get_annotation_path ( annotation : object ) -> str:
+    """
+    This function's goal is to describe a type annotation with the same strings used by the declared signatures.
+
+    Parameters:
+
+    * annotation : object
+        A type, a tuple of types, or a string.
+
+    Returns:
+
+    * str
+    """
+    if isinstance ( annotation, tuple ):
+        return "( " + ", ".join ( get_annotation_path ( entry ) for entry in annotation ) + " )"
+    if isinstance ( annotation, str ):
+        return annotation
+    try:
+        return get_full_module_path ( annotation )
+    except AttributeError:
+        return repr ( annotation )
+
+def get_signature ( reference : object ) -> dict:
+    """
+    This function's goal is to describe the annotations of a callable, in the format of the declared signatures.
+
+    Parameters:
+
+    * reference : object
+        A Python callable.
+
+    Returns:
+
+    * dict
+        Maps each annotated parameter, and "return", to the description of its type.
+    """
+    annotations = getattr ( reference, "__annotations__", { } )
+    return { key : get_annotation_path ( annotations [ key ] ) for key in annotations.keys ( ) }
+
+def _entry_name ( entry : object ) -> str:
+    """
+    This function's goal is to describe a registry entry, be it a path or a callable.
+    """
+    if isinstance ( entry, str ):
+        return entry.replace ( ":", "." )
+    return get_full_module_path ( entry )
+
+def _import_path ( path : str ) -> object:
+    """
+    This function's goal is to import the object at a path, written either as "package.module.attribute" or as "package.module:attribute.attribute".
+    """
+    if ":" in path:
+        module_name, attributes = path.split ( ":", 1 )
+    else:
+        module_name, attributes = path.rsplit ( ".", 1 )
+    reference = importlib.import_module ( module_name )
+    for attribute in attributes.split ( "." ):
+        reference = getattr ( reference, attribute )
+    return reference
+
+def _is_compatible ( current : dict, future : dict ) -> bool:
+    """
+    This function's goal is to check that a signature keeps every annotation of the signature it replaces.
+    """
+    for key in current.keys ( ):
+        if future.get ( key ) != current [ key ]:
+            return False
+    return True
+
+def _discover ( ):
+    """
+    This function's goal is to add the plugins declared by installed packages in the entry_point_group, on the first time the registry is used.
+    """
+    global __discovered
+    if __discovered:
+        return
+    __discovered = True
+
+    try:
+        try:
+            entry_points = importlib.metadata.entry_points ( group = entry_point_group )
+        except TypeError:
+            entry_points = importlib.metadata.entry_points ( ).get ( entry_point_group, [ ] )
+    except Exception as e:
+        _log.warning ( "Could not list the {} entry points: {}".format ( entry_point_group, e ) )
+        return
+
+    for entry_point in entry_points:
+        if ( entry_point.name in __registry and
+             __registry [ entry_point.name ] != __defaults.get ( entry_point.name ) ):
+            continue
+        _log.debug ( "Plugin for \"{}\" provided by entry point {}.".format ( entry_point.name, entry_point.value ) )
+        __registry [ entry_point.name ] = entry_point.value
+        __resolved.pop ( entry_point.name, None )
+
+def _resolve ( step_name : str ) -> object:
+    """
+    This function's goal is to obtain the callable for a step, importing its module if needed. Raises KeyError if the step is not registered.
+
+    A plugin provided by an entry point, whose signature differs from the one declared for its step, is ignored in favour of Tuna's implementation.
+    """
+    _discover ( )
+    try:
+        return __resolved [ step_name ]
+    except KeyError:
+        pass
+
+    entry = __registry [ step_name ]
+    if isinstance ( entry, str ):
+        reference = _import_path ( entry )
+        if ( entry != __defaults.get ( step_name, entry ) and
+             not _is_compatible ( __signatures [ step_name ], get_signature ( reference ) ) ):
+            _log.warning ( "Ignoring plugin {} for \"{}\", its signature differs from the declared one.".format (
+                _entry_name ( entry ), step_name ) )
+            __registry [ step_name ] = __defaults [ step_name ]
+            reference = _import_path ( __registry [ step_name ] )
+    else:
+        reference = entry
+    __resolved [ step_name ] = reference
+    return reference
+
 def registry ( step_name : str = "",
                callable_reference : object = None ):
     """
@@ -145,7 +343,7 @@ def registry ( step_name : str = "",
 
     If called with only the step_name parameter, it will check that argument is a key in the registry's dictionary, and print the signature associated with that key if so.
 
-    If called with two parameters, it will attempt to add or modify the dictionary so that the second parameter is the entry with the key contained in the first parameter.
+    If called with two parameters, it will attempt to add or modify the dictionary so that the second parameter is the entry with the key contained in the first parameter. The second parameter may also be a dotted path to the callable, in which case it is only imported when the step is run.
 
     Parameters:
 
@@ -153,74 +351,78 @@ def registry ( step_name : str = "",
         The name of the workflow "step" this plugin refers to.
 
     * callable_reference : object : None
-        reference to a Python callable object.
+        reference to a Python callable object, or its dotted path.
     """
     global __registry
+    _discover ( )
 
     # List all entries
     if step_name == "":
         print ( "The following plugins are registered in Tuna:" )
         for key in sorted ( list ( __registry.keys ( ) ) ):
-            print ( "* \"{}\" : {}".format ( key, get_full_module_path ( __registry [ key ] ) ) )
+            print ( "* \"{}\" : {}".format ( key, _entry_name ( __registry [ key ] ) ) )
         return
 
     # Describe a specific entry
     if callable_reference is None:
-        try:
-            entry = __registry [ step_name ]
-        except KeyError:
+        if step_name not in __registry:
             print ( "The registry does not have a \"{}\" key.".format ( step_name ) )
             return
-        function_name = entry.__name__
-        signature = "def {} ( ".format ( function_name )
-        for parameter in sorted ( list ( entry.__annotations__.keys ( ) ) ):
-            if parameter != "return":
-                try:
-                    parameters_string += ", " + parameter + " : " + get_full_module_path (
-                        entry.__annotations__ [ parameter ] )
-                except UnboundLocalError:
-                    parameters_string = parameter + " : " + get_full_module_path (
-                        entry.__annotations__ [ parameter ] )
-        try:
-            parameters_string += " ) -> "
-        except UnboundLocalError:
-            parameters_string = ") -> "
-        signature += parameters_string
-        signature += get_full_module_path ( entry.__annotations__ [ "return" ] )
-        print ( signature )
+        entry = __registry [ step_name ]
+        if entry == __defaults.get ( step_name ):
+            function_name = entry.rsplit ( ".", 1 ) [ 1 ]
+            signature = __signatures [ step_name ]
+        else:
+            reference = _resolve ( step_name )
+            function_name = reference.__name__
+            signature = get_signature ( reference )
+        parameters = [ parameter + " : " + signature [ parameter ]
+                       for parameter in sorted ( signature.keys ( ) ) if parameter != "return" ]
+        parameters_string = ", ".join ( parameters )
+        if parameters_string:
+            parameters_string += " "
+        print ( "def {} ( {}) -> {}".format ( function_name,
+                                             parameters_string,
+                                             signature.get ( "return", "None" ) ) )
         return
 
     # Add an entry
     if step_name not in list ( __registry.keys ( ) ):
         __registry [ step_name ] = callable_reference
-        print ( "Added {} to the plugin registry.".format ( get_full_module_path ( callable_reference ) ) )
+        print ( "Added {} to the plugin registry.".format ( _entry_name ( callable_reference ) ) )
         return
 
     # Change an entry
-    current_annotation = __registry [ step_name ].__annotations__
-    future_annotation = callable_reference.__annotations__
-    similar = True
-    for key in current_annotation.keys ( ):
-        try:
-            if future_annotation [ key ] != current_annotation [ key ]:
-                similar = False
-                break
-        except:
-            print ( "Aborted registry change, new plugin signature differs from previous one for \"{}\".".format (
-                key ) )
-            return
-        
-    if similar:
-        __registry [ step_name ] = callable_reference
-        print ( "Plugin for \"{}\" set to {}.".format (
-            step_name,
-            get_full_module_path ( callable_reference ) ) )
+    if step_name in __signatures:
+        current_signature = __signatures [ step_name ]
+    else:
+        current_signature = get_signature ( _resolve ( step_name ) )
+    reference = callable_reference
+    if isinstance ( reference, str ):
+        reference = _import_path ( reference )
+    if not _is_compatible ( current_signature, get_signature ( reference ) ):
+        print ( "Aborted registry change, new plugin signature differs from previous one for \"{}\".".format (
+            step_name ) )
+        return
+
+    __registry [ step_name ] = callable_reference
+    __resolved.pop ( step_name, None )
+    print ( "Plugin for \"{}\" set to {}.".format (
+        step_name,
+        _entry_name ( callable_reference ) ) )
 
 def run ( step_name : str ) -> object:
     """
     This function's goal is to return a reference to the callable object associated with the registry key given as input.
+
+    The module implementing the plugin is imported on the first call for each step, and the reference is reused afterwards. If the plugin cache is enabled (see tuna.plugins.enable_cache), the reference is wrapped so that its results are memoized.
     """
     try:
-        return __registry [ step_name ]
-    except:
+        reference = _resolve ( step_name )
+    except KeyError:
         print ( "Unable to find a reference to {}.".format ( step_name ) )
+        return
+    active_cache = get_cache ( )
+    if active_cache is None:
+        return reference
+    return active_cache.wrap ( step_name, reference )
@@ -1,3 +1,6 @@
+import json
+import subprocess
+import sys
 import unittest
 
 class unit_test_tuna_console ( unittest.TestCase ):
@@ -10,5 +13,37 @@ class unit_test_tuna_console ( unittest.TestCase ):
     def tearDown ( self ):
         pass
 
+class unit_test_tuna_import ( unittest.TestCase ):
+    """
+    Benchmarks "import tuna" in a fresh interpreter, where no module is cached.
+    """
+    # Seconds; importing every subpackage and starting the daemons took several times this.
+    import_budget = 1.0
+    heavy_modules = [ "IPython", "astropy", "matplotlib", "pymysql", "sympy", "zmq" ]
+
+    def setUp ( self ):
+        script = ( "import json, sys, threading, time\n"
+                   "start = time.perf_counter ( )\n"
+                   "import tuna\n"
+                   "elapsed = time.perf_counter ( ) - start\n"
+                   "print ( json.dumps ( { 'elapsed' : elapsed,\n"
+                   "                       'modules' : sorted ( sys.modules.keys ( ) ),\n"
+                   "                       'threads' : threading.active_count ( ),\n"
+                   "                       'db' : tuna.db is None } ) )\n" )
+        output = subprocess.check_output ( [ sys.executable, "-c", script ] )
+        self.result = json.loads ( output.decode ( "utf-8" ).splitlines ( ) [ -1 ] )
+
+    def test_import_time ( self ):
+        self.assertLess ( self.result [ 'elapsed' ], self.import_budget )
+
+    def test_import_is_lazy ( self ):
+        for module in self.heavy_modules:
+            self.assertNotIn ( module, self.result [ 'modules' ] )
+        self.assertNotIn ( "tuna.io", self.result [ 'modules' ] )
+
+    def test_daemons_are_opt_in ( self ):
+        self.assertEqual ( self.result [ 'threads' ], 1 )
+        self.assertTrue ( self.result [ 'db' ] )
+
 if __name__ == '__main__':
     unittest.main ( )
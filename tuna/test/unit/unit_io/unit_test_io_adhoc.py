@@ -1,5 +1,8 @@
+import importlib
 import logging
+import numpy
 import os
+import tempfile
 import tuna
 import unittest
 
@@ -18,6 +21,41 @@ class unit_test_io_adhoc ( unittest.TestCase ):
     def test_empty_file ( self ):
         tuna.io.read ( self.here + "/tuna/test/unit/unit_io/fake_adhoc.ad2" )
 
+    def test_memmap_2d_file ( self ):
+        ad = tuna.io.adhoc ( file_name = self.here + "/tuna/test/unit/unit_io/adhoc.ad2", memmap = True )
+        ad.read ( )
+        self.assertEqual ( ad.get_array ( ).shape, ( 512, 512 ) )
+        self.assertEqual ( ad.get_trailer ( ) [ 'nbdim' ], 2 )
+        self.assertEqual ( ad.get_plane ( 0 ).shape, ( 512, 512 ) )
+
+        mapped = tuna.io.read ( self.here + "/tuna/test/unit/unit_io/adhoc.ad2", memmap = True )
+        self.assertFalse ( mapped.is_loaded ( ) )
+        self.assertEqual ( mapped.shape, ( 512, 512 ) )
+        eager = tuna.io.read ( self.here + "/tuna/test/unit/unit_io/adhoc.ad2" )
+        self.assertTrue ( numpy.array_equal ( mapped.array, eager.array, equal_nan = True ) )
+        self.assertTrue ( numpy.array_equal ( ad.get_plane ( 0 ), eager.array, equal_nan = True ) )
+
+    def test_memmap_3d_file ( self ):
+        adhoc_module = importlib.import_module ( "tuna.io.adhoc" )
+        data = numpy.arange ( 4 * 5 * 6, dtype = numpy.float32 )
+        data [ [ 3, 50, 77 ] ] = adhoc_module.adhoc_sentinel
+        with tempfile.TemporaryDirectory ( ) as directory:
+            for nbdim in [ 3, -3 ]:
+                trailer = numpy.zeros ( 1, dtype = adhoc_module.adhoc_3d_trailer_type )
+                trailer [ 'nbdim' ] = nbdim
+                trailer [ 'lx' ] = 6
+                trailer [ 'ly' ] = 5
+                trailer [ 'lz' ] = 4
+                file_name = os.path.join ( directory, "synthetic_{}.ad3".format ( nbdim ) )
+                with open ( file_name, "wb" ) as adhoc_file:
+                    adhoc_file.write ( data.tobytes ( ) + trailer.tobytes ( ) )
+
+                eager = tuna.io.read ( file_name )
+                mapped = tuna.io.read ( file_name, memmap = True )
+                self.assertEqual ( eager.shape, ( 4, 5, 6 ) )
+                self.assertEqual ( numpy.isnan ( eager.array ).sum ( ), 3 )
+                self.assertTrue ( numpy.array_equal ( mapped.array, eager.array, equal_nan = True ) )
+
     def test_no_file_name ( self ):
         ad = tuna.io.adhoc ( )
         ad.read ( )
@@ -1,5 +1,7 @@
 import logging
+import numpy
 import os
+import tempfile
 import tuna
 import unittest
 
@@ -9,9 +11,24 @@ class unit_test_io_adhoc_ada ( unittest.TestCase ):
         self.home = os.path.expanduser ( "~" )
         tuna.log.set_path ( self.home + "/nose.log" )
 
+    def test_accumulate_photons ( self ):
+        hits = numpy.array ( [ [ 0, 1 ], [ 0, 1 ], [ 2, 0 ], [ 5, 5 ] ], dtype = numpy.int16 )
+        counts = tuna.io.adhoc_ada.accumulate_photons ( hits, ( 3, 2 ) )
+        expected = numpy.array ( [ [ 0, 2 ], [ 0, 0 ], [ 1, 0 ] ] )
+        self.assertTrue ( numpy.array_equal ( counts, expected ) )
+
     def test_empty_file ( self ):
         tuna.io.read ( self.here + "/tuna/test/unit/unit_io/fake_adhoc.ada" )
 
+    def test_follow ( self ):
+        file_name = self.here + "/tuna/test/unit/unit_io/G093/G093.ADT"
+        g093 = tuna.io.ada ( file_name = file_name )
+        g093.read ( )
+        live = tuna.io.ada ( file_name = file_name )
+        for snapshot in live.follow ( interval = 0.01, idle_timeout = 0.05 ):
+            pass
+        self.assertTrue ( numpy.array_equal ( snapshot, g093.get_array ( ) ) )
+
     def test_no_file_name ( self ):
         ad = tuna.io.ada ( )
         ad.read ( )
@@ -32,6 +49,36 @@ class unit_test_io_adhoc_ada ( unittest.TestCase ):
         # Unless a race condition, adhoc_test_file_?.ad2 does not exist.
         self.assertRaises ( OSError, tuna.io.read, file_name )
 
+    def test_parse_adt ( self ):
+        header, records = tuna.io.parse_adt ( self.here + "/tuna/test/unit/unit_io/G093/G093.ADT" )
+        self.assertEqual ( header [ "X and Y dimensions" ] [ 0 ], "00512 00512" )
+        self.assertEqual ( len ( records [ "channel" ] ), 649 )
+        self.assertEqual ( list ( records [ "Queensgate value" ] [ : 3 ] ), [ -359, -359, -339 ] )
+        self.assertEqual ( records [ "cycle" ] [ -1 ], 18 )
+
+    def test_parallel_adt_file ( self ):
+        file_name = self.here + "/tuna/test/unit/unit_io/G093/G093.ADT"
+        serial = tuna.io.ada ( file_name = file_name )
+        serial.read ( )
+        parallel = tuna.io.ada ( file_name = file_name, processes = 2 )
+        parallel.read ( )
+        self.assertTrue ( numpy.array_equal ( serial.get_array ( ), parallel.get_array ( ) ) )
+
+    def test_photon_index ( self ):
+        file_name = self.here + "/tuna/test/unit/unit_io/G093/G093.ADT"
+        g093 = tuna.io.ada ( file_name = file_name )
+        g093.read ( )
+        index = tuna.io.photon_index ( file_name = file_name )
+        index.build ( )
+        self.assertTrue ( numpy.array_equal ( index.get_array ( ), g093.get_array ( ) ) )
+        with tempfile.TemporaryDirectory ( ) as directory:
+            index_file_name = os.path.join ( directory, "g093_index.npz" )
+            index.save ( index_file_name )
+            stored = tuna.io.photon_index ( file_name = index_file_name )
+            stored.read ( )
+            partial = stored.get_array ( cycles = [ 1, 2 ] ) + stored.get_array ( exclude_cycles = [ 1, 2 ] )
+        self.assertTrue ( numpy.array_equal ( partial, g093.get_array ( ) ) )
+
     def test_valid_adt_file ( self ):
         log = logging.getLogger ( __name__ )
         g093 = tuna.io.read ( self.here + "/tuna/test/unit/unit_io/G093/G093.ADT" )
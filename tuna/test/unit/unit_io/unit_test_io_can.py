@@ -1,8 +1,33 @@
+import importlib
 import logging
 import numpy
 import os
+import tempfile
+import types
 import tuna
 import unittest
+import zlib
+
+class queued_database ( object ):
+    """
+    Keeps submitted functions until run ( ), as if the database thread were busy.
+    """
+    def __init__ ( self ):
+        self.queued = [ ]
+        self.records = [ ]
+
+    def insert_record ( self, table, columns_values ):
+        self.records.append ( columns_values )
+
+    def run ( self ):
+        for function, args in self.queued:
+            function ( *args )
+
+    def select_record ( self, table, columns_values ):
+        return [ ], True
+
+    def submit ( self, function, *args ):
+        self.queued.append ( ( function, args ) )
 
 class unit_test_io_can ( unittest.TestCase ):
     def setUp ( self ):
@@ -16,11 +41,114 @@ class unit_test_io_can ( unittest.TestCase ):
         z3 = z1 + z2
         self.assertTrue ( numpy.array_equal ( z3, z2 ) )
 
+    def test_arithmetic_is_transient ( self ):
+        z1 = tuna.io.can ( array = numpy.zeros ( shape = ( 1, 2, 3 ) ) )
+        z2 = tuna.io.can ( array = numpy.ones ( shape = ( 1, 2, 3 ) ) )
+        self.assertFalse ( z1.transient )
+        self.assertTrue ( ( z1 + z2 ).transient )
+        self.assertTrue ( ( z2 - z1 ).transient )
+
+    def test_database_refresh_digest ( self ):
+        # The refresh describes the array as it was when the can was updated, even if it ran after an in-place change.
+        previous = tuna.db
+        tuna.db = queued_database ( )
+        try:
+            z = tuna.io.can ( array = numpy.zeros ( shape = ( 1, 2, 3 ) ) )
+            original = tuna.tools.get_hash_from_array ( numpy.zeros ( shape = ( 1, 2, 3 ) ) )
+            z += 1
+            tuna.db.run ( )
+            self.assertEqual ( [ record [ 'hash' ] for record in tuna.db.records ], [ original ] )
+            self.assertEqual ( z.digest, tuna.tools.get_hash_from_array ( numpy.ones ( shape = ( 1, 2, 3 ) ) ) )
+        finally:
+            tuna.db = previous
+
     def test_convert_to_table ( self ):
         file_name = self.here + "/tuna/test/unit/unit_io/adhoc.ad2"
         can = tuna.io.read ( file_name )
         table = can.convert_ndarray_into_table ( )
 
+    def test_convert_table_round_trip ( self ):
+        array = numpy.zeros ( shape = ( 3, 4, 5 ) )
+        array [ 0, 1, 2 ] = 3
+        array [ 2, 3, 4 ] = 7
+        can = tuna.io.can ( array = array )
+        can.convert_ndarray_into_table ( )
+        self.assertEqual ( len ( can.photons [ 'photons' ] ), 2 )
+        self.assertEqual ( list ( can.photons [ 'channel' ] ), [ 1, 3 ] )
+        from_table = tuna.io.can ( photons = can.photons )
+        self.assertTrue ( numpy.array_equal ( from_table.array, array ) )
+
+    def test_in_place_arithmetic ( self ):
+        cube = tuna.io.can ( array = numpy.ones ( shape = ( 2, 3, 4 ) ) )
+        array = cube.array
+        digest = cube.digest
+        cube += tuna.io.can ( array = numpy.ones ( shape = ( 2, 3, 4 ) ) )
+        cube *= 3
+        cube -= 1
+        cube /= 5
+        self.assertIs ( cube.array, array )
+        self.assertTrue ( numpy.all ( cube.array == 1 ) )
+        self.assertEqual ( cube.digest, digest )
+        cube += 1
+        self.assertNotEqual ( cube.digest, digest )
+        self.assertTrue ( numpy.all ( ( cube * 2 ).array == 4 ) )
+
+        # Integer cubes, such as ADT photon counts, are promoted when the result is not an integer.
+        counts = tuna.io.can ( array = numpy.full ( ( 2, 3, 4 ), 8, dtype = numpy.uint16 ) )
+        array = counts.array
+        counts += 2
+        self.assertIs ( counts.array, array )
+        counts /= 4
+        self.assertEqual ( counts.array.dtype, numpy.float64 )
+        self.assertTrue ( numpy.all ( counts.array == 2.5 ) )
+        counts = tuna.io.can ( array = numpy.full ( ( 2, 3, 4 ), 8, dtype = numpy.uint16 ) )
+        counts *= 0.5
+        self.assertTrue ( numpy.all ( counts.array == 4 ) )
+
+    def test_views ( self ):
+        array = numpy.arange ( 24, dtype = numpy.int16 ).reshape ( ( 2, 3, 4 ) )
+        cube = tuna.io.can ( array = array )
+        plane = cube [ 1 ]
+        self.assertTrue ( plane.transient )
+        self.assertTrue ( numpy.shares_memory ( plane.array, array ) )
+        self.assertEqual ( cube.transpose ( 0, 2, 1 ).shape, ( 2, 4, 3 ) )
+        mirrored = cube.fliplr ( view = True )
+        self.assertEqual ( mirrored.array [ 0, 0, 0 ], 3 )
+        self.assertTrue ( numpy.shares_memory ( mirrored.array, array ) )
+        cube.flipud ( )
+        self.assertEqual ( cube.dtype, numpy.int16 )
+        self.assertEqual ( cube.array [ 0, 0, 0 ], 8 )
+        independent = cube.copy ( )
+        independent += 1
+        self.assertEqual ( cube.array [ 0, 0, 0 ], 8 )
+
+    def test_lazy_read ( self ):
+        file_name = "../test_lazy.can"
+        if ( os.path.isfile ( file_name ) ):
+            os.remove ( file_name )
+
+        array = numpy.arange ( 24, dtype = numpy.float32 ).reshape ( ( 2, 3, 4 ) )
+        metadata = { 'notes' : ( "lamp", "" ) }
+        tuna.io.write ( file_name = file_name, array = array, metadata = metadata, file_format = 'can' )
+
+        can = tuna.io.read ( file_name, lazy = True )
+        self.assertFalse ( can.is_loaded ( ) )
+        self.assertEqual ( can.shape, ( 2, 3, 4 ) )
+        self.assertEqual ( can.planes, 2 )
+        self.assertEqual ( can.dtype, numpy.float32 )
+        self.assertEqual ( can.metadata [ 'notes' ], ( "lamp", "" ) )
+        self.assertFalse ( can.is_loaded ( ) )
+
+        self.assertEqual ( can.digest, tuna.tools.get_hash_from_array ( array ) )
+        self.assertTrue ( can.is_loaded ( ) )
+        self.assertTrue ( numpy.array_equal ( can.array, array ) )
+
+        can.array = array * 2
+        self.assertEqual ( can.digest, tuna.tools.get_hash_from_array ( array * 2 ) )
+
+        if ( os.path.isfile ( file_name ) ):
+            os.remove ( file_name )
+
     def test_subtract ( self ):
         z1 = numpy.ones ( shape = ( 1, 2, 3 ) )
         z2 = numpy.ones ( shape = ( 1, 2, 3 ) )
@@ -51,6 +179,80 @@ class unit_test_io_can ( unittest.TestCase ):
         if ( os.path.isfile ( file_name ) ):
             os.remove ( file_name )
 
+    def test_write_can_file ( self ):
+        file_name = "../test_write.can"
+        if ( os.path.isfile ( file_name ) ):
+            os.remove ( file_name )
+
+        array = numpy.arange ( 24, dtype = numpy.float32 ).reshape ( ( 2, 3, 4 ) )
+        metadata = { 'channel' : ( numpy.array ( [ 1, 2 ] ), "" ),
+                     'notes'   : ( "lamp", "comment" ) }
+        tuna.io.write ( file_name = file_name, array = array, metadata = metadata, file_format = 'can' )
+
+        for memmap in [ False, True ]:
+            can = tuna.io.read ( file_name, memmap = memmap )
+            self.assertEqual ( can.file_type, "can" )
+            self.assertEqual ( can.array.dtype, numpy.float32 )
+            self.assertTrue ( numpy.array_equal ( can.array, array ) )
+            self.assertEqual ( can.metadata [ 'notes' ], ( "lamp", "comment" ) )
+            self.assertTrue ( numpy.array_equal ( can.metadata [ 'channel' ] [ 0 ], [ 1, 2 ] ) )
+
+        if ( os.path.isfile ( file_name ) ):
+            os.remove ( file_name )
+
+    def test_write_chunked_file ( self ):
+        file_name = "../test_write.canz"
+        if ( os.path.isfile ( file_name ) ):
+            os.remove ( file_name )
+
+        array = numpy.zeros ( shape = ( 3, 10, 7 ), dtype = numpy.uint16 )
+        array [ 1, 4, 5 ] = 12
+        array [ 2, 9, 0 ] = 3
+        chunked = tuna.io.chunked_file ( array = array, file_name = file_name, tile_shape = ( 4, 4 ) )
+        chunked.write ( )
+
+        can = tuna.io.read ( file_name )
+        self.assertEqual ( can.file_type, "canz" )
+        self.assertTrue ( numpy.array_equal ( can.array, array ) )
+
+        chunked = tuna.io.chunked_file ( file_name = file_name )
+        self.assertTrue ( numpy.array_equal ( chunked.get_plane ( 2 ), array [ 2 ] ) )
+        region = chunked.get_region ( planes = slice ( 1, 3 ), rows = slice ( 3, 10 ), cols = slice ( 2, 6 ) )
+        self.assertTrue ( numpy.array_equal ( region, array [ 1 : 3, 3 : 10, 2 : 6 ] ) )
+
+        if ( os.path.isfile ( file_name ) ):
+            os.remove ( file_name )
+
+    def test_write_chunked_region ( self ):
+        # Through tuna.io.write, planes are tiled, and a region only decompresses the tiles it touches.
+        chunked_module = importlib.import_module ( "tuna.io.chunked_file" )
+        array = numpy.arange ( 2 * 600 * 600, dtype = numpy.int32 ).reshape ( ( 2, 600, 600 ) )
+        with tempfile.TemporaryDirectory ( ) as directory:
+            file_name = os.path.join ( directory, "tiled.canz" )
+            tuna.io.write ( array = array, file_name = file_name, file_format = "canz" )
+            self.assertTrue ( numpy.array_equal ( tuna.io.read ( file_name ).array, array ) )
+
+            chunked = tuna.io.chunked_file ( file_name = file_name )
+            chunked.read_header ( )
+            self.assertEqual ( chunked.get_tile_shape ( ), chunked_module.default_tile_shape )
+
+            decompressed = [ ]
+            def counting_decompress ( data ):
+                decompressed.append ( len ( data ) )
+                return zlib.decompress ( data )
+            chunked_module.zlib = types.SimpleNamespace ( compress = zlib.compress, decompress = counting_decompress )
+            try:
+                region = chunked.get_region ( planes = 1, rows = slice ( 300, 400 ), cols = slice ( 10, 20 ) )
+            finally:
+                chunked_module.zlib = zlib
+            self.assertTrue ( numpy.array_equal ( region, array [ 1 : 2, 300 : 400, 10 : 20 ] ) )
+            self.assertEqual ( len ( decompressed ), 1 )
+
+            tuna.io.write ( array = array, file_name = file_name, file_format = "canz", tile_shape = ( 100, 600 ) )
+            chunked = tuna.io.chunked_file ( file_name = file_name )
+            chunked.read_header ( )
+            self.assertEqual ( chunked.get_tile_shape ( ), ( 100, 600 ) )
+
     def tearDown ( self ):
         pass
 
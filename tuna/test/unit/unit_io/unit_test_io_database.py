@@ -0,0 +1,158 @@
+import os
+import shutil
+import tempfile
+import tuna
+import unittest
+
+class recording_cursor ( object ):
+    def __init__ ( self, connection ):
+        self.connection = connection
+        self.result = ( )
+
+    def close ( self ):
+        pass
+
+    def execute ( self, sql, values = None ):
+        self.connection.statements.append ( ( sql, values ) )
+        if sql == "show tables":
+            self.result = [ { 'table' : 'datasets' }, { 'table' : 'noise' } ]
+
+    def executemany ( self, sql, values ):
+        self.connection.statements.append ( ( sql, list ( values ) ) )
+
+    def fetchall ( self ):
+        return self.result
+
+class recording_connection ( object ):
+    def __init__ ( self ):
+        self.statements = [ ]
+        self.commits = 0
+
+    def close ( self ):
+        pass
+
+    def commit ( self ):
+        self.commits += 1
+
+    def cursor ( self ):
+        return recording_cursor ( self )
+
+    def rollback ( self ):
+        pass
+
+class unit_test_io_database ( unittest.TestCase ):
+    def setUp ( self ):
+        tuna.log.set_path ( "nose.log" )
+
+    def test_batched_writes ( self ):
+        db = tuna.io.database ( )
+        db.connection = recording_connection ( )
+        db.start ( )
+        self.assertTrue ( db.flush ( timeout = 5 ) )
+        db.connection.statements = [ ]
+        db.connection.commits = 0
+
+        with db.queue_condition:
+            for entry in range ( 3 ):
+                db.insert_record ( 'datasets', { 'hash'      : str ( entry ),
+                                                 'file_name' : "file_{}".format ( entry ),
+                                                 'file_type' : "can" } )
+            db.update_record ( 'datasets', { 'hash'      : "0",
+                                             'file_name' : "renamed",
+                                             'file_type' : "can" } )
+        self.assertTrue ( db.flush ( timeout = 5 ) )
+
+        self.assertEqual ( len ( db.connection.statements ), 2 )
+        self.assertEqual ( db.connection.commits, 1 )
+        insert_sql, insert_values = db.connection.statements [ 0 ]
+        self.assertTrue ( insert_sql.startswith ( "insert into datasets" ) )
+        self.assertEqual ( len ( insert_values ), 3 )
+        update_sql, update_values = db.connection.statements [ 1 ]
+        self.assertTrue ( update_sql.startswith ( "update datasets" ) )
+        self.assertEqual ( update_values, [ [ "renamed", "can", "0" ] ] )
+
+        db.stop ( )
+        db.join ( timeout = 5 )
+        self.assertFalse ( db.is_alive ( ) )
+
+    def test_select_cache ( self ):
+        db = tuna.io.database ( )
+        db.connection = recording_connection ( )
+
+        records, success = db.select_record ( 'datasets', { 'hash' : "abc" } )
+        self.assertTrue ( success )
+        self.assertEqual ( len ( db.connection.statements ), 1 )
+        db.select_record ( 'datasets', { 'hash' : "abc" } )
+        self.assertEqual ( len ( db.connection.statements ), 1 )
+
+        db.insert_record ( 'datasets', { 'hash'      : "abc",
+                                         'file_name' : "lamp.can",
+                                         'file_type' : "can" } )
+        db.update_record ( 'datasets', { 'hash'      : "abc",
+                                         'file_type' : "fits" } )
+        records, success = db.select_record ( 'datasets', { 'hash' : "abc" } )
+        self.assertEqual ( len ( db.connection.statements ), 1 )
+        self.assertEqual ( records [ 0 ] [ 'file_name' ], "lamp.can" )
+        self.assertEqual ( records [ 0 ] [ 'file_type' ], "fits" )
+
+        db.select_cache_size = 1
+        db.select_record ( 'datasets', { 'hash' : "def" } )
+        self.assertEqual ( list ( db.select_cache.keys ( ) ), [ db.cache_key ( 'datasets', { 'hash' : "def" } ) ] )
+
+    def test_sqlite_backend ( self ):
+        directory = tempfile.mkdtemp ( )
+        backend = tuna.io.sqlite_backend ( file_name = os.path.join ( directory, "tuna.sqlite" ) )
+        db = tuna.io.database ( backend = backend )
+        db.start ( )
+        db.insert_record ( 'datasets', { 'hash'      : "abc",
+                                         'file_name' : "lamp.can",
+                                         'file_type' : "can" } )
+        db.update_record ( 'datasets', { 'hash'      : "abc",
+                                         'file_type' : "canz" } )
+        self.assertTrue ( db.flush ( timeout = 5 ) )
+        db.clear_cache ( )
+
+        records, success = db.select_record ( 'datasets', { 'hash' : "abc" } )
+        self.assertTrue ( success )
+        self.assertEqual ( records [ 0 ] [ 'file_name' ], "lamp.can" )
+        self.assertEqual ( records [ 0 ] [ 'file_type' ], "canz" )
+
+        db.stop ( )
+        db.join ( timeout = 5 )
+        shutil.rmtree ( directory )
+
+    def test_failed_batch ( self ):
+        with tempfile.TemporaryDirectory ( ) as directory:
+            backend = tuna.io.sqlite_backend ( file_name = os.path.join ( directory, "tuna.sqlite" ) )
+            db = tuna.io.database ( backend = backend )
+            db.start ( )
+            db.insert_record ( 'datasets', { 'hash'      : "a",
+                                             'file_name' : "lamp.can",
+                                             'file_type' : "can" } )
+            self.assertTrue ( db.flush ( timeout = 5 ) )
+
+            # The duplicate of "a" fails; the other records of its batch must be kept.
+            with db.queue_condition:
+                for hash in [ "b", "a", "c" ]:
+                    db.insert_record ( 'datasets', { 'hash'      : hash,
+                                                     'file_name' : "dup",
+                                                     'file_type' : "can" } )
+            self.assertTrue ( db.flush ( timeout = 5 ) )
+
+            records, success = db.select_record ( 'datasets', { 'hash' : "a" } )
+            self.assertTrue ( success )
+            self.assertEqual ( records [ 0 ] [ 'file_name' ], "lamp.can" )
+            db.clear_cache ( )
+            for hash in [ "a", "b", "c" ]:
+                records, success = db.select_record ( 'datasets', { 'hash' : hash } )
+                self.assertEqual ( len ( records ), 1 )
+            self.assertEqual ( db.select_record ( 'datasets', { 'hash' : "a" } ) [ 0 ] [ 0 ] [ 'file_name' ], "lamp.can" )
+
+            db.stop ( )
+            db.join ( timeout = 5 )
+
+    def tearDown ( self ):
+        pass
+
+if __name__ == '__main__':
+    unittest.main ( )
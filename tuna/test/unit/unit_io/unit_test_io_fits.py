@@ -0,0 +1,87 @@
+import astropy.io.fits
+import numpy
+import os
+import shutil
+import tempfile
+import tuna
+import unittest
+
+class unit_test_io_fits ( unittest.TestCase ):
+    def setUp ( self ):
+        tuna.log.set_path ( "nose.log" )
+        self.directory = tempfile.mkdtemp ( )
+
+    def test_memmap_single_image ( self ):
+        file_name = os.path.join ( self.directory, "single.fits" )
+        array = numpy.arange ( 24, dtype = numpy.float32 ).reshape ( ( 2, 3, 4 ) )
+        astropy.io.fits.PrimaryHDU ( array ).writeto ( file_name )
+
+        fits_object = tuna.io.fits ( file_name = file_name, memmap = True )
+        fits_object.read ( )
+        self.assertEqual ( fits_object.get_array ( ).dtype.kind, 'f' )
+        self.assertEqual ( fits_object.get_array ( ).dtype.itemsize, 4 )
+        self.assertTrue ( numpy.array_equal ( fits_object.get_array ( ), array ) )
+        fits_object.close ( )
+
+    def test_mosaic ( self ):
+        file_name = os.path.join ( self.directory, "mosaic.fits" )
+        panels = [ numpy.full ( ( 3, 5 ), panel, dtype = numpy.int16 ) for panel in range ( 4 ) ]
+        hdu_list = astropy.io.fits.HDUList ( [ astropy.io.fits.PrimaryHDU ( ) ] +
+                                             [ astropy.io.fits.ImageHDU ( panel ) for panel in panels ] )
+        hdu_list.writeto ( file_name )
+
+        fits_object = tuna.io.fits ( file_name = file_name )
+        fits_object.read ( )
+        mosaic = fits_object.get_array ( )
+        self.assertEqual ( mosaic.shape, ( 6, 10 ) )
+        self.assertEqual ( mosaic.dtype, numpy.int16 )
+        self.assertEqual ( list ( mosaic [ :, 0 ] ), [ 0, 0, 0, 2, 2, 2 ] )
+        self.assertEqual ( list ( mosaic [ 0, : : 5 ] ), [ 0, 1 ] )
+
+    def test_plane_writer ( self ):
+        file_name = os.path.join ( self.directory, "streamed.fits" )
+        with tuna.io.fits_plane_writer ( file_name = file_name,
+                                         shape = ( 3, 4, 5 ),
+                                         dtype = numpy.uint16,
+                                         metadata = { "OBSERVER" : ( "tuna", "" ) } ) as writer:
+            for plane in range ( 3 ):
+                complete = writer.write ( numpy.full ( ( 4, 5 ), 40000 + plane, dtype = numpy.uint16 ) )
+        self.assertTrue ( complete )
+        data = astropy.io.fits.getdata ( file_name )
+        self.assertEqual ( data.dtype, numpy.uint16 )
+        self.assertEqual ( list ( data [ :, 0, 0 ] ), [ 40000, 40001, 40002 ] )
+        self.assertEqual ( astropy.io.fits.getheader ( file_name ) [ "OBSERVER" ], "tuna" )
+
+    def test_offset_integers ( self ):
+        # int8 and uint64 are stored with BZERO, as uint8 and int64.
+        for dtype in [ numpy.int8, numpy.uint16, numpy.uint64 ]:
+            information = numpy.iinfo ( dtype )
+            array = numpy.array ( [ [ [ information.min, 0, 1 ], [ 7, information.max - 1, information.max ] ] ], dtype = dtype )
+            file_name = os.path.join ( self.directory, "offset_{}.fits".format ( numpy.dtype ( dtype ).name ) )
+            tuna.io.write ( array = array, file_name = file_name, file_format = "fits" )
+            read = tuna.io.read ( file_name )
+            self.assertEqual ( read.array.dtype, dtype )
+            self.assertTrue ( numpy.array_equal ( read.array, array ) )
+
+    def test_tables ( self ):
+        file_name = os.path.join ( self.directory, "tables.fits" )
+        metadata = { "channel" : ( numpy.array ( [ 1, 2, 3 ] ), "" ),
+                     "shutter" : ( numpy.array ( [ "open", "open", "closed" ] ), "" ) }
+        photons = { "x" : numpy.array ( [ 0, 1 ] ), "photons" : numpy.array ( [ 5, 7 ] ) }
+        fits_object = tuna.io.fits ( array = numpy.zeros ( ( 2, 2 ) ),
+                                     file_name = file_name,
+                                     metadata = metadata,
+                                     photons = photons )
+        fits_object.write_metadata_table ( )
+        fits_object.write_photons_table ( )
+        metadata_table = astropy.io.fits.getdata ( os.path.join ( self.directory, "metadata_tables.fits" ), 1 )
+        self.assertEqual ( list ( metadata_table [ "channel" ] ), [ 1, 2, 3 ] )
+        self.assertEqual ( metadata_table [ "shutter" ] [ 2 ], "closed" )
+        photons_table = astropy.io.fits.getdata ( os.path.join ( self.directory, "photons_tables.fits" ), 1 )
+        self.assertEqual ( list ( photons_table [ "photons" ] ), [ 5, 7 ] )
+
+    def tearDown ( self ):
+        shutil.rmtree ( self.directory )
+
+if __name__ == '__main__':
+    unittest.main ( )
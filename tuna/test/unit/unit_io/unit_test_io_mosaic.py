@@ -0,0 +1,41 @@
+import astropy.io.fits
+import numpy
+import os
+import shutil
+import tempfile
+import tuna
+import unittest
+
+class unit_test_io_mosaic ( unittest.TestCase ):
+    def setUp ( self ):
+        tuna.log.set_path ( "nose.log" )
+        self.directory = tempfile.mkdtemp ( )
+        self.file_name = os.path.join ( self.directory, "compressed.fits" )
+        self.panels = [ numpy.full ( ( 4, 6 ), panel + 1, dtype = numpy.int32 ) for panel in range ( 4 ) ]
+        hdu_list = astropy.io.fits.HDUList ( [ astropy.io.fits.PrimaryHDU ( ) ] +
+                                             [ astropy.io.fits.CompImageHDU ( panel ) for panel in self.panels ] )
+        hdu_list.writeto ( self.file_name )
+
+    def test_assemble_mosaic ( self ):
+        jobs = [ ( ( slice ( 4 * ( panel // 2 ), 4 * ( panel // 2 + 1 ) ),
+                     slice ( 6 * ( panel % 2 ), 6 * ( panel % 2 + 1 ) ) ),
+                   ( self.file_name, panel + 1 ) ) for panel in range ( 4 ) ]
+        expected = numpy.block ( [ [ self.panels [ 0 ], self.panels [ 1 ] ],
+                                   [ self.panels [ 2 ], self.panels [ 3 ] ] ] )
+        for workers in [ 1, 4 ]:
+            mosaic = tuna.io.assemble_mosaic ( jobs, shape = ( 8, 12 ), workers = workers )
+            self.assertEqual ( mosaic.dtype, numpy.int32 )
+            self.assertTrue ( numpy.array_equal ( mosaic, expected ) )
+
+    def test_assemble_into_output ( self ):
+        cube = numpy.zeros ( shape = ( 2, 4, 6 ) )
+        jobs = [ ( ( plane, slice ( None ), slice ( None ) ), ( self.file_name, plane + 1 ) ) for plane in range ( 2 ) ]
+        result = tuna.io.assemble_mosaic ( jobs, output = cube, workers = 2 )
+        self.assertIs ( result, cube )
+        self.assertEqual ( list ( cube [ :, 0, 0 ] ), [ 1, 2 ] )
+
+    def tearDown ( self ):
+        shutil.rmtree ( self.directory )
+
+if __name__ == '__main__':
+    unittest.main ( )
@@ -0,0 +1,57 @@
+import numpy
+import shutil
+import tempfile
+import tuna
+import unittest
+
+class unit_test_plugins_cache ( unittest.TestCase ):
+    def setUp ( self ):
+        tuna.log.set_path ( "nose.log" )
+        self.directory = tempfile.mkdtemp ( )
+        self.calls = 0
+
+    def summed ( self, data : tuna.io.can, factor : float ) -> tuna.io.can:
+        self.calls += 1
+        return tuna.io.can ( array = data.array.sum ( axis = 0 ) * factor )
+
+    def test_cached_results ( self ):
+        cache = tuna.plugins.plugin_cache ( directory = self.directory )
+        plugin = cache.wrap ( "Sum", self.summed )
+        data = tuna.io.can ( array = numpy.ones ( shape = ( 2, 3, 3 ) ) )
+
+        first = plugin ( data = data, factor = 2 )
+        second = plugin ( data = tuna.io.can ( array = numpy.ones ( shape = ( 2, 3, 3 ) ) ), factor = 2 )
+        self.assertEqual ( self.calls, 1 )
+        self.assertTrue ( numpy.array_equal ( first.array, second.array ) )
+
+        plugin ( data = data, factor = 3 )
+        self.assertEqual ( self.calls, 2 )
+
+    def test_same_bytes_different_arrays ( self ):
+        # The digest covers only the bytes of the array; its dtype and shape are part of the key too.
+        cache = tuna.plugins.plugin_cache ( directory = self.directory )
+        plugin = cache.wrap ( "Sum", self.summed )
+
+        first = plugin ( data = tuna.io.can ( array = numpy.zeros ( shape = ( 2, 4, 4 ) ) ), factor = 1 )
+        second = plugin ( data = tuna.io.can ( array = numpy.zeros ( shape = ( 4, 2, 4 ) ) ), factor = 1 )
+        self.assertEqual ( self.calls, 2 )
+        self.assertEqual ( first.array.shape, ( 4, 4 ) )
+        self.assertEqual ( second.array.shape, ( 2, 4 ) )
+
+        third = plugin ( data = tuna.io.can ( array = numpy.zeros ( shape = ( 2, 4, 4 ), dtype = numpy.int64 ) ), factor = 1 )
+        self.assertEqual ( self.calls, 3 )
+        self.assertEqual ( third.array.dtype, numpy.int64 )
+
+    def test_eviction ( self ):
+        cache = tuna.plugins.plugin_cache ( directory = self.directory, max_bytes = 1000 )
+        for entry in range ( 5 ):
+            cache.put ( "{:040d}".format ( entry ), numpy.zeros ( 50 ) )
+        self.assertTrue ( len ( cache._entries ( ) ) < 5 )
+        found, result = cache.get ( "{:040d}".format ( 4 ) )
+        self.assertTrue ( found )
+
+    def tearDown ( self ):
+        shutil.rmtree ( self.directory )
+
+if __name__ == '__main__':
+    unittest.main ( )
@@ -0,0 +1,85 @@
+import importlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import tuna
+import unittest
+
+class unit_test_plugins_registry ( unittest.TestCase ):
+    def setUp ( self ):
+        tuna.log.set_path ( "nose.log" )
+
+    def test_lazy_resolution ( self ):
+        # In a fresh interpreter, running one step must only import that step's module.
+        script = ( "import json, sys, tuna\n"
+                   "tuna.plugins.registry ( )\n"
+                   "tuna.plugins.registry ( 'Airy fit' )\n"
+                   "plugin = tuna.plugins.run ( 'Barycenter algorithm' )\n"
+                   "print ( json.dumps ( [ plugin.__module__, sorted ( sys.modules.keys ( ) ) ] ) )\n" )
+        output = subprocess.check_output ( [ sys.executable, "-c", script ] )
+        module, modules = json.loads ( output.decode ( "utf-8" ).splitlines ( ) [ -1 ] )
+        self.assertEqual ( module, "tuna.tools.barycenter" )
+        for unwanted in [ "mpyfit", "sympy", "tuna.models.airy", "tuna.tools.noise", "tuna.tools.spectral_rings_fitter" ]:
+            self.assertNotIn ( unwanted, modules )
+
+    def test_declared_signatures ( self ):
+        # The declared signatures must match the annotations of Tuna's implementations.
+        registry = importlib.import_module ( "tuna.plugins.registry" )
+        for step_name in [ "Barycenter algorithm", "Continuum detector", "FSR mapper", "Noise detector", "Overscan" ]:
+            reference = tuna.plugins.run ( step_name )
+            self.assertEqual ( registry.get_signature ( reference ),
+                               getattr ( registry, "__signatures" ) [ step_name ] )
+
+    def test_replace_and_add ( self ):
+        def barycenter ( data_can : tuna.io.can ) -> tuna.io.can:
+            return data_can
+        def incompatible ( data : int ) -> int:
+            return data
+        original = tuna.plugins.run ( "Barycenter algorithm" )
+        try:
+            tuna.plugins.registry ( "Barycenter algorithm", incompatible )
+            self.assertIs ( tuna.plugins.run ( "Barycenter algorithm" ), original )
+            tuna.plugins.registry ( "Barycenter algorithm", barycenter )
+            self.assertIs ( tuna.plugins.run ( "Barycenter algorithm" ), barycenter )
+        finally:
+            tuna.plugins.registry ( "Barycenter algorithm", "tuna.tools.barycenter.barycenter_geometry" )
+        self.assertIs ( tuna.plugins.run ( "Barycenter algorithm" ), original )
+
+        # New steps cannot be removed from the registry, so they are added in a fresh interpreter.
+        script = ( "import tuna\n"
+                   "tuna.plugins.registry ( 'Unit test step', 'tuna.tools.geometry:calculate_distance' )\n"
+                   "print ( tuna.plugins.run ( 'Unit test step' ) is tuna.tools.calculate_distance )\n" )
+        output = subprocess.check_output ( [ sys.executable, "-c", script ] )
+        self.assertEqual ( output.decode ( "utf-8" ).splitlines ( ) [ -1 ], "True" )
+
+    def test_entry_points ( self ):
+        directory = tempfile.mkdtemp ( )
+        try:
+            with open ( os.path.join ( directory, "unit_tuna_plugin.py" ), "w" ) as module_file:
+                module_file.write ( "import tuna\n"
+                                    "def barycenter ( data_can : tuna.io.can ) -> tuna.io.can:\n"
+                                    "    return data_can\n"
+                                    "def extra ( ):\n"
+                                    "    pass\n" )
+            metadata_directory = os.path.join ( directory, "unit_tuna_plugin-0.1.dist-info" )
+            os.mkdir ( metadata_directory )
+            with open ( os.path.join ( metadata_directory, "METADATA" ), "w" ) as metadata_file:
+                metadata_file.write ( "Metadata-Version: 2.1\nName: unit_tuna_plugin\nVersion: 0.1\n" )
+            with open ( os.path.join ( metadata_directory, "entry_points.txt" ), "w" ) as entry_points_file:
+                entry_points_file.write ( "[tuna.plugins]\n"
+                                          "Barycenter algorithm = unit_tuna_plugin:barycenter\n"
+                                          "Extra step = unit_tuna_plugin:extra\n" )
+            script = ( "import sys, tuna\n"
+                       "sys.path.insert ( 0, {} )\n"
+                       "print ( tuna.plugins.run ( 'Barycenter algorithm' ).__module__,\n"
+                       "        tuna.plugins.run ( 'Extra step' ).__name__ )\n" ).format ( repr ( directory ) )
+            output = subprocess.check_output ( [ sys.executable, "-c", script ] )
+            self.assertEqual ( output.decode ( "utf-8" ).split ( ), [ "unit_tuna_plugin", "extra" ] )
+        finally:
+            shutil.rmtree ( directory )
+
+if __name__ == '__main__':
+    unittest.main ( )
@@ -0,0 +1,34 @@
+import hashlib
+import numpy
+import tuna
+import unittest
+
+class unit_test_hash_functions ( unittest.TestCase ):
+    def setUp ( self ):
+        tuna.log.set_path ( "nose.log" )
+        self.array = numpy.arange ( 60, dtype = numpy.float64 ).reshape ( ( 3, 4, 5 ) )
+
+    def test_non_contiguous_array ( self ):
+        for array in [ self.array, self.array [ :, : : -1 ], self.array.T, numpy.asfortranarray ( self.array ) ]:
+            expected = hashlib.sha1 ( array.copy ( order = 'C' ) ).hexdigest ( )
+            self.assertEqual ( tuna.tools.get_hash_from_array ( array ), expected )
+
+    def test_blake2b ( self ):
+        digest = tuna.tools.get_hash_from_array ( self.array, algorithm = "blake2b" )
+        self.assertEqual ( len ( digest ), 40 )
+        self.assertNotEqual ( digest, tuna.tools.get_hash_from_array ( self.array ) )
+
+    def test_plane_hashes ( self ):
+        digests = tuna.tools.get_plane_hashes_from_array ( self.array )
+        self.assertEqual ( len ( digests ), 3 )
+        changed = self.array.copy ( )
+        changed [ 1, 2, 3 ] = -1
+        changed_digests = tuna.tools.get_plane_hashes_from_array ( changed )
+        self.assertEqual ( [ digests [ plane ] == changed_digests [ plane ] for plane in range ( 3 ) ],
+                           [ True, False, True ] )
+
+    def tearDown ( self ):
+        pass
+
+if __name__ == '__main__':
+    unittest.main ( )
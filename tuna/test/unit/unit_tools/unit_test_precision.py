@@ -0,0 +1,76 @@
+import numpy
+import os
+import tuna
+import unittest
+
+class unit_test_precision ( unittest.TestCase ):
+    """
+    Documents the accuracy cost of the "single" precision policy, against the "double" results of the same stages.
+    """
+    def setUp ( self ):
+        self.here = os.getcwd ( )
+        tuna.log.set_path ( "nose.log" )
+        self.previous = tuna.tools.get_precision ( )
+
+    def test_policy ( self ):
+        tuna.tools.set_precision ( "single" )
+        self.assertEqual ( tuna.tools.float_type ( ), numpy.float32 )
+        self.assertEqual ( tuna.tools.float_type ( precision = "double" ), numpy.float64 )
+        self.assertEqual ( tuna.tools.count_type ( ), numpy.uint32 )
+        tuna.tools.set_precision ( "double" )
+        self.assertEqual ( tuna.tools.float_type ( ), numpy.float64 )
+        self.assertRaises ( ValueError, tuna.tools.set_precision, "half" )
+
+    def test_narrow_counts ( self ):
+        counts = numpy.array ( [ 0, 7, 65535 ], dtype = numpy.uint32 )
+        self.assertEqual ( tuna.tools.narrow_counts ( counts, precision = "single" ).dtype, numpy.uint16 )
+        counts [ 0 ] = 65536
+        self.assertEqual ( tuna.tools.narrow_counts ( counts, precision = "single" ).dtype, numpy.uint32 )
+        self.assertIs ( tuna.tools.narrow_counts ( counts, precision = "double" ), counts )
+
+    def test_ada_counts_are_exact ( self ):
+        file_name = self.here + "/tuna/test/unit/unit_io/G093/G093.ADT"
+        double = tuna.io.ada ( file_name = file_name, precision = "double" )
+        double.read ( )
+        single = tuna.io.ada ( file_name = file_name, precision = "single" )
+        single.read ( )
+        self.assertEqual ( single.get_array ( ).dtype.kind, 'u' )
+        self.assertTrue ( numpy.array_equal ( single.get_array ( ), double.get_array ( ) ) )
+
+    def test_airy_plane_tolerance ( self ):
+        # The largest difference is below 1e-5 of the peak intensity, for gaps of up to 5 mm.
+        for gap in [ 250, 1000, 5000 ]:
+            parameters = { "gap" : gap,
+                           "shape_cols" : 1024,
+                           "shape_rows" : 1024,
+                           "center_col" : 512,
+                           "center_row" : 512 }
+            double = tuna.models.airy_plane ( precision = "double", **parameters )
+            single = tuna.models.airy_plane ( precision = "single", **parameters )
+            self.assertEqual ( single.dtype, numpy.float32 )
+            self.assertLess ( numpy.max ( numpy.abs ( single - double ) ) / double.max ( ), 1e-5 )
+
+    def test_continuum_tolerance ( self ):
+        # The "single" policy reads photon counts as uint16; their medians are exact in single precision.
+        file_name = self.here + "/tuna/test/unit/unit_io/G093/G093.ADT"
+        counts = tuna.io.ada ( file_name = file_name, precision = "single" )
+        counts.read ( )
+        cube = counts.get_array ( ) [ :, 200 : 216, 200 : 216 ]
+        self.assertEqual ( cube.dtype, numpy.uint16 )
+        double = tuna.tools.continuum_detector ( tuna.io.can ( array = cube.astype ( numpy.float64 ) ), precision = "double" )
+        single = tuna.tools.continuum_detector ( tuna.io.can ( array = cube ), precision = "single" )
+        self.assertEqual ( single.array.dtype, numpy.float32 )
+        self.assertTrue ( numpy.array_equal ( single.array, double.array ) )
+
+        # Counts near the top of the uint16 range are averaged without wrapping around.
+        spectrum = numpy.array ( [ 60000, 61000, 62000, 63000, 64000, 65000, 65500, 65535 ], dtype = numpy.uint16 )
+        self.assertEqual ( tuna.tools.continuum.median_of_lowest_channels ( spectrum = spectrum,
+                                                                            continuum_to_FSR_ratio = 0.5,
+                                                                            precision = "single" ),
+                           62000 )
+
+    def tearDown ( self ):
+        tuna.tools.set_precision ( self.previous )
+
+if __name__ == '__main__':
+    unittest.main ( )
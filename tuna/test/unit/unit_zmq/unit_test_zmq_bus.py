@@ -1,12 +1,14 @@
+import numpy
+import pickle
 import threading
 import tuna
 import unittest
 import zmq
 
 class threaded_bus ( threading.Thread ):
-    def __init__ ( self ):
+    def __init__ ( self, **kwargs ):
         super ( threaded_bus, self ).__init__ ( )
-        self.zmq_bus_instance = tuna.zeromq.zmq_proxy ( )
+        self.zmq_bus_instance = tuna.zeromq.zmq_broker ( **kwargs )
 
     def close ( self ):
         self.zmq_bus_instance.close ( )
@@ -14,36 +16,94 @@ class threaded_bus ( threading.Thread ):
     def run ( self ):
         self.zmq_bus_instance.run ( )
 
+class recording_socket ( object ):
+    def __init__ ( self ):
+        self.sent = [ ]
+
+    def send_multipart ( self, frames ):
+        self.sent.append ( frames )
+
 class unit_test_zmq_bus ( unittest.TestCase ):
+    frontend_address = "tcp://127.0.0.1:15000"
+
     @classmethod
     def setUpClass ( self ):
-        pass
+        tuna.log.set_path ( "nose.log" )
+        self.threaded_bus_instance = threaded_bus ( frontend_address = self.frontend_address,
+                                                    backend_address = "tcp://127.0.0.1:15002",
+                                                    workers = 2,
+                                                    heartbeat_interval = 0.2 )
+        self.threaded_bus_instance.start ( )
+        self.zmq_context = zmq.Context ( )
 
     @classmethod
     def tearDownClass ( self ):
-        pass
+        self.threaded_bus_instance.close ( )
+        self.threaded_bus_instance.join ( )
+        self.zmq_context.term ( )
+
+    def connect ( self, socket_type ):
+        socket = self.zmq_context.socket ( socket_type )
+        socket.setsockopt ( zmq.LINGER, 0 )
+        socket.setsockopt ( zmq.RCVTIMEO, 30000 )
+        socket.connect ( self.frontend_address )
+        return socket
 
     def test_zmq_bus_replies ( self ):
-        return 
+        socket = self.connect ( zmq.REQ )
+        socket.send ( b'test: zmq bus replies?' )
+        self.assertEqual ( socket.recv ( ), b'ACK' )
+        socket.close ( )
 
-        self.threaded_bus_instance = threaded_bus ( )
-        self.threaded_bus_instance.start ( )
+        socket = self.connect ( zmq.DEALER )
+        socket.send_multipart ( [ b"", b"ping" ] )
+        self.assertEqual ( socket.recv_multipart ( ), [ b"", b"pong" ] )
+        socket.close ( )
 
-        self.zmq_context = zmq.Context ( )
-        self.zmq_socket_req = self.zmq_context.socket ( zmq.REQ )
-        self.zmq_socket_req.connect ( "tcp://127.0.0.1:5000" )
-        self.zmq_socket_req.send ( b'test: zmq bus replies?' )
-        answer = self.zmq_socket_req.recv ( )
-        self.assertEqual ( answer, b'ACK' )
+    def test_zmq_bus_outstanding_tasks ( self ):
+        socket = self.connect ( zmq.DEALER )
+        cases = { }
+        for order in range ( 800, 808 ):
+            kwargs = { "radii" : [ 100, 200 ], "orders" : [ order, order + 1 ] }
+            request_id = str ( order ).encode ( "ascii" )
+            cases [ request_id ] = tuna.tools.estimate_b_ratio ( **kwargs )
+            socket.send_multipart ( [ b"", b"task", request_id, b"B-ratio estimation",
+                                      pickle.dumps ( ( ( ), kwargs ) ) ] )
+        for count in range ( len ( cases ) ):
+            empty, status, request_id, payload = socket.recv_multipart ( )
+            self.assertEqual ( status, b"result" )
+            self.assertEqual ( pickle.loads ( payload ), cases.pop ( request_id ) )
+        self.assertEqual ( cases, { } )
+        socket.close ( )
 
-        self.threaded_bus_instance.close ( )
-        self.threaded_bus_instance.join ( )
-        
-    def test_zmq_bus_requests ( self ):
-        pass
+    def test_zmq_bus_cans ( self ):
+        # The can's array travels out-of-band, in its own frame.
+        socket = self.connect ( zmq.DEALER )
+        data = tuna.io.can ( array = numpy.arange ( 4 * 256 * 256, dtype = numpy.float32 ).reshape ( 4, 256, 256 ) )
+        socket.send_multipart ( [ b"", b"task", b"1", b"Overscan" ] +
+                                tuna.zeromq.object_to_frames ( ( ( ), { "data" : data } ) ), copy = False )
+        frames = socket.recv_multipart ( copy = False )
+        self.assertEqual ( frames [ 1 ].bytes, b"result" )
+        self.assertEqual ( len ( frames ), 5 )
+        result = tuna.zeromq.frames_to_object ( frames [ 3 : ] )
+        self.assertTrue ( numpy.array_equal ( result.array, data.array ) )
+        socket.close ( )
+
+    def test_zmq_bus_errors ( self ):
+        socket = self.connect ( zmq.DEALER )
+        socket.send_multipart ( [ b"", b"task", b"1", b"No such step", pickle.dumps ( ( ( ), { } ) ) ] )
+        empty, status, request_id, message = socket.recv_multipart ( )
+        self.assertEqual ( ( status, request_id ), ( b"error", b"1" ) )
+        self.assertIn ( b"No such step", message )
+        socket.close ( )
 
-    def test_zmq_bus_forwards ( self ):
-        pass
+    def test_zmq_bus_backpressure ( self ):
+        broker = tuna.zeromq.zmq_broker ( workers = 1, max_pending = 1 )
+        frontend = recording_socket ( )
+        for request_id in [ b"1", b"2" ]:
+            broker._handle_client ( frontend, [ b"client", b"", b"task", request_id, b"Overscan", b"" ] )
+        self.assertEqual ( broker.get_pending ( ), 1 )
+        self.assertEqual ( frontend.sent, [ [ b"client", b"", b"busy", b"2" ] ] )
 
 if __name__ == '__main__':
     unittest.main ( )
@@ -0,0 +1,65 @@
+import numpy
+import tuna
+import unittest
+import zmq
+
+class unit_test_zmq_can ( unittest.TestCase ):
+    def setUp ( self ):
+        tuna.log.set_path ( "nose.log" )
+        self.zmq_context = zmq.Context ( )
+        self.sender = self.zmq_context.socket ( zmq.PAIR )
+        self.sender.bind ( "inproc://unit_test_zmq_can" )
+        self.receiver = self.zmq_context.socket ( zmq.PAIR )
+        self.receiver.connect ( "inproc://unit_test_zmq_can" )
+        self.client = tuna.zeromq.zmq_client ( )
+
+    def test_round_trip ( self ):
+        cube = numpy.arange ( 3 * 4 * 5, dtype = ">i2" ).reshape ( 3, 4, 5 )
+        for array in [ cube, numpy.asfortranarray ( cube ), cube [ :, ::2, 1: ], cube.astype ( numpy.float32 ) ]:
+            sent = tuna.io.can ( array = array,
+                                 file_name = "cube.fits",
+                                 interference_order = 791,
+                                 interference_reference_wavelength = 6598.953125 )
+            sent.metadata = { "EXPTIME" : ( 1.5, "Exposure time" ) }
+            tracker = self.client.send_can ( self.sender, sent )
+            received = self.client.recv_can ( self.receiver )
+            tracker.wait ( )
+            self.assertEqual ( received.array.dtype, array.dtype )
+            self.assertTrue ( numpy.array_equal ( received.array, array ) )
+            self.assertEqual ( received.file_name, "cube.fits" )
+            self.assertEqual ( received.interference_order, 791 )
+            self.assertEqual ( received.interference_reference_wavelength, 6598.953125 )
+            self.assertEqual ( received.metadata, sent.metadata )
+
+    def test_zero_copy ( self ):
+        array = numpy.ones ( shape = ( 2, 64, 64 ) )
+        self.client.send_can ( self.sender, tuna.io.can ( array = array ) )
+        received = self.client.recv_can ( self.receiver )
+        # Over inproc://, the received array is the sent array's memory.
+        self.assertFalse ( received.array.flags.owndata )
+        received.array [ 0, 0, 0 ] = 2
+        self.assertEqual ( array [ 0, 0, 0 ], 2 )
+
+        self.client.send_can ( self.sender, tuna.io.can ( array = array ) )
+        received = self.client.recv_can ( self.receiver, copy = True )
+        received.array [ 0, 0, 0 ] = 3
+        self.assertEqual ( array [ 0, 0, 0 ], 2 )
+
+    def test_objects ( self ):
+        array = numpy.arange ( 1000, dtype = numpy.float64 ).reshape ( 10, 100 )
+        frames = tuna.zeromq.object_to_frames ( { "data" : tuna.io.can ( array = array ), "factor" : 2 } )
+        # The array is sent in its own frame, instead of inside the pickle.
+        self.assertEqual ( len ( frames ), 2 )
+        self.assertLess ( len ( frames [ 0 ] ), array.nbytes )
+        value = tuna.zeromq.frames_to_object ( frames )
+        self.assertTrue ( numpy.array_equal ( value [ "data" ].array, array ) )
+        self.assertEqual ( value [ "factor" ], 2 )
+
+    def tearDown ( self ):
+        self.sender.close ( )
+        self.receiver.close ( )
+        self.zmq_context.term ( )
+        self.client.zmq_context.term ( )
+
+if __name__ == '__main__':
+    unittest.main ( )
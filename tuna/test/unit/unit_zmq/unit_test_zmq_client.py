@@ -1,12 +1,13 @@
+import asyncio
 import threading
 import tuna
 import unittest
 import zmq
 
 class threaded_bus ( threading.Thread ):
-    def __init__ ( self ):
+    def __init__ ( self, **kwargs ):
         super ( threaded_bus, self ).__init__ ( )
-        self.zmq_bus_instance = tuna.zeromq.zmq_proxy ( )
+        self.zmq_bus_instance = tuna.zeromq.zmq_broker ( **kwargs )
 
     def close ( self ):
         self.zmq_bus_instance.close ( )
@@ -15,32 +16,84 @@ class threaded_bus ( threading.Thread ):
         self.zmq_bus_instance.run ( )
 
 class unit_test_zmq_client ( unittest.TestCase ):
+    frontend_address = "tcp://127.0.0.1:15100"
+
     @classmethod
     def setUpClass ( self ):
-        pass
+        tuna.log.set_path ( "nose.log" )
+        self.threaded_bus_instance = threaded_bus ( frontend_address = self.frontend_address,
+                                                    backend_address = "tcp://127.0.0.1:15102",
+                                                    workers = 2,
+                                                    heartbeat_interval = 0.2 )
+        self.threaded_bus_instance.start ( )
 
     @classmethod
     def tearDownClass ( self ):
-        pass
+        self.threaded_bus_instance.close ( )
+        self.threaded_bus_instance.join ( )
 
-    def test_zmq_bus_replies ( self ):
-        return 
+    def setUp ( self ):
+        self.client = tuna.zeromq.zmq_client ( address = self.frontend_address, timeout = 30 )
 
-        self.threaded_bus_instance = threaded_bus ( )
-        self.threaded_bus_instance.start ( )
+    def tearDown ( self ):
+        self.client.close ( )
 
-        client = tuna.zeromq.zmq_client ( )
-        answer = client.send ( "test" )
-        self.assertEqual ( answer, 'ACK' )
-        
-        self.threaded_bus_instance.close ( )
-        self.threaded_bus_instance.join ( )
-        
-    def test_zmq_bus_requests ( self ):
-        pass
+    def test_zmq_client_replies ( self ):
+        self.assertTrue ( self.client.ping ( ) )
+        self.assertEqual ( self.client.send ( "test: zmq client replies?" ), 'ACK' )
+
+    def test_zmq_client_pool ( self ):
+        # Threads share the pooled sockets, instead of opening one per message.
+        answers = [ ]
+        def sender ( ):
+            for count in range ( 25 ):
+                answers.append ( self.client.send ( "test: pooled" ) )
+        threads = [ threading.Thread ( target = sender ) for count in range ( 4 ) ]
+        for thread in threads:
+            thread.start ( )
+        for thread in threads:
+            thread.join ( )
+        self.assertEqual ( answers, [ 'ACK' ] * 100 )
+        self.assertLessEqual ( self.client.get_sockets_created ( ), 4 )
+
+    def test_zmq_client_submit ( self ):
+        kwargs = { "radii" : [ 100, 200 ], "orders" : [ 800, 801 ] }
+        self.assertEqual ( self.client.submit ( "B-ratio estimation", kwargs = kwargs ),
+                           tuna.tools.estimate_b_ratio ( **kwargs ) )
+        self.assertRaises ( RuntimeError, self.client.submit, "No such step" )
+
+    def test_zmq_client_timeout ( self ):
+        client = tuna.zeromq.zmq_client ( address = "tcp://127.0.0.1:15104", timeout = 0.1, retries = 2 )
+        self.assertRaises ( TimeoutError, client.send, "test: nobody listens" )
+        self.assertFalse ( client.ping ( ) )
+        client.close ( )
+
+    def test_zmq_async_client_pipelining ( self ):
+        cases = [ { "radii" : [ 100, 200 ], "orders" : [ order, order + 1 ] } for order in range ( 800, 810 ) ]
+
+        async def pipeline ( ):
+            async with tuna.zeromq.zmq_async_client ( address = self.frontend_address, timeout = 30 ) as client:
+                answers = [ client.submit ( "B-ratio estimation", kwargs = kwargs ) for kwargs in cases ]
+                answers += [ client.send ( "test: pipelined" ) for count in range ( 10 ) ]
+                answers.append ( client.ping ( ) )
+                return await asyncio.gather ( *answers )
+
+        answers = asyncio.run ( pipeline ( ) )
+        self.assertEqual ( answers [ : 10 ], [ tuna.tools.estimate_b_ratio ( **kwargs ) for kwargs in cases ] )
+        self.assertEqual ( answers [ 10 : 20 ], [ 'ACK' ] * 10 )
+        self.assertTrue ( answers [ 20 ] )
+
+    def test_zmq_async_client_timeout ( self ):
+        async def unanswered ( ):
+            client = tuna.zeromq.zmq_async_client ( address = "tcp://127.0.0.1:15104", timeout = 0.1, retries = 1 )
+            try:
+                self.assertFalse ( await client.ping ( ) )
+                with self.assertRaises ( TimeoutError ):
+                    await client.send ( "test: nobody listens" )
+            finally:
+                client.close ( )
 
-    def test_zmq_bus_forwards ( self ):
-        pass
+        asyncio.run ( unanswered ( ) )
 
 if __name__ == '__main__':
     unittest.main ( )
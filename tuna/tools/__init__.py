@@ -1,29 +1,66 @@
 """
 This namespace aggregates modules that are meant to be called as library routines; in other words, if the user is expected to use some tool "X" contained in Tuna, he is expected to call it as "tuna.tools.X", or a shorthand form of that if the user creates an alias for it.
+
+Submodules are imported when one of their names is first accessed, so that "import tuna.tools" does not import matplotlib, sympy or astropy.modeling, which are only needed by some tools.
 """
 
-import tuna.tools.phase_map
-import tuna.tools.wavelength
-
-from .barycenter                     import ( barycenter_geometry,
-                                              barycenter_polynomial_fit )
-from .continuum                      import ( continuum_detector )
-from .estimate_b_ratio               import estimate_b_ratio
-from .find_lowest_nonnull_percentile import find_lowest_nonnull_percentile
-from .fsr                            import ( fsr_mapper )
-from .geometry                       import ( calculate_distance )
-from .get_connected_points           import get_connected_points
-from .get_connected_region           import get_connected_region
-from .get_pixel_neighbours           import get_pixel_neighbours
-from .hash_functions                 import get_hash_from_array
-from .noise                          import noise_detector
-from .overscan                       import ( no_overscan,
-                                              remove_elements )
-try:
-    from .plot                 import ( plot,
-                                        plot_high_res,
-                                        plot_spectral_rings )
-except ImportError as e:
-    print ( "An exception happened while importing the plot module. It will be ignored, but calls to tuna.tools.plot functions will fail. Exception. {}".format ( e ) )
-
-from .spectral_rings_fitter          import find_rings as spectral_rings_fitter
+import importlib
+import importlib.util
+import sys
+import types
+
+_subpackages = ( "phase_map",
+                 "wavelength" )
+
+_names = { "barycenter_geometry"            : ( "barycenter", "barycenter_geometry" ),
+           "barycenter_polynomial_fit"      : ( "barycenter", "barycenter_polynomial_fit" ),
+           "continuum_detector"             : ( "continuum", "continuum_detector" ),
+           "estimate_b_ratio"               : ( "estimate_b_ratio", "estimate_b_ratio" ),
+           "find_lowest_nonnull_percentile" : ( "find_lowest_nonnull_percentile", "find_lowest_nonnull_percentile" ),
+           "fsr_mapper"                     : ( "fsr", "fsr_mapper" ),
+           "calculate_distance"             : ( "geometry", "calculate_distance" ),
+           "get_connected_points"           : ( "get_connected_points", "get_connected_points" ),
+           "get_connected_region"           : ( "get_connected_region", "get_connected_region" ),
+           "get_pixel_neighbours"           : ( "get_pixel_neighbours", "get_pixel_neighbours" ),
+           "get_hash_from_array"            : ( "hash_functions", "get_hash_from_array" ),
+           "get_plane_hashes_from_array"    : ( "hash_functions", "get_plane_hashes_from_array" ),
+           "noise_detector"                 : ( "noise", "noise_detector" ),
+           "no_overscan"                    : ( "overscan", "no_overscan" ),
+           "remove_elements"                : ( "overscan", "remove_elements" ),
+           "plot"                           : ( "plot", "plot" ),
+           "plot_high_res"                  : ( "plot", "plot_high_res" ),
+           "plot_spectral_rings"            : ( "plot", "plot_spectral_rings" ),
+           "count_type"                     : ( "precision", "count_type" ),
+           "float_type"                     : ( "precision", "float_type" ),
+           "get_precision"                  : ( "precision", "get_precision" ),
+           "narrow_counts"                  : ( "precision", "narrow_counts" ),
+           "set_precision"                  : ( "precision", "set_precision" ),
+           "spectral_rings_fitter"          : ( "spectral_rings_fitter", "find_rings" ) }
+
+class _tools_namespace ( types.ModuleType ):
+    """
+    Several tools have the same name as the module that defines them (for example, tuna.tools.plot is the function plot.plot). When such a module is imported, Python binds the module to the namespace under its name; this binds the tool instead, so that tuna.tools.plot is always the function, regardless of how the module was first imported.
+    """
+    def __setattr__ ( self, name, value ):
+        if ( isinstance ( value, types.ModuleType ) and
+             name in _names and
+             _names [ name ] [ 0 ] == name ):
+            value = getattr ( value, _names [ name ] [ 1 ] )
+        super ( _tools_namespace, self ).__setattr__ ( name, value )
+
+sys.modules [ __name__ ].__class__ = _tools_namespace
+
+def __getattr__ ( name ):
+    if name in _subpackages:
+        return importlib.import_module ( "." + name, __name__ )
+    if name in _names:
+        module_name, attribute = _names [ name ]
+        value = getattr ( importlib.import_module ( "." + module_name, __name__ ), attribute )
+        setattr ( sys.modules [ __name__ ], name, value )
+        return value
+    if importlib.util.find_spec ( "." + name, __name__ ) is not None:
+        return importlib.import_module ( "." + name, __name__ )
+    raise AttributeError ( "module '{}' has no attribute '{}'".format ( __name__, name ) )
+
+def __dir__ ( ):
+    return sorted ( set ( globals ( ).keys ( ) ) | set ( _subpackages ) | set ( _names.keys ( ) ) )
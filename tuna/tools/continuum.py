@@ -30,19 +30,26 @@ class detector ( threading.Thread ):
 
     * continuum_to_FSR_ratio : float
         Encoding the ratio below which values are to be ignored.
+
+    * precision : string : defaults to None
+        Overrides the precision policy (see tuna.tools.precision) for the continuum array.
     """
     def __init__ ( self,
                    can : tuna.io.can,
-                   continuum_to_FSR_ratio : float = 0.25 ) -> None:
+                   continuum_to_FSR_ratio : float = 0.25,
+                   precision = None ) -> None:
         super ( self.__class__, self ).__init__ ( )
-        self.__version__ = "0.1.0"
+        self.__version__ = "0.2.1"
         self.changelog = {
+            "0.2.1" : "Tuna 0.16.4 : Integer spectra are averaged in floating point, so that sums of photon counts do not wrap.",
+            "0.2.0" : "Tuna 0.16.4 : The type of the continuum array follows the precision policy.",
             "0.1.0" : "Tuna 0.15.0 : Added changelog. Moved to tuna.tools.continuum. Refactored as a plugin."
             }
 
         self.log = logging.getLogger ( __name__ )
         self.can = can
         self.continuum_to_FSR_ratio = continuum_to_FSR_ratio
+        self.precision = precision
 
         self.continuum = None
         
@@ -56,7 +63,8 @@ class detector ( threading.Thread ):
         start = time.time ( )
 
         continuum_array = numpy.zeros ( shape = ( self.can.array.shape [ 1 ], 
-                                                  self.can.array.shape [ 2 ] ) )
+                                                  self.can.array.shape [ 2 ] ),
+                                        dtype = tuna.tools.float_type ( self.precision ) )
 
         self.log.debug ( "Continuum array 0% created." )
         last_percentage_logged = 0
@@ -67,7 +75,8 @@ class detector ( threading.Thread ):
                 self.log.debug ( "Continuum array %d%% created." % ( percentage ) )
             for col in range ( self.can.array.shape [ 2 ] ):
                 continuum_array [ row ] [ col ] = median_of_lowest_channels ( spectrum = self.can.array [ :, row, col ], 
-                                                                              continuum_to_FSR_ratio = self.continuum_to_FSR_ratio )
+                                                                              continuum_to_FSR_ratio = self.continuum_to_FSR_ratio,
+                                                                              precision = self.precision )
         
         self.log.info ( "Continuum array created." )
 
@@ -76,7 +85,8 @@ class detector ( threading.Thread ):
         self.log.debug ( "detect_continuum() took %ds." % ( time.time ( ) - start ) )
 
 def median_of_lowest_channels ( continuum_to_FSR_ratio = 0.25,
-                                spectrum = numpy.ndarray ):
+                                spectrum = numpy.ndarray,
+                                precision = None ):
     """
     This function's goal is to obtain the median of the three lowest channels of the input profile.
 
@@ -87,6 +97,9 @@ def median_of_lowest_channels ( continuum_to_FSR_ratio = 0.25,
 
     * spectrum : numpy.ndarray
         The spectral data.
+
+    * precision : string : defaults to None
+        Overrides the precision policy (see tuna.tools.precision) for the floating point type in which the two middle channels are averaged, when their number is even. Integer spectra, such as photon counts, would otherwise wrap around when summed.
     """
     log = logging.getLogger ( __name__ )
 
@@ -101,7 +114,8 @@ def median_of_lowest_channels ( continuum_to_FSR_ratio = 0.25,
     lowest.sort ( )
 
     if ( channels % 2 == 0 ):
-        return ( lowest [ math.floor ( channels / 2 ) ] + lowest [ math.ceil ( channels / 2 ) ] ) / 2
+        float_type = tuna.tools.float_type ( precision )
+        return ( float_type ( lowest [ math.floor ( channels / 2 ) ] ) + float_type ( lowest [ math.ceil ( channels / 2 ) ] ) ) / 2
     else:
         return lowest [ math.floor ( channels / 2 ) ]
 
@@ -128,7 +142,8 @@ def suppress_channel ( replacement,
     return result
 
 def continuum_detector ( raw : tuna.io.can,
-                         continuum_to_FSR_ratio : float = 0.25 ) -> tuna.io.can:
+                         continuum_to_FSR_ratio : float = 0.25,
+                         precision = None ) -> tuna.io.can:
     """
     This function's goal is to conveniently return a Tuna can containing the continuum data for the given input.
 
@@ -139,9 +154,13 @@ def continuum_detector ( raw : tuna.io.can,
 
     * continuum_to_FSR_ratio : float
         Encoding the ratio below which values are to be ignored.
+
+    * precision : string : defaults to None
+        Overrides the precision policy (see tuna.tools.precision) for the continuum array.
     """
 
     continuum_detector_object = detector ( can = raw,
-                                           continuum_to_FSR_ratio = continuum_to_FSR_ratio )
+                                           continuum_to_FSR_ratio = continuum_to_FSR_ratio,
+                                           precision = precision )
     continuum_detector_object.join ( )
     return continuum_detector_object.continuum
@@ -1,6 +1,8 @@
 """
 This module's scope is related to hash operations.
 
+Arrays are hashed through their buffer: C-contiguous arrays are hashed in place, and other arrays are streamed in C order, a chunk at a time, so that hashing never needs a full copy of the array.
+
 Example::
 
     >>> import tuna
@@ -8,22 +10,90 @@ Example::
     >>> z = numpy.zeros ( shape = ( 2, 2 ) )
     >>> tuna.tools.get_hash_from_array ( z )
     'de8a847bff8c343d69b853a215e6ee775ef2ef96'
+    >>> tuna.tools.get_hash_from_array ( z, algorithm = "blake2b" )
+    '0210bea6a139797d74aa5764fb226398f07f42c4'
 """
+__version__ = "0.2.0"
+__changelog__ = {
+    "0.2.0" : { "Tuna" : "0.16.4", "Change" : "Hash arrays in place or in chunks instead of copying them. Added the blake2b algorithm and per-plane hashes." }
+    }
 
 import hashlib
+import numpy
+
+hash_chunk_size = 16 * 1024 * 1024
+"""
+The approximate number of bytes copied at a time when hashing arrays that are not C-contiguous.
+"""
+
+def _new_hash ( algorithm ):
+    """
+    This function's goal is to create a hash object for the given algorithm.
+
+    Both supported algorithms produce 20 bytes digests (40 hexadecimal digits), which fit the hash columns of Tuna's database.
+    """
+    if algorithm == "sha1":
+        return hashlib.sha1 ( )
+    if algorithm == "blake2b":
+        return hashlib.blake2b ( digest_size = 20 )
+    raise ValueError ( "Unknown hash algorithm '{}', expected 'sha1' or 'blake2b'.".format ( algorithm ) )
+
+def _update_hash ( hasher, array ):
+    """
+    This function's goal is to feed the bytes of an array, in C order, into a hash object.
+
+    C-contiguous arrays are fed through a view of their own buffer. Other arrays are copied into C order hash_chunk_size bytes at a time, along their first axis.
+    """
+    if array.flags [ 'C_CONTIGUOUS' ]:
+        hasher.update ( memoryview ( array.reshape ( -1 ).view ( numpy.uint8 ) ) )
+        return
+
+    row_bytes = array.itemsize * int ( numpy.prod ( array.shape [ 1 : ], dtype = numpy.int64 ) )
+    rows = max ( 1, hash_chunk_size // max ( 1, row_bytes ) )
+    for start in range ( 0, array.shape [ 0 ], rows ):
+        chunk = numpy.ascontiguousarray ( array [ start : start + rows ] )
+        hasher.update ( memoryview ( chunk.reshape ( -1 ).view ( numpy.uint8 ) ) )
 
-def get_hash_from_array ( array ):
+def get_hash_from_array ( array, algorithm = "sha1" ):
     """
-    This function will obtain a SHA1 hash from the input array by copying it in 'C' order, and then obtaining the hash.
+    This function will obtain a hash from the bytes of the input array, in 'C' order, without copying it.
+
+    The result is the same as hashing a C-ordered copy of the array, so digests are stable regardless of the memory layout of the array.
 
     Parameters:
 
     * array : numpy.ndarray
 
+    * algorithm : string : defaults to "sha1"
+        Either "sha1" or "blake2b". blake2b is faster, but its digests differ from the SHA1 digests already stored in Tuna's database.
+
     Returns:
 
     * string
         This hash string only contains hexadecimal digits.
     """
-    hashable = array.copy ( order = 'C' )
-    return hashlib.sha1 ( hashable ).hexdigest ( )
+    hasher = _new_hash ( algorithm )
+    _update_hash ( hasher, numpy.asarray ( array ) )
+    return hasher.hexdigest ( )
+
+def get_plane_hashes_from_array ( array, algorithm = "sha1" ):
+    """
+    This function will obtain one hash per plane of the input array, so that changes to a cube can be located without comparing whole cubes.
+
+    Parameters:
+
+    * array : numpy.ndarray
+        A 3D array, indexed as [ plane, row, col ], or a 2D array, which is considered a single plane.
+
+    * algorithm : string : defaults to "sha1"
+        Either "sha1" or "blake2b".
+
+    Returns:
+
+    * unnamed variable : list of strings
+        The hash of each plane, in plane order.
+    """
+    array = numpy.asarray ( array )
+    if array.ndim == 2:
+        array = array [ numpy.newaxis ]
+    return [ get_hash_from_array ( array [ plane ], algorithm = algorithm ) for plane in range ( array.shape [ 0 ] ) ]
@@ -51,8 +51,9 @@ class noise_detector ( threading.Thread ):
                    noise_mask_radius : int = 1,
                    noise_threshold : float = None ) -> None:
         super ( self.__class__, self ).__init__ ( )        
-        self.__version__ = "0.1.7"
+        self.__version__ = "0.1.8"
         self.changelog = {
+            "0.1.8" : "Tuna 0.16.4 : refresh_database does nothing until tuna.start_daemons ( ).",
             "0.1.7" : "Tuna 0.15.0 : added annotations.",
             "0.1.6" : "Tuna 0.14.0 : updated documentation.",
             '0.1.5' : "Imroved docstrings for Sphinx.",
@@ -129,8 +130,10 @@ class noise_detector ( threading.Thread ):
         """
         Attempts to updated the database with information about the result of a noise object.
 
-        First, it obtains the hash of the current noise array. Then, it attempts to find the database record related to that hash. If found, the record is updated; otherwise, it is created.
+        First, it obtains the hash of the current noise array. Then, it attempts to find the database record related to that hash. If found, the record is updated; otherwise, it is created. Nothing is done when the daemons were not started (see tuna.start_daemons ( )).
         """
+        if tuna.db is None:
+            return
         digest = tuna.tools.get_hash_from_array ( self.noise.array )
         record = tuna.db.select_record ( 'noise', { 'hash' : digest } )
         function = tuna.db.insert_record
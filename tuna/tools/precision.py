@@ -0,0 +1,123 @@
+"""
+This module's scope is the numeric precision policy of Tuna's reductions.
+
+The policy is either "double", where numeric stages produce numpy.float64 arrays (Tuna's historical behaviour), or "single", where they produce numpy.float32 arrays, and photon-count cubes are kept as unsigned integers (numpy.uint16 when the counts fit, numpy.uint32 otherwise). Single precision halves the memory and bandwidth used by each stage; the accuracy it costs is documented by tuna/test/unit/unit_tools/unit_test_precision.py.
+
+The policy is a global setting, initialized from the environment variable TUNA_PRECISION when it is set, and every function that follows it accepts a precision parameter that overrides it for that call. Stages whose accuracy depends on double precision (model fitting, phase maps and wavelength calibration) always run in double precision.
+
+Example::
+
+    >>> import tuna
+    >>> tuna.tools.set_precision ( "single" )
+    >>> tuna.tools.float_type ( )
+    <class 'numpy.float32'>
+    >>> tuna.tools.float_type ( precision = "double" )
+    <class 'numpy.float64'>
+"""
+__version__ = "0.1.0"
+__changelog__ = {
+    "0.1.0" : { "Tuna" : "0.16.4", "Change" : "Initial version." }
+    }
+
+import numpy
+import os
+
+precisions = ( "double", "single" )
+"""
+The valid values for the precision policy.
+"""
+
+_precision = os.environ.get ( "TUNA_PRECISION", "double" )
+if _precision not in precisions:
+    _precision = "double"
+
+def get_precision ( precision = None ):
+    """
+    This function's goal is to resolve the precision to be used by a call.
+
+    Parameters:
+
+    * precision : string : defaults to None
+        The per-call override; if None, the global policy is used.
+
+    Returns:
+
+    * unnamed variable : string
+        One of precisions.
+    """
+    if precision is None:
+        return _precision
+    if precision not in precisions:
+        raise ValueError ( "Unknown precision '{}', expected one of {}.".format ( precision, precisions ) )
+    return precision
+
+def set_precision ( precision ):
+    """
+    This function's goal is to set the global precision policy.
+
+    Parameters:
+
+    * precision : string
+        Either "double" or "single".
+    """
+    global _precision
+    _precision = get_precision ( precision )
+
+def float_type ( precision = None ):
+    """
+    This function's goal is to choose the floating point type of the arrays produced by numeric stages.
+
+    Parameters:
+
+    * precision : string : defaults to None
+        The per-call override; if None, the global policy is used.
+
+    Returns:
+
+    * unnamed variable : numpy.floating subclass
+        numpy.float64 for "double", numpy.float32 for "single".
+    """
+    if get_precision ( precision ) == "single":
+        return numpy.float32
+    return numpy.float64
+
+def count_type ( precision = None ):
+    """
+    This function's goal is to choose the type of the arrays where photon counts are accumulated.
+
+    Parameters:
+
+    * precision : string : defaults to None
+        The per-call override; if None, the global policy is used.
+
+    Returns:
+
+    * unnamed variable : numpy.number subclass
+        numpy.float64 for "double", numpy.uint32 for "single".
+    """
+    if get_precision ( precision ) == "single":
+        return numpy.uint32
+    return numpy.float64
+
+def narrow_counts ( counts, precision = None ):
+    """
+    This function's goal is to store accumulated photon counts in the smallest type allowed by the policy.
+
+    Parameters:
+
+    * counts : numpy.ndarray
+        The accumulated counts, as allocated with count_type ( ).
+
+    * precision : string : defaults to None
+        The per-call override; if None, the global policy is used.
+
+    Returns:
+
+    * unnamed variable : numpy.ndarray
+        Under "single", a numpy.uint16 copy of counts when all counts fit, or counts itself otherwise. Under "double", counts itself.
+    """
+    if ( get_precision ( precision ) == "single" and
+         counts.size > 0 and
+         counts.max ( ) <= numpy.iinfo ( numpy.uint16 ).max ):
+        return counts.astype ( numpy.uint16 )
+    return counts
@@ -1,6 +1,13 @@
 """
-This namespace aggregates the scopes: ZeroMQ client, ZeroMQ proxy.
+This namespace aggregates the scopes: ZeroMQ client, ZeroMQ job broker, transport of cans over ZeroMQ.
 """
 
-from .zmq_client import zmq_client
-from .zmq_proxy  import zmq_proxy
+from .zmq_broker import zmq_broker
+from .zmq_can    import ( can_to_frames,
+                          frames_to_can,
+                          frames_to_object,
+                          object_to_frames,
+                          recv_can,
+                          send_can )
+from .zmq_client import ( zmq_async_client,
+                          zmq_client )
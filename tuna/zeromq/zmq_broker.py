@@ -0,0 +1,405 @@
+"""
+This module's scope is to dispatch jobs from ZeroMQ clients to a pool of worker processes.
+
+The broker binds two ROUTER sockets: clients connect to the frontend, and the broker's worker processes connect to the backend with DEALER sockets. Each job names a plugin step (see tuna.plugins.registry) and its arguments; the broker queues it, sends it to the next idle worker, and routes the worker's answer back to the client that asked for it. Since clients and workers are addressed by their ZeroMQ identities, a client can have many jobs outstanding, and the jobs of different clients run concurrently.
+
+Messages are multipart, and start with the client's envelope (an empty delimiter frame, which REQ sockets add on their own, and DEALER sockets must send explicitly). The frames after the envelope are:
+
+* from the client: [ b"task", request_id, step_name, *payload ], where payload are the frames of tuna.zeromq.object_to_frames ( ( args, kwargs ) ).
+* from the broker: [ b"result", request_id, *payload ], where payload are the frames of object_to_frames ( result ); [ b"error", request_id, message ] if the job failed; or [ b"busy", request_id ] if the queue was full and the job was not accepted.
+
+The payloads are forwarded by the broker without being copied, and the arrays they contain are sent as separate frames (see tuna.zeromq.zmq_can), so that cubes are cheap to send to the workers and back.
+
+Clients may also send [ b"ping" ], which is answered with [ b"pong" ], and the single-frame "destination: message" notes of earlier versions, which are logged and answered with b"ACK".
+
+Broker and workers exchange heartbeats: a worker that is silent for longer than heartbeat_interval * heartbeat_liveness seconds is terminated and replaced, and its job, if any, is answered with an error. Workers exit when the broker is silent for as long.
+
+Payloads are pickled, so the broker must only be reachable by trusted clients; by default, it binds to the loopback interface.
+
+Example::
+
+    >>> import threading
+    >>> import tuna
+    >>> import zmq
+    >>> broker = tuna.zeromq.zmq_broker ( workers = 2 )
+    >>> threading.Thread ( target = broker.run, daemon = True ).start ( )
+    >>> socket = zmq.Context.instance ( ).socket ( zmq.DEALER )
+    >>> socket.connect ( "tcp://127.0.0.1:5000" )
+    >>> socket.send_multipart ( [ b"", b"task", b"1", b"Overscan" ] +
+    ...                         tuna.zeromq.object_to_frames ( ( ( ), { "data" : raw } ) ), copy = False )
+    >>> frames = socket.recv_multipart ( copy = False )
+    >>> overscanned = tuna.zeromq.frames_to_object ( frames [ 3 : ] )
+    >>> broker.close ( )
+"""
+__version__ = "0.2.2"
+__changelog__ = {
+    "0.2.2" : { "Tuna" : "0.16.4", "Change" : "Lost workers are joined after being terminated, so that they do not linger as zombie processes." },
+    "0.2.1" : { "Tuna" : "0.16.4", "Change" : "The send high-water mark of the ROUTER sockets is unlimited, so that results are never dropped for slow clients." },
+    "0.2.0" : { "Tuna" : "0.16.4", "Change" : "Payloads are forwarded without copying, with arrays sent out-of-band." },
+    "0.1.0" : { "Tuna" : "0.16.4", "Change" : "Initial version, replacing the REQ/REP zmq_proxy." }
+    }
+
+import collections
+import concurrent.futures
+import logging
+import multiprocessing
+import os
+import time
+import zmq
+from tuna.zeromq.zmq_can import ( frames_to_object,
+                                  object_to_frames )
+
+default_frontend_address = "tcp://127.0.0.1:5000"
+"""
+The address where clients connect.
+"""
+
+default_backend_address = "tcp://127.0.0.1:5002"
+"""
+The address where the broker's workers connect.
+"""
+
+def _bytes ( frame ):
+    """
+    This function's goal is to read a control frame, received either as bytes or as a zmq.Frame.
+    """
+    if isinstance ( frame, zmq.Frame ):
+        return frame.bytes
+    return frame
+
+def _run_task ( step_name, payload ):
+    """
+    This function's goal is to run a job in a worker process.
+
+    Parameters:
+
+    * step_name : bytes
+        The registry key of the plugin.
+
+    * payload : list
+        The frames of object_to_frames ( ( args, kwargs ) ).
+
+    Returns:
+
+    * unnamed variable : list
+        The frames answering the job: [ b"result", *payload ] or [ b"error", message ].
+    """
+    import tuna
+    try:
+        # The frames arrived over the backend's transport, so the arrays are views on memory owned by this process.
+        args, kwargs = frames_to_object ( payload )
+        step_name = _bytes ( step_name ).decode ( "utf-8" )
+        function = tuna.plugins.run ( step_name )
+        if function is None:
+            raise LookupError ( "No plugin is registered for \"{}\".".format ( step_name ) )
+        result = function ( *args, **kwargs )
+        return [ b"result" ] + object_to_frames ( result )
+    except Exception as e:
+        return [ b"error", "{}: {}".format ( type ( e ).__name__, e ).encode ( "utf-8" ) ]
+
+def _worker_main ( backend_address, heartbeat_interval, heartbeat_liveness ):
+    """
+    This function's goal is to be the main loop of a worker process.
+
+    The job runs on a separate thread, so that the worker keeps exchanging heartbeats with the broker while it computes; the thread hands the answer back through an inproc socket.
+    """
+    context = zmq.Context ( )
+    socket = context.socket ( zmq.DEALER )
+    socket.setsockopt ( zmq.LINGER, 0 )
+    socket.connect ( backend_address )
+    results_address = "inproc://tuna-worker-results"
+    results = context.socket ( zmq.PULL )
+    results.bind ( results_address )
+
+    def run_and_report ( job, step_name, *payload ):
+        answer = _run_task ( step_name, payload )
+        push = context.socket ( zmq.PUSH )
+        push.connect ( results_address )
+        push.send_multipart ( [ answer [ 0 ], job ] + answer [ 1 : ], copy = False )
+        push.close ( )
+
+    executor = concurrent.futures.ThreadPoolExecutor ( max_workers = 1 )
+    poller = zmq.Poller ( )
+    poller.register ( socket, zmq.POLLIN )
+    poller.register ( results, zmq.POLLIN )
+
+    socket.send_multipart ( [ b"ready", str ( os.getpid ( ) ).encode ( "ascii" ) ] )
+    last_seen = time.monotonic ( )
+    next_heartbeat = last_seen + heartbeat_interval
+    try:
+        while True:
+            events = dict ( poller.poll ( heartbeat_interval * 1000 ) )
+            now = time.monotonic ( )
+            if results in events:
+                socket.send_multipart ( results.recv_multipart ( copy = False ), copy = False )
+            if socket in events:
+                frames = socket.recv_multipart ( copy = False )
+                last_seen = now
+                command = frames [ 0 ].bytes
+                if command == b"task":
+                    executor.submit ( run_and_report, frames [ 1 ].bytes, *frames [ 2 : ] )
+                elif command == b"stop":
+                    break
+            if now - last_seen > heartbeat_interval * heartbeat_liveness:
+                # The broker is gone.
+                break
+            if now >= next_heartbeat:
+                socket.send_multipart ( [ b"heartbeat" ] )
+                next_heartbeat = now + heartbeat_interval
+    finally:
+        executor.shutdown ( wait = False )
+        results.close ( )
+        socket.close ( )
+        context.term ( )
+
+class _worker ( object ):
+    """
+    This class' responsibility is to keep the broker's view of one worker process.
+    """
+    def __init__ ( self, process ):
+        self.process = process
+        self.identity = None
+        self.job = None
+        self.last_seen = time.monotonic ( )
+
+class zmq_broker ( object ):
+    """
+    This class' responsibility is to dispatch the jobs sent by ZeroMQ clients to a pool of worker processes, and to route their results back.
+
+    Its constructor signature is:
+
+    Parameters:
+
+    * frontend_address : string : defaults to default_frontend_address
+        Where clients connect.
+
+    * backend_address : string : defaults to default_backend_address
+        Where the workers connect.
+
+    * workers : integer : defaults to None
+        The number of worker processes. If None, one per CPU is started.
+
+    * max_pending : integer : defaults to 1000
+        The number of jobs that may wait for a worker. Jobs received when the queue is full are answered with b"busy".
+
+    * heartbeat_interval : float : defaults to 1.0
+        Seconds between heartbeats.
+
+    * heartbeat_liveness : integer : defaults to 3
+        The number of heartbeat intervals after which a silent peer is considered dead.
+    """
+    def __init__ ( self,
+                   frontend_address = default_frontend_address,
+                   backend_address = default_backend_address,
+                   workers = None,
+                   max_pending = 1000,
+                   heartbeat_interval = 1.0,
+                   heartbeat_liveness = 3 ):
+        super ( zmq_broker, self ).__init__ ( )
+        self.log = logging.getLogger ( __name__ )
+
+        if workers is None:
+            workers = os.cpu_count ( ) or 1
+        self.frontend_address = frontend_address
+        self.backend_address = backend_address
+        self.workers = max ( 1, workers )
+        self.max_pending = max_pending
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_liveness = heartbeat_liveness
+
+        self.__lock = False
+        self.__multiprocessing = multiprocessing.get_context ( "spawn" )
+        self.__pending = collections.deque ( )
+        self.__idle = collections.deque ( )
+        self.__workers = { }
+        self.__starting = [ ]
+        self.__jobs = { }
+        self.__next_job = 0
+
+    def close ( self ):
+        """
+        This method's goal is to gracefully shutdown the broker: the loop in run ( ) stops the workers and returns within one heartbeat interval.
+        """
+        self.log.debug ( "Shutting down zmq_broker." )
+        self.__lock = False
+
+    def get_pending ( self ):
+        """
+        This method's goal is to inform how many jobs are waiting for a worker.
+
+        Returns:
+
+        * unnamed variable : integer
+        """
+        return len ( self.__pending )
+
+    def _dispatch ( self, backend ):
+        """
+        This method's goal is to send waiting jobs to idle workers.
+        """
+        while self.__pending and self.__idle:
+            identity = self.__idle.popleft ( )
+            worker = self.__workers.get ( identity )
+            if worker is None:
+                continue
+            envelope, request_id, step_name, payload = self.__pending.popleft ( )
+            job = str ( self.__next_job ).encode ( "ascii" )
+            self.__next_job += 1
+            self.__jobs [ job ] = ( envelope, request_id )
+            worker.job = job
+            backend.send_multipart ( [ identity, b"task", job, step_name ] + payload, copy = False )
+
+    def _handle_client ( self, frontend, frames ):
+        """
+        This method's goal is to accept or reject a message from a client.
+        """
+        delimiters = [ index for index, frame in enumerate ( frames ) if len ( frame ) == 0 ]
+        if not delimiters:
+            self.log.warning ( "Discarding a client message without envelope." )
+            return
+        envelope = [ _bytes ( frame ) for frame in frames [ : delimiters [ 0 ] + 1 ] ]
+        body = frames [ delimiters [ 0 ] + 1 : ]
+        command = _bytes ( body [ 0 ] ) if body else None
+
+        if len ( body ) >= 4 and command == b"task":
+            request_id = _bytes ( body [ 1 ] )
+            if len ( self.__pending ) >= self.max_pending:
+                frontend.send_multipart ( envelope + [ b"busy", request_id ] )
+                return
+            self.__pending.append ( ( envelope, request_id, _bytes ( body [ 2 ] ), list ( body [ 3 : ] ) ) )
+            return
+        if len ( body ) == 1 and command == b"ping":
+            frontend.send_multipart ( envelope + [ b"pong" ] )
+            return
+        if len ( body ) == 1:
+            destination, separator, contents = command.decode ( "utf-8", "replace" ).partition ( ": " )
+            self.log.info ( "zmq_broker received the {} message '{}'.".format ( destination, contents ) )
+            frontend.send_multipart ( envelope + [ b"ACK" ] )
+            return
+        self.log.warning ( "Discarding a malformed client message." )
+
+    def _handle_worker ( self, frontend, frames ):
+        """
+        This method's goal is to process a message from a worker: its registration, a heartbeat, or the answer to a job.
+        """
+        identity = _bytes ( frames [ 0 ] )
+        command = _bytes ( frames [ 1 ] )
+        worker = self.__workers.get ( identity )
+        if worker is None:
+            if command != b"ready":
+                return
+            starting = [ entry for entry in self.__starting if str ( entry.process.pid ).encode ( "ascii" ) == _bytes ( frames [ 2 ] ) ]
+            if not starting:
+                return
+            worker = starting [ 0 ]
+            self.__starting.remove ( worker )
+            worker.identity = identity
+            self.__workers [ identity ] = worker
+            self.__idle.append ( identity )
+        worker.last_seen = time.monotonic ( )
+
+        if command in ( b"result", b"error" ):
+            envelope, request_id = self.__jobs.pop ( _bytes ( frames [ 2 ] ) )
+            frontend.send_multipart ( envelope + [ command, request_id ] + list ( frames [ 3 : ] ), copy = False )
+            worker.job = None
+            self.__idle.append ( identity )
+
+    def _start_worker ( self ):
+        """
+        This method's goal is to start a worker process; the worker is known by its identity once it sends b"ready" with its process id.
+        """
+        process = self.__multiprocessing.Process ( target = _worker_main,
+                                                   args = ( self.backend_address,
+                                                            self.heartbeat_interval,
+                                                            self.heartbeat_liveness ) )
+        process.daemon = True
+        process.start ( )
+        self.__starting.append ( _worker ( process ) )
+
+    def _check_workers ( self, frontend, backend ):
+        """
+        This method's goal is to replace the workers that died or stopped sending heartbeats, and to fail their jobs.
+        """
+        now = time.monotonic ( )
+        deadline = self.heartbeat_interval * self.heartbeat_liveness
+        for identity, worker in list ( self.__workers.items ( ) ):
+            if ( worker.process.is_alive ( ) and
+                 now - worker.last_seen <= deadline ):
+                backend.send_multipart ( [ identity, b"heartbeat" ] )
+                continue
+            self.log.warning ( "Worker process {} is lost, starting a new one.".format ( worker.process.pid ) )
+            if worker.job is not None:
+                envelope, request_id = self.__jobs.pop ( worker.job )
+                frontend.send_multipart ( envelope + [ b"error", request_id, b"WorkerLost: the worker running this job died." ] )
+            del self.__workers [ identity ]
+            if identity in self.__idle:
+                self.__idle.remove ( identity )
+            worker.process.terminate ( )
+            worker.process.join ( timeout = self.heartbeat_interval )
+            self._start_worker ( )
+        for worker in list ( self.__starting ):
+            if not worker.process.is_alive ( ):
+                self.__starting.remove ( worker )
+                worker.process.join ( timeout = self.heartbeat_interval )
+                self._start_worker ( )
+
+    def run ( self ):
+        """
+        This method's goal is to orchestrate incoming messages.
+        It will run in loop, until close ( ) is called, receiving jobs from clients, dispatching them to idle workers, and routing the answers back.
+        """
+        self.__lock = True
+        context = zmq.Context ( )
+        frontend = context.socket ( zmq.ROUTER )
+        backend = context.socket ( zmq.ROUTER )
+        for socket in ( frontend, backend ):
+            socket.setsockopt ( zmq.LINGER, 0 )
+            # At its send high-water mark, a ROUTER socket silently drops messages; a dropped result would be resent, and run again, by the client. The number of jobs is bounded by the busy replies instead.
+            socket.setsockopt ( zmq.SNDHWM, 0 )
+            socket.setsockopt ( zmq.RCVHWM, self.max_pending )
+
+        for socket, address in ( ( frontend, self.frontend_address ),
+                                 ( backend, self.backend_address ) ):
+            first_try = True
+            while self.__lock:
+                try:
+                    socket.bind ( address )
+                    break
+                except zmq.ZMQError as e:
+                    if first_try:
+                        self.log.debug ( "zmq_broker could not bind to {} ({}); will silently retry every 10 seconds.".format ( address, e ) )
+                        first_try = False
+                    time.sleep ( 10 )
+
+        if self.__lock:
+            for count in range ( self.workers ):
+                self._start_worker ( )
+
+        poller = zmq.Poller ( )
+        poller.register ( frontend, zmq.POLLIN )
+        poller.register ( backend, zmq.POLLIN )
+        next_heartbeat = time.monotonic ( ) + self.heartbeat_interval
+        try:
+            while self.__lock:
+                events = dict ( poller.poll ( self.heartbeat_interval * 1000 ) )
+                if backend in events:
+                    self._handle_worker ( frontend, backend.recv_multipart ( copy = False ) )
+                if frontend in events:
+                    self._handle_client ( frontend, frontend.recv_multipart ( copy = False ) )
+                self._dispatch ( backend )
+                if time.monotonic ( ) >= next_heartbeat:
+                    self._check_workers ( frontend, backend )
+                    next_heartbeat = time.monotonic ( ) + self.heartbeat_interval
+        finally:
+            for identity in list ( self.__workers.keys ( ) ):
+                backend.send_multipart ( [ identity, b"stop" ] )
+            for worker in list ( self.__workers.values ( ) ) + self.__starting:
+                worker.process.join ( timeout = self.heartbeat_interval )
+                if worker.process.is_alive ( ):
+                    worker.process.terminate ( )
+            self.__workers = { }
+            self.__idle.clear ( )
+            self.__starting = [ ]
+            frontend.close ( )
+            backend.close ( )
+            context.term ( )
@@ -0,0 +1,232 @@
+"""
+This module's scope is the transport of Tuna cans over ZeroMQ sockets, without copying their arrays.
+
+A can is sent as two frames: a header, encoded as UTF-8 JSON, with the array's dtype, shape and strides and the can's interference parameters, file name and metadata (the same description used by .can files, see tuna.io.can_file); and the raw bytes of the array. The array's own buffer is handed to ZeroMQ, and the received array is a view on the buffer of the received frame, so that the bytes of a cube are not copied by Python on either side.
+
+Since ZeroMQ sends messages asynchronously, the array of a sent can must not be modified until the message has left; send_can ( ) returns a tracker for that purpose. An array received without copy is a view on the message's memory; over tcp:// and ipc:// that memory belongs to the receiver, but over inproc:// it is the sender's own array.
+
+Photon tables are not transported.
+
+Other Python objects, such as the arguments and results of the jobs run by tuna.zeromq.zmq_broker, are sent with object_to_frames ( ): they are pickled with protocol 5, and the buffers of the numpy arrays they contain (including the arrays of cans) are sent as separate frames instead of being copied into the pickle.
+
+Example::
+
+    >>> import tuna
+    >>> import zmq
+    >>> context = zmq.Context.instance ( )
+    >>> sender = context.socket ( zmq.PAIR )
+    >>> sender.bind ( "inproc://cans" )
+    >>> receiver = context.socket ( zmq.PAIR )
+    >>> receiver.connect ( "inproc://cans" )
+    >>> tracker = tuna.zeromq.send_can ( sender, raw )
+    >>> received = tuna.zeromq.recv_can ( receiver )
+"""
+__version__ = "0.1.0"
+__changelog__ = {
+    "0.1.0" : { "Tuna" : "0.16.4", "Change" : "Initial version." }
+    }
+
+import json
+import numpy
+import pickle
+import zmq
+from tuna.io.can_file import ( _decode_json,
+                               _encode_json )
+import tuna
+
+zmq_can_version = 1
+"""
+The version of the header format; headers from newer versions are rejected.
+"""
+
+def can_to_frames ( can ):
+    """
+    This function's goal is to describe a can as the frames of a ZeroMQ message.
+
+    C- and Fortran-contiguous arrays are not copied; other arrays are copied into a C-contiguous array.
+
+    Parameters:
+
+    * can : tuna.io.can
+
+    Returns:
+
+    * unnamed variable : list
+        The header (bytes) and the array, whose buffer is the second frame.
+    """
+    array = can.array
+    if array is None:
+        raise ValueError ( "Cannot send a can without array." )
+    if array.dtype.hasobject:
+        raise ValueError ( "Arrays of Python objects cannot be sent as cans." )
+    if not ( array.flags.c_contiguous or array.flags.f_contiguous ):
+        array = numpy.ascontiguousarray ( array )
+
+    metadata = None
+    if can.metadata is not None:
+        metadata = { }
+        for key in can.metadata.keys ( ):
+            metadata [ str ( key ) ] = list ( can.metadata [ key ] )
+    header = { "version"                           : zmq_can_version,
+               "dtype"                             : array.dtype.str,
+               "shape"                             : list ( array.shape ),
+               "strides"                           : list ( array.strides ),
+               "file_name"                         : can.file_name,
+               "file_type"                         : can.file_type,
+               "interference_order"                : can.interference_order,
+               "interference_reference_wavelength" : can.interference_reference_wavelength,
+               "metadata"                          : metadata }
+    block = json.dumps ( header, default = _encode_json ).encode ( "utf-8" )
+    if array.flags.c_contiguous:
+        buffer = array.reshape ( -1 )
+    else:
+        buffer = array.T.reshape ( -1 )
+    return [ block, buffer ]
+
+def frames_to_can ( frames, copy = False ):
+    """
+    This function's goal is to rebuild a can from the frames produced by can_to_frames ( ).
+
+    Parameters:
+
+    * frames : list
+        The last two entries are the header and the array frames, either as bytes or as zmq.Frame objects; any previous entries (such as routing envelopes) are ignored.
+
+    * copy : bool : defaults to False
+        If False, the can's array is a view on the buffer of the array frame. If True, the array is a copy.
+
+    Returns:
+
+    * unnamed variable : tuna.io.can
+        A transient can.
+    """
+    if len ( frames ) < 2:
+        raise ValueError ( "A can message has at least 2 frames, received {}.".format ( len ( frames ) ) )
+    header_frame, array_frame = frames [ -2 : ]
+    if isinstance ( header_frame, zmq.Frame ):
+        header_frame = header_frame.bytes
+    if isinstance ( array_frame, zmq.Frame ):
+        array_frame = array_frame.buffer
+
+    header = json.loads ( bytes ( header_frame ).decode ( "utf-8" ), object_hook = _decode_json )
+    if header.get ( "version", 0 ) > zmq_can_version:
+        raise ValueError ( "Can message has header version {}, newer than the supported version {}.".format (
+            header.get ( "version" ), zmq_can_version ) )
+    dtype = numpy.dtype ( header [ "dtype" ] )
+    shape = tuple ( header [ "shape" ] )
+    expected_size = int ( numpy.prod ( shape, dtype = numpy.int64 ) ) * dtype.itemsize
+    if memoryview ( array_frame ).nbytes != expected_size:
+        raise ValueError ( "Can message has {} bytes of data, but its header describes {} bytes.".format (
+            memoryview ( array_frame ).nbytes, expected_size ) )
+    array = numpy.ndarray ( shape = shape,
+                            dtype = dtype,
+                            buffer = array_frame,
+                            strides = tuple ( header [ "strides" ] ) )
+    if copy:
+        array = array.copy ( order = "K" )
+
+    metadata = None
+    if header [ "metadata" ] is not None:
+        metadata = { }
+        for key in header [ "metadata" ].keys ( ):
+            metadata [ key ] = tuple ( header [ "metadata" ] [ key ] )
+    result = tuna.io.can ( array = array,
+                           file_name = header [ "file_name" ],
+                           interference_order = header [ "interference_order" ],
+                           interference_reference_wavelength = header [ "interference_reference_wavelength" ],
+                           transient = True )
+    result.file_type = header [ "file_type" ]
+    result.metadata = metadata
+    return result
+
+def send_can ( socket, can, flags = 0, envelope = None ):
+    """
+    This function's goal is to send a can through a ZeroMQ socket, without copying its array.
+
+    Parameters:
+
+    * socket : zmq.Socket
+
+    * can : tuna.io.can
+
+    * flags : integer : defaults to 0
+        ZeroMQ send flags, such as zmq.NOBLOCK.
+
+    * envelope : list of bytes : defaults to None
+        Frames sent before the can, such as the identity and delimiter needed by ROUTER and DEALER sockets.
+
+    Returns:
+
+    * unnamed variable : zmq.MessageTracker
+        Its done property becomes True when ZeroMQ no longer uses the array's buffer; its wait ( ) method blocks until then.
+    """
+    frames = can_to_frames ( can )
+    if envelope:
+        frames = list ( envelope ) + frames
+    return socket.send_multipart ( frames, flags = flags, copy = False, track = True )
+
+def recv_can ( socket, flags = 0, copy = False ):
+    """
+    This function's goal is to receive a can sent with send_can ( ).
+
+    Parameters:
+
+    * socket : zmq.Socket
+
+    * flags : integer : defaults to 0
+        ZeroMQ receive flags, such as zmq.NOBLOCK.
+
+    * copy : bool : defaults to False
+        If False, the can's array is a view on the received message. If True, the array is a copy.
+
+    Returns:
+
+    * unnamed variable : tuna.io.can
+        A transient can.
+    """
+    return frames_to_can ( socket.recv_multipart ( flags = flags, copy = False ), copy = copy )
+
+def object_to_frames ( value ):
+    """
+    This function's goal is to describe a picklable object as the frames of a ZeroMQ message, sending the buffers of its arrays out-of-band.
+
+    Parameters:
+
+    * value : object
+
+    Returns:
+
+    * unnamed variable : list
+        The pickle (bytes), followed by one buffer per contiguous numpy.ndarray found in value.
+    """
+    buffers = [ ]
+    block = pickle.dumps ( value, protocol = 5, buffer_callback = buffers.append )
+    return [ block ] + [ buffer.raw ( ) for buffer in buffers ]
+
+def frames_to_object ( frames, copy = False ):
+    """
+    This function's goal is to rebuild an object from the frames produced by object_to_frames ( ).
+
+    Parameters:
+
+    * frames : list
+        Either bytes or zmq.Frame objects.
+
+    * copy : bool : defaults to False
+        If False, the arrays in the object are views on the buffers of the frames. If True, they are copies.
+
+    Returns:
+
+    * unnamed variable : object
+    """
+    buffers = [ ]
+    for frame in frames [ 1 : ]:
+        if isinstance ( frame, zmq.Frame ):
+            frame = frame.buffer
+        if copy:
+            frame = bytearray ( frame )
+        buffers.append ( frame )
+    block = frames [ 0 ]
+    if isinstance ( block, zmq.Frame ):
+        block = block.buffer
+    return pickle.loads ( block, buffers = buffers )
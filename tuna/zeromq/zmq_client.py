@@ -1,83 +1,551 @@
 """
 This module's scope is the ZeroMQ client.
+
+Clients keep their connections to the broker (see tuna.zeromq.zmq_broker) open, instead of opening a connection per message. Each request carries an identifier in its envelope, which the broker echoes in its reply, so that replies are matched to their requests even when earlier requests timed out and were resent.
+
+zmq_client is meant for threaded code: each thread borrows a connection from a pool, so that the connections are reused across threads without being shared concurrently. zmq_async_client is meant for asyncio code: all coroutines share one connection, and their requests are pipelined, without waiting for the replies of earlier requests.
+
+Both have a timeout per attempt and a retry budget: a request that is not answered in time, or that the broker rejects because its queue is full, is resent until the budget is exhausted, and then TimeoutError is raised.
+
+Example::
+
+    >>> import asyncio
+    >>> import tuna
+    >>> client = tuna.zeromq.zmq_client ( timeout = 2.5, retries = 3 )
+    >>> client.send ( "info: reduction started." )
+    'ACK'
+    >>> estimate = client.submit ( "B-ratio estimation", kwargs = { "radii" : [ 100, 200 ], "orders" : [ 800, 801 ] } )
+    >>> async def estimates ( ):
+    ...     async_client = tuna.zeromq.zmq_async_client ( )
+    ...     return await asyncio.gather ( *[ async_client.submit ( "B-ratio estimation", kwargs = { "radii" : [ 100, 200 ], "orders" : [ order, order + 1 ] } ) for order in range ( 800, 810 ) ] )
+    >>> asyncio.run ( estimates ( ) )
 """
+__version__ = "0.3.0"
+__changelog__ = {
+    "0.3.0" : { "Tuna" : "0.16.4", "Change" : "Persistent, pooled connections, with timeouts and retry budgets; submit ( ); added zmq_async_client." },
+    "0.2.0" : { "Tuna" : "0.16.4", "Change" : "send_can ( ) and recv_can ( ), for transporting cans without copying their arrays; fixed send ( )." }
+    }
 
+import asyncio
+import itertools
 import logging
+import queue
+import time
 import zmq
+import zmq.asyncio
+from tuna.zeromq.zmq_broker import default_frontend_address
+from tuna.zeromq.zmq_can import ( frames_to_object,
+                                  object_to_frames,
+                                  recv_can,
+                                  send_can )
+
+def _task_body ( step_name, args, kwargs ):
+    """
+    This function's goal is to build the frames of a job for the broker.
+    """
+    if kwargs is None:
+        kwargs = { }
+    return [ b"task", b"0", step_name.encode ( "utf-8" ) ] + object_to_frames ( ( tuple ( args ), kwargs ) )
+
+def _task_result ( reply, step_name ):
+    """
+    This function's goal is to extract the result of a job from the broker's reply, raising RuntimeError if the job failed.
+    """
+    status = reply [ 0 ].bytes
+    if status == b"result":
+        return frames_to_object ( reply [ 2 : ] )
+    if status == b"error":
+        raise RuntimeError ( "Job \"{}\" failed: {}".format ( step_name, reply [ 2 ].bytes.decode ( "utf-8", "replace" ) ) )
+    raise RuntimeError ( "Unexpected reply to job \"{}\": {}.".format ( step_name, status ) )
 
 class zmq_client ( object ):
     """
-    This class' responsibility is to define a ZeroMQ client that connects to a proxy to mediate communication with other clients.
+    This class' responsibility is to define a ZeroMQ client that connects to the broker, to send it messages and jobs.
 
-    Utilizes the `lazy pirate pattern <http://zguide.zeromq.org/page:all#Client-Side-Reliability-Lazy-Pirate-Pattern>`_.
+    Connections are DEALER sockets that stay open, kept in a pool: a thread borrows a socket for each request and returns it afterwards, so the number of connections is bounded by the number of threads sending concurrently. Sockets are created on demand, and are only closed by close ( ).
+
+    Cans can be exchanged with other processes through send_can ( ) and recv_can ( ), which transport their arrays without copying them (see tuna.zeromq.zmq_can).
+
+    Its constructor signature is:
+
+    Parameters:
+
+    * address : string : defaults to tuna.zeromq.zmq_broker.default_frontend_address
+        The broker's frontend.
+
+    * timeout : float : defaults to 2.5
+        Seconds to wait for a reply before resending a request. None waits forever.
+
+    * retries : integer : defaults to 3
+        How many times a request is resent, after a timeout or a busy reply, before TimeoutError is raised.
+
+    * retry_delay : float : defaults to 0.1
+        Seconds to wait before resending a request that the broker rejected as busy; the delay doubles on each retry.
+
+    * pool_size : integer : defaults to 8
+        The number of idle sockets kept open; sockets returned to a full pool are closed.
     """
 
-    def __init__ ( self ):
-        self.log = logging.getLogger ( )
-        self.log.setLevel ( logging.DEBUG )
+    def __init__ ( self,
+                   address = default_frontend_address,
+                   timeout = 2.5,
+                   retries = 3,
+                   retry_delay = 0.1,
+                   pool_size = 8 ):
+        self.log = logging.getLogger ( __name__ )
 
+        self.address = address
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_delay = retry_delay
         self.zmq_context = zmq.Context ( )
-        self.zmq_socket_req = None
-        self.poller = None
-        
-    def close_socket ( self ):
+        self.__pool = queue.LifoQueue ( maxsize = pool_size )
+        self.__request_ids = itertools.count ( )
+        self.__sockets_created = 0
+
+    def __enter__ ( self ):
+        return self
+
+    def __exit__ ( self, exception_type, exception_value, traceback ):
+        self.close ( )
+
+    def _acquire ( self ):
         """
-        This method's goal is to gracefully close the client connection with the proxy.
+        This method's goal is to borrow a connected socket from the pool, creating one if the pool is empty.
         """
-        self.zmq_socket_req.setsockopt ( zmq.LINGER, 0 )
-        self.zmq_socket_req.close ( )
-        self.poller.unregister ( self.zmq_socket_req )
+        try:
+            return self.__pool.get_nowait ( )
+        except queue.Empty:
+            pass
+        socket = self.zmq_context.socket ( zmq.DEALER )
+        socket.setsockopt ( zmq.LINGER, 0 )
+        socket.connect ( self.address )
+        self.__sockets_created += 1
+        return socket
+
+    def _release ( self, socket ):
+        """
+        This method's goal is to return a socket to the pool, or close it if the pool is full.
+        """
+        try:
+            self.__pool.put_nowait ( socket )
+        except queue.Full:
+            socket.close ( )
+
+    def close ( self ):
+        """
+        This method's goal is to close the client's connections. It must not be called while other threads are waiting for replies.
+        """
+        while True:
+            try:
+                self.__pool.get_nowait ( ).close ( )
+            except queue.Empty:
+                break
+        self.zmq_context.destroy ( linger = 0 )
+
+    def get_sockets_created ( self ):
+        """
+        This method's goal is to inform how many connections this client has opened.
+
+        Returns:
+
+        * unnamed variable : integer
+        """
+        return self.__sockets_created
+
+    def ping ( self, timeout = None ):
+        """
+        This method's goal is to check that the broker is answering.
+
+        Parameters:
+
+        * timeout : float : defaults to None
+            If None, the client's timeout is used.
+
+        Returns:
+
+        * unnamed variable : bool
+            True if the broker answered; False if it did not answer within the retry budget.
+        """
+        try:
+            reply = self.request ( [ b"ping" ], timeout = timeout )
+        except TimeoutError:
+            return False
+        return reply [ 0 ].bytes == b"pong"
+
+    def request ( self, body, timeout = None, retries = None ):
+        """
+        This method's goal is to send a message to the broker and return its reply, resending it on timeouts and busy replies within the retry budget.
+
+        Parameters:
+
+        * body : list of bytes
+            The frames of the message, without envelope.
+
+        * timeout : float : defaults to None
+            If None, the client's timeout is used.
+
+        * retries : integer : defaults to None
+            If None, the client's retry budget is used.
+
+        Returns:
+
+        * unnamed variable : list of zmq.Frame
+            The frames of the reply, without envelope.
+        """
+        if timeout is None:
+            timeout = self.timeout
+        return self._request ( body, timeout, retries )
+
+    def _request ( self, body, timeout, retries ):
+        """
+        This method's goal is to implement request ( ), where a timeout of None waits forever.
+        """
+        if retries is None:
+            retries = self.retries
+        request_id = str ( next ( self.__request_ids ) ).encode ( "ascii" )
+        delay = self.retry_delay
+
+        socket = self._acquire ( )
+        try:
+            for attempt in range ( retries + 1 ):
+                if attempt > 0:
+                    self.log.debug ( "Resending request {} (attempt {} of {}).".format ( request_id, attempt + 1, retries + 1 ) )
+                socket.send_multipart ( [ request_id, b"" ] + body, copy = False )
+                reply = self._wait_reply ( socket, request_id, timeout )
+                if reply is None:
+                    continue
+                if reply [ 0 ].bytes == b"busy":
+                    time.sleep ( delay )
+                    delay *= 2
+                    continue
+                return reply
+        finally:
+            self._release ( socket )
+        raise TimeoutError ( "No reply from {} after {} attempts.".format ( self.address, retries + 1 ) )
+
+    def _wait_reply ( self, socket, request_id, timeout ):
+        """
+        This method's goal is to wait for the reply to a request, discarding late replies to earlier requests.
+
+        Returns:
+
+        * unnamed variable : list of zmq.Frame
+            The reply without envelope, or None on timeout.
+        """
+        deadline = None
+        if timeout is not None:
+            deadline = time.monotonic ( ) + timeout
+        while True:
+            if deadline is None:
+                remaining = None
+            else:
+                remaining = max ( 0, deadline - time.monotonic ( ) ) * 1000
+            if not socket.poll ( remaining ):
+                return None
+            frames = socket.recv_multipart ( copy = False )
+            if frames [ 0 ].bytes == request_id:
+                return frames [ 2 : ]
 
     def send ( self, message ):
         """
-        This method's goal is to send a message to the proxy.
+        This method's goal is to send a message to the broker.
 
         Parameters:
 
         * message : string
+            In the format "destination: contents".
 
         Returns:
 
         * string
             Containing the answer, which should be "ACK".
         """
-        self.open_socket ( )
-        self.register_poller ( )
-
-        self.zmq_socket_req.send_unicode ( prefixed_msg )
-        
-        retries = 0
-        answer = None
-        while answer == None:
-            answer = dict ( self.poller.poll ( 1000 ) )
-            if answer.get ( self.zmq_socket_req ) == zmq.POLLIN:
-                received = self.zmq_socket_req.recv ( )
-                answer = received.decode ( 'utf-8' )
-                if answer != 'ACK':
-                    self.log ( 'Something is fishy!' )
-                    self.log ( 'Received: "%s".' % answer.decode("utf-8") )
-                    self.log ( "Expected: 'ACK'" )
-            else:
-                retries += 1
-                self.open_socket ( )
-                self.register_poller ( )
-                suffixed_message = prefixed_msg + " (message resent " + str ( retries ) + " times)" 
-                self.zmq_socket_req.send_unicode ( suffixed_message )
-
-        self.close_socket ( )
+        answer = self.request ( [ message.encode ( "utf-8" ) ] ) [ 0 ].bytes.decode ( "utf-8" )
+        if answer != 'ACK':
+            self.log.warning ( 'Something is fishy!' )
+            self.log.warning ( 'Received: "%s".' % answer )
+            self.log.warning ( "Expected: 'ACK'" )
         return answer
 
-    def open_socket ( self ):
+    def submit ( self, step_name, args = ( ), kwargs = None, timeout = None, retries = None ):
         """
-        This method's goal is to gracefully open the connection with the ZeroMQ proxy.
+        This method's goal is to run a plugin step on the broker's workers, and return its result.
+
+        A job that times out is resent, and may therefore run more than once.
+
+        Parameters:
+
+        * step_name : string
+            A key of the plugin registry (see tuna.plugins.registry).
+
+        * args : tuple : defaults to ( )
+
+        * kwargs : dictionary : defaults to None
+
+        * timeout : float : defaults to None
+            Seconds to wait for the result. If None, waits until the job is done.
+
+        * retries : integer : defaults to None
+            If None, the client's retry budget is used.
+
+        Returns:
+
+        * unnamed variable : object
+            The value returned by the plugin.
+        """
+        reply = self._request ( _task_body ( step_name, args, kwargs ), timeout, retries )
+        return _task_result ( reply, step_name )
+
+    def recv_can ( self, socket, flags = 0, copy = False ):
         """
-        self.zmq_socket_req = self.zmq_context.socket ( zmq.REQ )
-        self.zmq_socket_req.connect ( "tcp://127.0.0.1:5000" )
+        This method's goal is to receive a can sent by send_can ( ).
+
+        Parameters:
+
+        * socket : zmq.Socket
+            A connected socket, for example a PULL or PAIR socket created from this client's zmq_context.
+
+        * flags : integer : defaults to 0
+            ZeroMQ receive flags, such as zmq.NOBLOCK.
+
+        * copy : bool : defaults to False
+            If False, the can's array is a view on the received message. If True, the array is a copy.
+
+        Returns:
 
-    def register_poller ( self ):
+        * unnamed variable : tuna.io.can
         """
-        This method's goal is to create a polling mechanism so that message passing is non-blocking.
+        return recv_can ( socket, flags = flags, copy = copy )
+
+    def send_can ( self, socket, can, flags = 0, envelope = None ):
+        """
+        This method's goal is to send a can to another process, without copying its array.
+
+        The can's array must not be modified until the returned tracker is done.
+
+        Parameters:
+
+        * socket : zmq.Socket
+            A connected socket, for example a PUSH or PAIR socket created from this client's zmq_context.
+
+        * can : tuna.io.can
+
+        * flags : integer : defaults to 0
+            ZeroMQ send flags, such as zmq.NOBLOCK.
+
+        * envelope : list of bytes : defaults to None
+            Frames sent before the can, such as the routing frames of ROUTER and DEALER sockets.
+
+        Returns:
+
+        * unnamed variable : zmq.MessageTracker
+        """
+        return send_can ( socket, can, flags = flags, envelope = envelope )
+
+class zmq_async_client ( object ):
+    """
+    This class' responsibility is to define a ZeroMQ client for asyncio code, that connects to the broker to send it messages and jobs.
+
+    All coroutines share one DEALER socket, which stays open: requests are sent as soon as they are made, and a single reader task hands each reply to the coroutine waiting for it, so that many requests can be outstanding at once. The client must be used from a single event loop.
+
+    Its constructor signature is:
+
+    Parameters:
+
+    * address : string : defaults to tuna.zeromq.zmq_broker.default_frontend_address
+        The broker's frontend.
+
+    * timeout : float : defaults to 2.5
+        Seconds to wait for a reply before resending a request. None waits forever.
+
+    * retries : integer : defaults to 3
+        How many times a request is resent, after a timeout or a busy reply, before TimeoutError is raised.
+
+    * retry_delay : float : defaults to 0.1
+        Seconds to wait before resending a request that the broker rejected as busy; the delay doubles on each retry.
+    """
+
+    def __init__ ( self,
+                   address = default_frontend_address,
+                   timeout = 2.5,
+                   retries = 3,
+                   retry_delay = 0.1 ):
+        self.log = logging.getLogger ( __name__ )
+
+        self.address = address
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.zmq_context = zmq.asyncio.Context ( )
+        self.__socket = None
+        self.__reader = None
+        self.__waiting = { }
+        self.__request_ids = itertools.count ( )
+
+    async def __aenter__ ( self ):
+        return self
+
+    async def __aexit__ ( self, exception_type, exception_value, traceback ):
+        self.close ( )
+
+    def _connect ( self ):
+        """
+        This method's goal is to open the socket and start the reader task, on the first request.
+        """
+        if self.__socket is None:
+            self.__socket = self.zmq_context.socket ( zmq.DEALER )
+            self.__socket.setsockopt ( zmq.LINGER, 0 )
+            self.__socket.connect ( self.address )
+            self.__reader = asyncio.ensure_future ( self._read ( ) )
+        return self.__socket
+
+    async def _read ( self ):
+        """
+        This method's goal is to receive replies and hand them to the requests waiting for them; late replies to abandoned requests are discarded.
+        """
+        while True:
+            frames = await self.__socket.recv_multipart ( copy = False )
+            future = self.__waiting.get ( frames [ 0 ].bytes )
+            if future is not None and not future.done ( ):
+                future.set_result ( frames [ 2 : ] )
+
+    def close ( self ):
+        """
+        This method's goal is to stop the reader task and close the connection; pending requests are cancelled.
+        """
+        if self.__reader is not None:
+            self.__reader.cancel ( )
+            self.__reader = None
+        for future in self.__waiting.values ( ):
+            future.cancel ( )
+        self.__waiting = { }
+        if self.__socket is not None:
+            self.__socket.close ( )
+            self.__socket = None
+        self.zmq_context.destroy ( linger = 0 )
+
+    async def ping ( self, timeout = None ):
+        """
+        This method's goal is to check that the broker is answering.
+
+        Parameters:
+
+        * timeout : float : defaults to None
+            If None, the client's timeout is used.
+
+        Returns:
+
+        * unnamed variable : bool
+            True if the broker answered; False if it did not answer within the retry budget.
+        """
+        try:
+            reply = await self.request ( [ b"ping" ], timeout = timeout )
+        except TimeoutError:
+            return False
+        return reply [ 0 ].bytes == b"pong"
+
+    async def request ( self, body, timeout = None, retries = None ):
+        """
+        This method's goal is to send a message to the broker and return its reply, resending it on timeouts and busy replies within the retry budget.
+
+        Parameters:
+
+        * body : list of bytes
+            The frames of the message, without envelope.
+
+        * timeout : float : defaults to None
+            If None, the client's timeout is used.
+
+        * retries : integer : defaults to None
+            If None, the client's retry budget is used.
+
+        Returns:
+
+        * unnamed variable : list of zmq.Frame
+            The frames of the reply, without envelope.
+        """
+        if timeout is None:
+            timeout = self.timeout
+        return await self._request ( body, timeout, retries )
+
+    async def _request ( self, body, timeout, retries ):
+        """
+        This method's goal is to implement request ( ), where a timeout of None waits forever.
+        """
+        if retries is None:
+            retries = self.retries
+        socket = self._connect ( )
+        request_id = str ( next ( self.__request_ids ) ).encode ( "ascii" )
+        delay = self.retry_delay
+
+        try:
+            for attempt in range ( retries + 1 ):
+                if attempt > 0:
+                    self.log.debug ( "Resending request {} (attempt {} of {}).".format ( request_id, attempt + 1, retries + 1 ) )
+                future = asyncio.get_running_loop ( ).create_future ( )
+                self.__waiting [ request_id ] = future
+                await socket.send_multipart ( [ request_id, b"" ] + body, copy = False )
+                try:
+                    reply = await asyncio.wait_for ( future, timeout )
+                except asyncio.TimeoutError:
+                    continue
+                if reply [ 0 ].bytes == b"busy":
+                    await asyncio.sleep ( delay )
+                    delay *= 2
+                    continue
+                return reply
+        finally:
+            self.__waiting.pop ( request_id, None )
+        raise TimeoutError ( "No reply from {} after {} attempts.".format ( self.address, retries + 1 ) )
+
+    async def send ( self, message ):
+        """
+        This method's goal is to send a message to the broker.
+
+        Parameters:
+
+        * message : string
+            In the format "destination: contents".
+
+        Returns:
+
+        * string
+            Containing the answer, which should be "ACK".
+        """
+        reply = await self.request ( [ message.encode ( "utf-8" ) ] )
+        answer = reply [ 0 ].bytes.decode ( "utf-8" )
+        if answer != 'ACK':
+            self.log.warning ( 'Something is fishy!' )
+            self.log.warning ( 'Received: "%s".' % answer )
+            self.log.warning ( "Expected: 'ACK'" )
+        return answer
+
+    async def submit ( self, step_name, args = ( ), kwargs = None, timeout = None, retries = None ):
+        """
+        This method's goal is to run a plugin step on the broker's workers, and return its result.
+
+        A job that times out is resent, and may therefore run more than once.
+
+        Parameters:
+
+        * step_name : string
+            A key of the plugin registry (see tuna.plugins.registry).
+
+        * args : tuple : defaults to ( )
+
+        * kwargs : dictionary : defaults to None
+
+        * timeout : float : defaults to None
+            Seconds to wait for the result. If None, waits until the job is done.
+
+        * retries : integer : defaults to None
+            If None, the client's retry budget is used.
+
+        Returns:
+
+        * unnamed variable : object
+            The value returned by the plugin.
         """
-        self.poller = zmq.Poller ( )
-        self.poller.register ( self.zmq_socket_req,
-                               zmq.POLLIN )
+        reply = await self._request ( _task_body ( step_name, args, kwargs ), timeout, retries )
+        return _task_result ( reply, step_name )